@@ -0,0 +1,88 @@
+"""
+Benchmark del despacho de CommandInterpreter (sin base de datos)
+
+Uso:
+    python benchmarks/bench_interpreter.py [cantidad]
+"""
+import logging
+import os
+import sys
+import time
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpreter.command_interpreter import CommandInterpreter
+from lexer.parser import Command
+
+
+class MemoryModel:
+    """Modelo en memoria: aísla el costo del intérprete del de PostgreSQL"""
+
+    ROW = {'id': 1, 'nombre': 'Juan Pérez', 'email': 'juan@example.com'}
+
+    @classmethod
+    def find_all(cls, filters=None, columns=None, order_by=None, limit=None, offset=None):
+        return [cls.ROW]
+
+    @classmethod
+    def find_page(cls, limit, offset=0, after_id=None, filters=None):
+        return [cls.ROW]
+
+    @classmethod
+    def find_by_id(cls, id):
+        return cls.ROW
+
+    @classmethod
+    def create(cls, data):
+        return 1
+
+    @classmethod
+    def update(cls, id, data):
+        return True
+
+    @classmethod
+    def delete(cls, id):
+        return True
+
+    @classmethod
+    def count(cls, filters=None):
+        return 1
+
+
+class BenchInterpreter(CommandInterpreter):
+    MODELS = {entity: MemoryModel for entity in CommandInterpreter.MODELS}
+
+
+COMMANDS = [
+    Command('vehiculo', 'mostrar', []),
+    Command('servicio', 'ver', ['3']),
+    Command('cita', 'agregar', ['1', '2', '2025-01-15', '09:00', 'Cambio de aceite']),
+    Command('vehiculo', 'modificar', ['4', '1', 'SCZ-1234', 'Toyota', 'Corolla', '2020', 'Rojo', '15000']),
+    Command('pago', 'eliminar', ['7']),
+    Command('orden', 'reporte', []),
+    Command('system', 'ayuda', []),
+    Command('invalido', 'mostrar', []),
+]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    logging.disable(logging.CRITICAL)
+
+    interpreter = BenchInterpreter()
+    commands = (COMMANDS * (total // len(COMMANDS) + 1))[:total]
+
+    started = time.perf_counter()
+    for command in commands:
+        interpreter.interpret(command)
+    elapsed = time.perf_counter() - started
+
+    print(f"Comandos interpretados: {total}")
+    print(f"Tiempo total:           {elapsed:.3f}s")
+    print(f"Comandos/segundo:       {total / elapsed:,.0f}")
+    print(f"µs por comando:         {elapsed / total * 1e6:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark del lexer: tokens por segundo con listas largas de parámetros
+
+Compara Lexer (patrón compilado) con CharLexer (implementación anterior).
+
+Uso:
+    python benchmarks/bench_lexer.py [repeticiones]
+"""
+import os
+import sys
+import time
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import Lexer, CharLexer
+
+
+SUBJECTS = {
+    'corto': 'cita mostrar',
+    'agregar': 'vehiculo agregar [2; SCZ-1234; Toyota; Corolla; 2020; Blanco; 45000]',
+    'largo (200 params)': 'servicio agregar [' + '; '.join(
+        f'Servicio {i}; {i * 10.5}; 2025-01-{i % 28 + 1:02d}' for i in range(67)
+    ) + ']',
+}
+
+
+def measure(lexer_class, text, repeat):
+    tokens = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        tokens += len(lexer_class(text).tokenize())
+    return tokens / (time.perf_counter() - started)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"{'Asunto':<20} {'CharLexer tok/s':>16} {'Lexer tok/s':>16} {'Mejora':>8}")
+    for name, text in SUBJECTS.items():
+        old = measure(CharLexer, text, repeat)
+        new = measure(Lexer, text, repeat)
+        print(f"{name:<20} {old:>16,.0f} {new:>16,.0f} {new / old:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
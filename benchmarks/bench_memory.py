@@ -0,0 +1,95 @@
+"""
+Benchmark de memoria: bytes por comando parseado (tracemalloc)
+
+Compara Command (dataclass congelada con __slots__) y Token (NamedTuple)
+con dataclasses comunes equivalentes, que guardan sus atributos en un
+__dict__ por instancia.
+
+Uso:
+    python benchmarks/bench_memory.py [cantidad]
+"""
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer.lexer import tokenize
+from lexer.parser import Command, Parser
+
+
+@dataclass
+class DictCommand:
+    entity: str
+    action: str
+    params: List[Any] = field(default_factory=list)
+    subtype: Optional[str] = None
+
+
+@dataclass
+class DictToken:
+    type: Any
+    value: Any
+    position: int
+
+
+SUBJECTS = [
+    'cita mostrar',
+    'usuario ver [{i}]',
+    'vehiculo agregar [{i}; SCZ-{i:04d}; Toyota; Corolla; 2020; Blanco; 45000]',
+]
+
+
+def build_subjects(total):
+    return [SUBJECTS[i % len(SUBJECTS)].format(i=i) for i in range(total)]
+
+
+def measure(build, total):
+    """Bytes retenidos por objeto construido con ``build``"""
+    subjects = build_subjects(total)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(subject) for subject in subjects]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del kept
+    return size / total
+
+
+def parse_slotted(subject):
+    return Parser(tokenize(subject)).parse()
+
+
+def parse_dict(subject):
+    command = parse_slotted(subject)
+    return DictCommand(command.entity, command.action, list(command.params), command.subtype)
+
+
+def tokens_slotted(subject):
+    return tokenize(subject)
+
+
+def tokens_dict(subject):
+    return [DictToken(t.type, t.value, t.position) for t in tokenize(subject)]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    rows = [
+        ('Command', measure(parse_dict, total), measure(parse_slotted, total)),
+        ('Tokens por asunto', measure(tokens_dict, total), measure(tokens_slotted, total)),
+    ]
+
+    print(f"Asuntos: {total}")
+    print(f"{'Objeto':<20} {'dataclass (B)':>14} {'compacto (B)':>14} {'Ahorro':>8}")
+    for name, old, new in rows:
+        print(f"{name:<20} {old:>14.0f} {new:>14.0f} {1 - new / old:>7.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark de sentencias preparadas: find_by_id con y sin PREPARE/EXECUTE
+
+Necesita la base de datos configurada en .env (idealmente un PostgreSQL
+local, para que la latencia de red no tape el costo de planificación).
+
+Uso:
+    python benchmarks/bench_prepared.py [cantidad]
+"""
+import logging
+import os
+import sys
+import time
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import db
+from config.settings import settings
+from models.usuario import Usuario
+
+
+def run(ids, prepared):
+    """Consultas por segundo de Usuario.find_by_id"""
+    settings.DB_PREPARED_STATEMENTS = prepared
+    Usuario.find_by_id(ids[0])  # calentar: conexión abierta y sentencia preparada
+
+    started = time.perf_counter()
+    for id in ids:
+        Usuario.find_by_id(id)
+    return len(ids) / (time.perf_counter() - started)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    logging.disable(logging.CRITICAL)
+
+    rows = Usuario.find_all(columns=['id'], limit=1000)
+    if not rows:
+        print("La tabla usuarios está vacía o no hay conexión a la base de datos")
+        return
+    ids = [rows[i % len(rows)]['id'] for i in range(total)]
+
+    plain = run(ids, prepared=False)
+    prepared = run(ids, prepared=True)
+    db.close()
+
+    print(f"Consultas find_by_id:   {total}")
+    print(f"Sin preparar:           {plain:,.0f} consultas/s")
+    print(f"Con PREPARE/EXECUTE:    {prepared:,.0f} consultas/s")
+    print(f"Mejora:                 {(prepared / plain - 1) * 100:+.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,65 +2,151 @@
 Módulo de conexión a la base de datos PostgreSQL
 """
 import psycopg2
-from psycopg2 import pool
+import functools
+import itertools
 import logging
+import re
+import threading
+from contextlib import contextmanager
+from config.pool import ConnectionPool
+from config.rows import dict_rows
 from config.settings import settings
 
+
+class Transaction:
+    """
+    Transacción en curso: conexión fijada al hilo y estado de error
+    
+    Un bloque anidado es un Transaction con ``parent`` y su propio
+    ``savepoint``: su ``failed`` solo deshace lo hecho dentro de él.
+    """
+    
+    def __init__(self, conn, parent=None):
+        self.conn = conn
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.savepoint = f"sp_{self.depth}" if parent else None
+        self.failed = False
+        self.callbacks = []
+    
+    def set_rollback(self):
+        """Marca la transacción para deshacerse al terminar el bloque"""
+        self.failed = True
+    
+    @property
+    def root(self):
+        """Transacción externa (la que hace commit)"""
+        tx = self
+        while tx.parent:
+            tx = tx.parent
+        return tx
+
+
+class PreparedStatements:
+    """
+    Sentencias preparadas de una conexión
+    
+    Asocia el texto SQL (con placeholders %s) al nombre con que se hizo
+    PREPARE en esa sesión. PostgreSQL planifica una vez y cada EXECUTE
+    reutiliza el plan. ``generation`` permite invalidarlas todas (p. ej.
+    tras una migración) sin recorrer las conexiones del pool.
+    """
+    
+    PLACEHOLDER = re.compile(r'%%|%s')
+    
+    def __init__(self, generation, max_size):
+        self.generation = generation
+        self.max_size = max_size
+        self.names = {}        # texto SQL -> nombre de la sentencia
+        self._counter = itertools.count(1)
+    
+    def get(self, cursor, query):
+        """
+        Nombre de la sentencia para ``query``, preparándola si hace falta
+        
+        Returns:
+            str: Nombre, o None si se alcanzó el máximo por conexión
+        """
+        name = self.names.get(query)
+        if name or len(self.names) >= self.max_size:
+            return name
+        
+        name = f"ps_{next(self._counter)}"
+        cursor.execute(f"PREPARE {name} AS {self.to_positional(query)}")
+        self.names[query] = name
+        return name
+    
+    def forget(self, query):
+        """Olvida una sentencia (se vuelve a preparar con otro nombre)"""
+        self.names.pop(query, None)
+    
+    @classmethod
+    def to_positional(cls, query):
+        """Convierte los placeholders %s de psycopg2 en $1, $2, ..."""
+        numbers = itertools.count(1)
+        return cls.PLACEHOLDER.sub(lambda m: '%' if m.group() == '%%' else f"${next(numbers)}", query)
+    
+    @staticmethod
+    def execute_sql(name, count):
+        """EXECUTE con un %s por parámetro (los valores los escapa psycopg2)"""
+        if not count:
+            return f"EXECUTE {name}"
+        return f"EXECUTE {name}({', '.join(['%s'] * count)})"
+
+
 class Database:
     """Clase para manejar la conexión a PostgreSQL"""
     
-    def __init__(self):
+    def __init__(self, connect=None):
+        """
+        Args:
+            connect: Función que abre una conexión nueva (por defecto
+                psycopg2.connect con los datos de settings)
+        """
         self.logger = logging.getLogger('Database')
+        self.connect = connect or functools.partial(
+            psycopg2.connect,
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            database=settings.DB_NAME,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD
+        )
         self.connection_pool = None
+        self._local = threading.local()
+        
+        # Estadísticas de transacciones
+        self.transactions = 0
+        self.rollbacks = 0
+        self.savepoints = 0
+        self.savepoint_rollbacks = 0
+        
+        # Sentencias preparadas: al cambiar la generación se descartan
+        self.prepared_generation = 0
+        self.prepared = 0
+        self.prepared_hits = 0
         self._initialize_pool()
     
     def _initialize_pool(self):
         """Inicializa el pool de conexiones"""
+        # Thread-safe: el daemon procesa correos en paralelo
+        self.connection_pool = ConnectionPool(self.connect)
         try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1,  # Mínimo de conexiones
-                10,  # Máximo de conexiones
-                host=settings.DB_HOST,
-                port=settings.DB_PORT,
-                database=settings.DB_NAME,
-                user=settings.DB_USER,
-                password=settings.DB_PASSWORD
-            )
-            
-            if self.connection_pool:
-                self.logger.info(f"✅ Pool de conexiones creado:  {settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
-            else:
-                self.logger. error("❌ No se pudo crear el pool de conexiones")
-                
+            self.connection_pool.fill()
+            self.logger.info(f"✅ Pool de conexiones creado:  {settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
         except Exception as e:
+            # El pool queda igual: las conexiones se abren cuando se pidan
             self.logger.error(f"❌ Error creando pool de conexiones: {e}")
-            self.connection_pool = None
     
     def get_connection(self):
         """
-        Obtiene una conexión del pool
+        Obtiene una conexión del pool (espera hasta DB_POOL_TIMEOUT si están todas en uso)
         
         Returns: 
             psycopg2.connection: Conexión a la BD o None si falla
         """
         try:
-            if self.connection_pool:
-                conn = self.connection_pool.getconn()
-                if conn:
-                    return conn
-                else:
-                    self.logger.error("❌ No se pudo obtener conexión del pool")
-                    return None
-            else:
-                # Si no hay pool, crear conexión directa
-                self.logger.warning("⚠️ Pool no disponible, creando conexión directa...")
-                return psycopg2.connect(
-                    host=settings.DB_HOST,
-                    port=settings.DB_PORT,
-                    database=settings.DB_NAME,
-                    user=settings. DB_USER,
-                    password=settings.DB_PASSWORD
-                )
+            return self.connection_pool.acquire()
         except Exception as e:
             self.logger.error(f"❌ Error obteniendo conexión: {e}")
             return None
@@ -73,21 +159,206 @@ class Database:
             conn: Conexión a retornar
         """
         try:
-            if self.connection_pool and conn:
-                self.connection_pool.putconn(conn)
+            if conn:
+                self.connection_pool.release(conn)
         except Exception as e:
             self.logger.error(f"❌ Error retornando conexión al pool: {e}")
     
-    def close_all_connections(self):
+    def get_stats(self):
+        """Estadísticas del pool (espera, en uso, creadas, ...) y de transacciones"""
+        stats = self.connection_pool.get_stats()
+        stats.update(
+            transactions=self.transactions,
+            rollbacks=self.rollbacks,
+            savepoints=self.savepoints,
+            savepoint_rollbacks=self.savepoint_rollbacks,
+            prepared=self.prepared,
+            prepared_hits=self.prepared_hits,
+        )
+        return stats
+    
+    def reset_prepared_statements(self):
+        """Invalida las sentencias preparadas de todas las conexiones (p. ej. tras cambiar el esquema)"""
+        self.prepared_generation += 1
+    
+    def _prepared_statement(self, conn, cursor, query):
+        """
+        Nombre de la sentencia preparada para ``query`` en esta conexión
+        
+        El registro se guarda en los metadatos de la conexión en el pool;
+        si es de una generación anterior se hace DEALLOCATE ALL primero.
+        """
+        info = self.connection_pool.info(conn)
+        if info is None:
+            return None
+        
+        registry = info.get('prepared')
+        if registry is None or registry.generation != self.prepared_generation:
+            if registry is not None:
+                cursor.execute("DEALLOCATE ALL")
+            registry = info['prepared'] = PreparedStatements(self.prepared_generation, settings.DB_PREPARED_MAX)
+        
+        known = query in registry.names
+        name = registry.get(cursor, query)
+        if known:
+            self.prepared_hits += 1
+        elif name:
+            self.prepared += 1
+        return name
+    
+    def _forget_prepared(self, conn, query):
+        """Descarta la sentencia de una query que falló (se vuelve a preparar)"""
+        info = self.connection_pool.info(conn)
+        if info and info.get('prepared'):
+            info['prepared'].forget(query)
+    
+    def close(self):
         """Cierra todas las conexiones del pool"""
         try:
-            if self.connection_pool:
-                self.connection_pool.closeall()
-                self.logger.info("✅ Todas las conexiones cerradas")
+            self.connection_pool.close_all()
+            self.logger.info("✅ Todas las conexiones cerradas")
         except Exception as e:
             self.logger.error(f"❌ Error cerrando conexiones: {e}")
     
-    def execute(self, query, params=None, fetch_one=False, fetch_all=False):
+    # Nombre anterior
+    close_all_connections = close
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias queries en una sola transacción
+        
+        Mientras dura el bloque, ``execute`` usa la misma conexión en este
+        hilo y no hace commit por query. Al salir se hace commit, o rollback
+        si hubo una excepción, si alguna query falló o si se llamó a
+        ``set_rollback()``.
+        
+        Un bloque anidado abre un SAVEPOINT: si falla se vuelve al punto
+        de guardado y la transacción externa sigue (la excepción, si la
+        hubo, se propaga igual).
+        
+        Uso:
+            with db.transaction() as tx:
+                Vehiculo.create(...)
+                Cita.create(...)
+        """
+        current = getattr(self._local, 'transaction', None)
+        if current:
+            with self._savepoint(current) as tx:
+                yield tx
+            return
+        
+        conn = self.get_connection()
+        if not conn:
+            raise psycopg2.OperationalError("No se pudo obtener conexión para la transacción")
+        
+        tx = Transaction(conn)
+        self._local.transaction = tx
+        self.transactions += 1
+        try:
+            yield tx
+        except BaseException:
+            tx.failed = True
+            raise
+        finally:
+            self._local.transaction = None
+            try:
+                if tx.failed:
+                    conn.rollback()
+                    self.rollbacks += 1
+                    self.logger.warning("↩️ Transacción revertida")
+                else:
+                    conn.commit()
+            finally:
+                self.return_connection(conn)
+            if not tx.failed:
+                self._run_callbacks(tx.callbacks)
+    
+    def on_commit(self, callback):
+        """
+        Ejecuta ``callback`` cuando se confirme la transacción en curso
+        
+        Fuera de una transacción se ejecuta de inmediato. Si la transacción
+        se revierte no se ejecuta.
+        """
+        tx = getattr(self._local, 'transaction', None)
+        if tx:
+            tx.root.callbacks.append(callback)
+        else:
+            callback()
+    
+    def _run_callbacks(self, callbacks):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"❌ Error en callback post-commit: {e}")
+    
+    @contextmanager
+    def _savepoint(self, parent):
+        """Bloque anidado dentro de una transacción"""
+        tx = Transaction(parent.conn, parent)
+        with tx.conn.cursor() as cursor:
+            cursor.execute(f"SAVEPOINT {tx.savepoint}")
+        self._local.transaction = tx
+        self.savepoints += 1
+        try:
+            yield tx
+        except BaseException:
+            tx.failed = True
+            raise
+        finally:
+            self._local.transaction = parent
+            try:
+                with tx.conn.cursor() as cursor:
+                    if tx.failed:
+                        cursor.execute(f"ROLLBACK TO SAVEPOINT {tx.savepoint}")
+                        self.savepoint_rollbacks += 1
+                        self.logger.warning(f"↩️ Revertido hasta {tx.savepoint}")
+                    else:
+                        cursor.execute(f"RELEASE SAVEPOINT {tx.savepoint}")
+            except Exception:
+                # Sin volver al savepoint la transacción externa queda inservible
+                parent.failed = True
+                raise
+    
+    @contextmanager
+    def connection(self):
+        """
+        Conexión para operaciones que usan el cursor directamente (bulk, COPY)
+        
+        Dentro de ``transaction()`` entrega la conexión de la transacción y
+        no hace commit; fuera de ella hace commit al salir del bloque o
+        rollback si hubo una excepción, que se propaga.
+        """
+        tx = getattr(self._local, 'transaction', None)
+        if tx:
+            try:
+                yield tx.conn
+            except Exception:
+                tx.failed = True
+                raise
+            return
+        
+        conn = self.get_connection()
+        if not conn:
+            raise psycopg2.OperationalError("No se pudo obtener conexión")
+        
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            # También GeneratorExit: un generador (p. ej. iter_all) que no se consumió entero
+            conn.rollback()
+            raise
+        finally:
+            self.return_connection(conn)
+    
+    def in_transaction(self):
+        """Indica si el hilo actual está dentro de ``transaction()``"""
+        return getattr(self._local, 'transaction', None) is not None
+    
+    def execute(self, query, params=None, fetch_one=False, fetch_all=False, prepare=False, row_factory=None):
         """
         Ejecuta una query SQL
         
@@ -96,27 +367,41 @@ class Database:
             params (tuple/list): Parámetros de la query
             fetch_one (bool): Retorna solo un registro como dict
             fetch_all (bool): Retorna todos los registros como lista de dicts
+            prepare (bool): Usar una sentencia preparada de la conexión
+                (para queries frecuentes con texto fijo)
+            row_factory: Con fetch_all, función (columnas, tuplas) que arma
+                las filas (ver config.rows; por defecto una lista de dicts)
         
         Returns:
             dict/list/int: Resultados según el tipo de query
         """
         conn = None
         cursor = None
+        prepared = None
+        tx = getattr(self._local, 'transaction', None)
         
         try:
-            conn = self.get_connection()
+            conn = tx.conn if tx else self.get_connection()
             
             if not conn: 
                 self.logger.error("❌ No se pudo obtener conexión")
                 return None
             
             cursor = conn. cursor()
-            cursor.execute(query, params or ())
+            params = params or ()
+            if prepare and settings.DB_PREPARED_STATEMENTS:
+                prepared = self._prepared_statement(conn, cursor, query)
+            
+            if prepared:
+                cursor.execute(PreparedStatements.execute_sql(prepared, len(params)), params)
+            else:
+                cursor.execute(query, params)
             
             # Si es un SELECT que retorna un registro
             if fetch_one: 
                 result = cursor.fetchone()
-                conn.commit()
+                if not tx:
+                    conn.commit()
                 if result:
                     # Convertir a dict
                     columns = [desc[0] for desc in cursor.description]
@@ -126,30 +411,34 @@ class Database:
             # Si es un SELECT que retorna múltiples registros
             elif fetch_all:
                 results = cursor.fetchall()
-                conn.commit()
-                if results:
-                    # Convertir a lista de dicts
-                    columns = [desc[0] for desc in cursor.description]
-                    return [dict(zip(columns, row)) for row in results]
-                return []
+                if not tx:
+                    conn.commit()
+                columns = [desc[0] for desc in cursor.description]
+                return (row_factory or dict_rows)(columns, results)
             
             # Si es INSERT/UPDATE/DELETE
             else:
-                conn. commit()
+                if not tx:
+                    conn.commit()
                 return cursor.rowcount
                 
         except Exception as e:
             self.logger. error(f"❌ Error ejecutando query: {e}")
             self.logger.error(f"   Query: {query}")
             self.logger.error(f"   Params: {params}")
-            if conn:
+            if prepare and conn:
+                self._forget_prepared(conn, query)
+            if tx:
+                # La transacción quedó abortada: se revierte al salir del bloque
+                tx.failed = True
+            elif conn:
                 conn.rollback()
             return None
             
         finally:
             if cursor:
                 cursor.close()
-            if conn:
+            if conn and not tx:
                 self.return_connection(conn)
     
     def execute_query(self, query, params=None, fetch=True):
@@ -0,0 +1,246 @@
+"""
+Pool de conexiones PostgreSQL
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+from config.settings import settings
+
+
+class PoolTimeout(PoolError):
+    """No se liberó ninguna conexión dentro del tiempo de espera"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe con espera acotada
+
+    Mantiene entre ``min_size`` y ``max_size`` conexiones. Si están todas en
+    uso, ``acquire`` espera hasta ``timeout`` segundos a que se libere una
+    (en lugar de fallar de inmediato). Al entregar una conexión:
+
+    - Se descarta si superó ``max_lifetime`` segundos desde que se abrió.
+    - Si estuvo ociosa más de ``check_idle`` segundos se verifica con
+      ``SELECT 1`` (detecta conexiones cortadas por un reinicio del
+      servidor); las usadas recién no pagan ese viaje extra.
+
+    Al devolverla se revierte cualquier transacción abierta, y si el
+    llamador la cerró (o quedó rota) se descarta y su lugar queda libre.
+    Cada conexión tiene un dict de metadatos (``info``) para guardar estado
+    propio de esa sesión.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], extensions.connection],
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        check_idle: Optional[float] = None
+    ):
+        self.logger = logging.getLogger('ConnectionPool')
+        self.factory = factory
+        self.min_size = settings.DB_POOL_MIN_SIZE if min_size is None else min_size
+        self.max_size = settings.DB_POOL_MAX_SIZE if max_size is None else max_size
+        self.timeout = settings.DB_POOL_TIMEOUT if timeout is None else timeout
+        self.max_lifetime = settings.DB_POOL_MAX_LIFETIME if max_lifetime is None else max_lifetime
+        self.check_idle = settings.DB_POOL_CHECK_IDLE if check_idle is None else check_idle
+
+        self._cond = threading.Condition()
+        self._idle = []        # conexiones libres (la última devuelta se reutiliza primero)
+        self._info = {}        # id(conexión) -> metadatos
+        self._size = 0         # conexiones abiertas (libres + en uso + abriéndose)
+        self._closed = False
+
+        self.created = 0
+        self.discarded = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def fill(self):
+        """Abre conexiones hasta ``min_size`` (al iniciar)"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._open()
+            with self._cond:
+                self._idle.append(conn)
+                self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> extensions.connection:
+        """
+        Obtiene una conexión, esperando si están todas en uso
+
+        Raises:
+            PoolTimeout: Si no se liberó ninguna a tiempo
+            psycopg2.Error: Si no se pudo abrir una conexión nueva
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolError("El pool de conexiones está cerrado")
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Se reserva el lugar; la conexión se abre fuera del lock
+                        self._size += 1
+                        conn = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"Pool agotado: {self.max_size} conexiones en uso por más de {timeout:.0f}s"
+                        )
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                conn = self._open()
+            elif not self._usable(conn):
+                continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+                self.max_in_use = max(self.max_in_use, self._size - len(self._idle))
+                self._info[id(conn)]['uses'] += 1
+            return conn
+
+    def release(self, conn: extensions.connection):
+        """Devuelve una conexión (revierte la transacción abierta, si la hay)"""
+        info = self._info.get(id(conn))
+        if info is None:
+            # No es de este pool (o ya se descartó)
+            self._close(conn)
+            return
+
+        reason = None
+        if conn.closed:
+            reason = "cerrada por el llamador"
+        else:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                reason = "rota al devolverla"
+
+        if reason is None and self._expired(info):
+            reason = f"superó {self.max_lifetime}s de vida"
+
+        if reason:
+            self._discard(conn, reason)
+            return
+
+        with self._cond:
+            info['last_used'] = time.monotonic()
+            if self._closed:
+                reason = "cierre del pool"
+            else:
+                self._idle.append(conn)
+                self._cond.notify()
+        if reason:
+            self._discard(conn, reason)
+
+    def info(self, conn: extensions.connection) -> Optional[Dict]:
+        """Metadatos de una conexión del pool (created, last_used, uses, ...) o None si no es del pool"""
+        return self._info.get(id(conn))
+
+    def close_all(self):
+        """Cierra las conexiones libres; las que estén en uso se cierran al devolverse"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn, "cierre del pool")
+
+    def get_stats(self) -> Dict:
+        """Retorna estadísticas del pool"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'max_in_use': self.max_in_use,
+                'created': self.created,
+                'discarded': self.discarded,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                'max_wait_ms': self.wait_max * 1000,
+            }
+
+    def _open(self) -> extensions.connection:
+        """Abre una conexión en un lugar ya reservado"""
+        try:
+            conn = self.factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        now = time.monotonic()
+        with self._cond:
+            self._info[id(conn)] = {'created': now, 'last_used': now, 'uses': 0}
+            self.created += 1
+        return conn
+
+    def _usable(self, conn: extensions.connection) -> bool:
+        """Verifica una conexión libre antes de entregarla (la descarta si no sirve)"""
+        info = self._info[id(conn)]
+        if conn.closed:
+            self._discard(conn, "cerrada")
+            return False
+        if self._expired(info):
+            self._discard(conn, f"superó {self.max_lifetime}s de vida")
+            return False
+
+        if time.monotonic() - info['last_used'] > self.check_idle:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except Exception as e:
+                self._discard(conn, f"no respondió: {e}")
+                return False
+
+        return True
+
+    def _expired(self, info: Dict) -> bool:
+        return bool(self.max_lifetime) and time.monotonic() - info['created'] > self.max_lifetime
+
+    def _discard(self, conn: extensions.connection, reason: str):
+        """Cierra una conexión y libera su lugar"""
+        self.logger.debug(f"Descartando conexión a la BD ({reason})")
+        self._close(conn)
+        with self._cond:
+            self._info.pop(id(conn), None)
+            self._size -= 1
+            self.discarded += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close(conn: extensions.connection):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,120 @@
+"""
+Fábricas de filas para los resultados de Database.execute
+
+Cada fábrica recibe los nombres de columna y la lista de tuplas que
+entrega ``cursor.fetchall()`` y retorna la secuencia de filas:
+
+- ``dict_rows``: un dict por fila (por defecto; las filas se pueden modificar)
+- ``tuple_rows``: las tuplas tal cual
+- ``record_rows``: namedtuples (sin __dict__, acceso por atributo)
+- ``ResultSet``: columnas + tuplas; cada fila se ve como un Mapping de
+  solo lectura (``RowView``) creado recién al accederla
+"""
+from collections import namedtuple
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence as SequenceType, Tuple
+
+
+def dict_rows(columns: SequenceType[str], rows: List[tuple]) -> List[Dict[str, Any]]:
+    """Un dict por fila"""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def tuple_rows(columns: SequenceType[str], rows: List[tuple]) -> List[tuple]:
+    """Las tuplas del cursor, sin conversión"""
+    return rows
+
+
+@lru_cache(maxsize=128)
+def _record_type(columns: Tuple[str, ...]):
+    # rename=True: columnas repetidas o que no son identificadores válidos
+    return namedtuple('Record', columns, rename=True)
+
+
+def record_rows(columns: SequenceType[str], rows: List[tuple]) -> List[tuple]:
+    """Una namedtuple por fila (el tipo se crea una vez por juego de columnas)"""
+    record = _record_type(tuple(columns))
+    return [record._make(row) for row in rows]
+
+
+class ResultSet(Sequence):
+    """
+    Resultado de una consulta como columnas + tuplas
+
+    Se comporta como una lista de registros (``len``, índices, slices,
+    iteración) pero no arma un dict por fila: ``result[i]`` es una
+    ``RowView`` sobre la tupla original. Quien recorre muchas filas puede
+    usar ``columns`` y ``rows`` directamente.
+    """
+
+    __slots__ = ('columns', 'rows', '_index')
+
+    def __init__(self, columns: SequenceType[str], rows: List[tuple]):
+        self.columns = tuple(columns)
+        self.rows = rows
+        self._index = None
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """Posición de cada columna (se arma una vez por resultado)"""
+        if self._index is None:
+            self._index = {column: i for i, column in enumerate(self.columns)}
+        return self._index
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            result = ResultSet.__new__(ResultSet)
+            result.columns = self.columns
+            result.rows = self.rows[position]
+            result._index = self._index
+            return result
+        return RowView(self, self.rows[position])
+
+    def __eq__(self, other):
+        if isinstance(other, ResultSet):
+            return self.columns == other.columns and self.rows == other.rows
+        if isinstance(other, list):
+            return len(self) == len(other) and all(row == item for row, item in zip(self, other))
+        return NotImplemented
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Convierte a lista de dicts (p. ej. para serializar a JSON)"""
+        return dict_rows(self.columns, self.rows)
+
+    def __repr__(self):
+        return f"ResultSet({len(self.rows)} fila(s), columnas={list(self.columns)})"
+
+
+class RowView(Mapping):
+    """Fila de un ResultSet vista como Mapping de solo lectura"""
+
+    __slots__ = ('_result', '_row')
+
+    def __init__(self, result: ResultSet, row: tuple):
+        self._result = result
+        self._row = row
+
+    def __getitem__(self, column):
+        return self._row[self._result.index[column]]
+
+    def __iter__(self):
+        return iter(self._result.columns)
+
+    def __len__(self):
+        return len(self._row)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def to_serializable(value):
+    """``default`` para json.dumps: ResultSet y RowView como listas/dicts"""
+    if isinstance(value, ResultSet):
+        return value.to_dicts()
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
@@ -22,6 +22,34 @@ class Settings:
     DB_USER = os.getenv('DB_USER', 'grupo01sa')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'grup001grup001*')
     
+    # Pool de conexiones: tamaño, espera máxima por una conexión libre (s),
+    # vida máxima de una conexión (s) y ociosidad tras la cual se verifica (s)
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 3600))
+    DB_POOL_CHECK_IDLE = float(os.getenv('DB_POOL_CHECK_IDLE', 30))
+    
+    # Sentencias preparadas (PREPARE/EXECUTE) para las queries frecuentes de
+    # los modelos; desactivar detrás de un pooler en modo transacción (PgBouncer)
+    DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'True').lower() == 'true'
+    DB_PREPARED_MAX = int(os.getenv('DB_PREPARED_MAX', 100))
+    
+    # Caché de lecturas de los modelos que la activan (cache_ttl); se invalida
+    # al escribir en la tabla. Máximo de resultados guardados (LRU)
+    QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'True').lower() == 'true'
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 1000))
+    
+    # Inserción masiva: filas por INSERT multi-fila y desde cuántas filas usar COPY
+    BULK_PAGE_SIZE = int(os.getenv('BULK_PAGE_SIZE', 1000))
+    BULK_COPY_THRESHOLD = int(os.getenv('BULK_COPY_THRESHOLD', 5000))
+    
+    # Paginación de "mostrar" y exportación completa ("mostrar [todos]")
+    MOSTRAR_PAGE_SIZE = int(os.getenv('MOSTRAR_PAGE_SIZE', 50))
+    MOSTRAR_MAX_LIMIT = int(os.getenv('MOSTRAR_MAX_LIMIT', 500))
+    EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', 2000))
+    EXPORT_MAX_ROWS = int(os.getenv('EXPORT_MAX_ROWS', 100000))
+    
     # ==============================================
     # Selección de servidor SMTP (solo envío)
     # ==============================================
@@ -100,6 +128,11 @@ class Settings:
     def SMTP_FROM_NAME(self):
         return self._load_smtp_config()['SMTP_FROM_NAME']
     
+    # Pool de sesiones SMTP (0 = una conexión por correo)
+    SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 4))
+    SMTP_POOL_IDLE_TIMEOUT = int(os.getenv('SMTP_POOL_IDLE_TIMEOUT', 60))
+    SMTP_POOL_MAX_MESSAGES = int(os.getenv('SMTP_POOL_MAX_MESSAGES', 100))
+    
     # ==============================================
     # POP3 - SIEMPRE TECNOWEB (Recepción)
     # ==============================================
@@ -109,16 +142,54 @@ class Settings:
     POP3_USER = os. getenv('POP3_USER', '')
     POP3_PASSWORD = os.getenv('POP3_PASSWORD', '')
     
+    # ==============================================
+    # IMAP (alternativa a POP3 con notificaciones IDLE)
+    # ==============================================
+    MAIL_SOURCE = os.getenv('MAIL_SOURCE', 'pop3').lower()
+    IMAP_HOST = os.getenv('IMAP_HOST', POP3_HOST)
+    IMAP_PORT = int(os.getenv('IMAP_PORT', 993))
+    IMAP_USE_SSL = os.getenv('IMAP_USE_SSL', 'True').lower() == 'true'
+    IMAP_USER = os.getenv('IMAP_USER', POP3_USER)
+    IMAP_PASSWORD = os.getenv('IMAP_PASSWORD', POP3_PASSWORD)
+    IMAP_MAILBOX = os.getenv('IMAP_MAILBOX', 'INBOX')
+    IMAP_USE_IDLE = os.getenv('IMAP_USE_IDLE', 'True').lower() == 'true'
+    IMAP_IDLE_TIMEOUT = int(os.getenv('IMAP_IDLE_TIMEOUT', 300))
+    IMAP_SESSION_MAX_AGE = int(os.getenv('IMAP_SESSION_MAX_AGE', 1800))
+    
     # ==============================================
     # Procesamiento de emails
     # ==============================================
     POP3_CHECK_INTERVAL = int(os.getenv('POP3_CHECK_INTERVAL', 30))
     POP3_DELETE_AFTER_READ = os.getenv('POP3_DELETE_AFTER_READ', 'False').lower() == 'true'
     MAX_PROCESSED_HISTORY = int(os.getenv('MAX_PROCESSED_HISTORY', 1000))
+    PROCESSED_FSYNC_EVERY = int(os.getenv('PROCESSED_FSYNC_EVERY', 20))
+    PROCESSED_BLOOM_CAPACITY = int(os.getenv('PROCESSED_BLOOM_CAPACITY', 1000000))
+    PROCESSED_BLOOM_ERROR_RATE = float(os.getenv('PROCESSED_BLOOM_ERROR_RATE', 1e-6))
+    PROCESSING_WORKERS = int(os.getenv('PROCESSING_WORKERS', 4))
+    POP3_USE_UIDL = os.getenv('POP3_USE_UIDL', 'True').lower() == 'true'
+    POP3_HEADER_PREFILTER = os.getenv('POP3_HEADER_PREFILTER', 'False').lower() == 'true'
+    MAIL_STREAMING_PARSE = os.getenv('MAIL_STREAMING_PARSE', 'True').lower() == 'true'
+    
+    # Sesión POP3 persistente entre ciclos
+    POP3_KEEP_ALIVE = os.getenv('POP3_KEEP_ALIVE', 'False').lower() == 'true'
+    POP3_SESSION_MAX_AGE = int(os.getenv('POP3_SESSION_MAX_AGE', 300))
+    POP3_RECONNECT_BACKOFF = int(os.getenv('POP3_RECONNECT_BACKOFF', 5))
+    POP3_RECONNECT_BACKOFF_MAX = int(os.getenv('POP3_RECONNECT_BACKOFF_MAX', 300))
+    
+    # Modo lote: asunto "lote" (o "lote atomico") y un comando por línea del cuerpo
+    BATCH_MAX_COMMANDS = int(os.getenv('BATCH_MAX_COMMANDS', 200))
+    
+    # Importación de adjuntos CSV ("vehiculo agregar" sin parámetros + archivo .csv)
+    CSV_IMPORT_MAX_BYTES = int(os.getenv('CSV_IMPORT_MAX_BYTES', 20 * 1024 * 1024))
+    CSV_IMPORT_SPOOL_MEMORY = int(os.getenv('CSV_IMPORT_SPOOL_MEMORY', 1024 * 1024))
+    CSV_IMPORT_CHUNK_SIZE = int(os.getenv('CSV_IMPORT_CHUNK_SIZE', 1000))
+    CSV_IMPORT_MAX_REJECTS = int(os.getenv('CSV_IMPORT_MAX_REJECTS', 50))
     
     # ==============================================
     # Seguridad
     # ==============================================
+    # Con REQUIRE_AUTH solo se atienden correos de ALLOWED_EMAILS (si la lista
+    # no está vacía); los demás se descartan sin respuesta
     ALLOWED_EMAILS = [e.strip() for e in os.getenv('ALLOWED_EMAILS', '').split(',') if e.strip()]
     REQUIRE_AUTH = os.getenv('REQUIRE_AUTH', 'False').lower() == 'true'
     
@@ -127,6 +198,18 @@ class Settings:
     # ==============================================
     LOG_FILE = os.getenv('LOG_FILE', 'logs/app.log')
     PROCESSED_EMAILS_FILE = os.getenv('PROCESSED_EMAILS_FILE', 'data/processed_emails.txt')
+    
+    # ==============================================
+    # Cola de respuestas salientes
+    # ==============================================
+    OUTBOUND_QUEUE_ENABLED = os.getenv('OUTBOUND_QUEUE_ENABLED', 'True').lower() == 'true'
+    OUTBOUND_QUEUE_FILE = os.getenv('OUTBOUND_QUEUE_FILE', 'data/outbound_queue.db')
+    OUTBOUND_BATCH_SIZE = int(os.getenv('OUTBOUND_BATCH_SIZE', 20))
+    OUTBOUND_POLL_INTERVAL = int(os.getenv('OUTBOUND_POLL_INTERVAL', 5))
+    OUTBOUND_MAX_ATTEMPTS = int(os.getenv('OUTBOUND_MAX_ATTEMPTS', 8))
+    OUTBOUND_RETRY_BACKOFF = int(os.getenv('OUTBOUND_RETRY_BACKOFF', 30))
+    OUTBOUND_RETRY_BACKOFF_MAX = int(os.getenv('OUTBOUND_RETRY_BACKOFF_MAX', 3600))
+    OUTBOUND_RETENTION_DAYS = int(os.getenv('OUTBOUND_RETENTION_DAYS', 7))
 
 
 # Instancia global
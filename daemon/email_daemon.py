@@ -2,30 +2,51 @@ import time
 import logging
 import signal
 import sys
-from threading import Event
-from services.email_reader import EmailReader
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+from services.mail_source import create_mail_source
 from services.email_sender import EmailSender
 from services.email_processor import EmailCommandProcessor
+from services.mail_session import MailSessionManager
+from services.mime_stream import close_attachments
+from services.outbound_queue import OutboundQueue, OutboundSender
 from config.settings import settings
 from config.database import db
+from config.rows import ResultSet
+from models.cache import query_cache
+from lexer.parser import parse_cache_info
 
 class EmailDaemon:  
-    """Daemon que revisa correos constantemente usando POP3"""
+    """Daemon que revisa correos constantemente (POP3 o IMAP IDLE)"""
+    
+    # Segundos para vaciar la cola de respuestas al detenerse
+    OUTBOUND_STOP_TIMEOUT = 30
     
     def __init__(self):
         self.running = Event()
         self.running.set()
+        self.stop_event = Event()
         
-        self.email_reader = EmailReader()
+        self.mail_source = create_mail_source()
+        self.mail_session = MailSessionManager(self.mail_source)
         self.email_sender = EmailSender()
         self.email_processor = EmailCommandProcessor()
         
+        # Respuestas desacopladas del procesamiento (cola persistente + hilo de envío)
+        self.outbound_queue = OutboundQueue() if settings.OUTBOUND_QUEUE_ENABLED else None
+        self.outbound_sender = OutboundSender(self.outbound_queue, self.email_sender) if self.outbound_queue else None
+        
         self.setup_logging()
         self.setup_signal_handlers()
         
         self.processed_count = 0
         self.error_count = 0
         self.cycle_count = 0
+        
+        # Contadores y fuente de correo se comparten entre workers
+        self.stats_lock = Lock()
+        self.mail_lock = Lock()
     
     def setup_logging(self):
         """Configura logging"""
@@ -35,7 +56,7 @@ class EmailDaemon:
         
         logging.basicConfig(
             level=logging.INFO if settings.DEBUG else logging.WARNING,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            format='%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s',
             handlers=[
                 logging.FileHandler(settings.LOG_FILE, encoding='utf-8'),
                 logging.StreamHandler(sys.stdout)
@@ -56,15 +77,25 @@ class EmailDaemon:
     def start(self):
         """Inicia el daemon"""
         self. logger.info(f"{'='*70}")
-        self.logger.info(f"🚀 Iniciando {settings.APP_NAME} Email Daemon (POP3)")
+        self.logger.info(f"🚀 Iniciando {settings.APP_NAME} Email Daemon ({settings.MAIL_SOURCE.upper()})")
         self.logger. info(f"{'='*70}")
-        self.logger.info(f"📧 Monitoreando: {settings.POP3_USER}")
-        self.logger.info(f"🖥️ Servidor POP3: {settings.POP3_HOST}:{settings.POP3_PORT}")
+        if settings.MAIL_SOURCE == 'imap':
+            self.logger.info(f"📧 Monitoreando: {settings.IMAP_USER}")
+            self.logger.info(f"🖥️ Servidor IMAP: {settings.IMAP_HOST}:{settings.IMAP_PORT} (IDLE: {settings.IMAP_USE_IDLE})")
+        else:
+            self.logger.info(f"📧 Monitoreando: {settings.POP3_USER}")
+            self.logger.info(f"🖥️ Servidor POP3: {settings.POP3_HOST}:{settings.POP3_PORT}")
         self.logger.info(f"⏱️ Intervalo de revisión: {settings. POP3_CHECK_INTERVAL}s")
         self.logger.info(f"🗑️ Eliminar después de leer: {settings.POP3_DELETE_AFTER_READ}")
+        self.logger.info(f"♻️ Sesión POP3 persistente: {settings.POP3_KEEP_ALIVE}")
+        self.logger.info(f"🧵 Workers de procesamiento: {settings.PROCESSING_WORKERS}")
+        self.logger.info(f"📮 Cola de respuestas: {settings.OUTBOUND_QUEUE_FILE if self.outbound_queue else 'desactivada'}")
         self.logger.info(f"🔒 Requiere autenticación: {settings. REQUIRE_AUTH}")
         self.logger.info(f"{'='*70}\n")
         
+        if self.outbound_sender:
+            self.outbound_sender.start()
+        
         try:
             # Loop principal
             while self.running. is_set():
@@ -75,10 +106,10 @@ class EmailDaemon:
                 
                 self.check_emails()
                 
-                # Esperar antes de la siguiente revisión
+                # Esperar antes de la siguiente revisión (o hasta que llegue correo)
                 if self.running.is_set():
                     self.logger.info(f"💤 Esperando {settings.POP3_CHECK_INTERVAL}s hasta el próximo ciclo.. .\n")
-                    self.running.wait(settings.POP3_CHECK_INTERVAL)
+                    self.mail_source.wait_for_mail(settings.POP3_CHECK_INTERVAL, self.stop_event)
         
         except Exception as e:
             self.logger.error(f"❌ Error crítico en daemon: {e}", exc_info=True)
@@ -87,27 +118,27 @@ class EmailDaemon:
             self. cleanup()
     
     def check_emails(self):
-        """Revisa correos nuevos (conecta y desconecta cada vez)"""
-        self.logger. info("🔍 Conectando a servidor POP3...")
+        """Revisa correos nuevos (reutiliza la sesión si está habilitado)"""
+        self.logger. info("🔍 Conectando a servidor de correo...")
         
-        # Conectar
-        if not self.email_reader.connect():
-            self.logger.error("❌ No se pudo conectar a POP3")
+        # Conectar (o reutilizar la sesión existente)
+        if not self.mail_session.acquire():
+            self.logger.error("❌ No se pudo conectar al servidor de correo")
             self.error_count += 1
             return
         
+        failed = False
         try:
             # Obtener correos nuevos
-            emails = self.email_reader.get_new_emails()
+            emails = self.mail_source.get_new_emails()
             
             if not emails:
                 self.logger.info("📭 No hay correos nuevos para procesar")
             else:
                 self.logger. info(f"📬 Encontrados {len(emails)} correo(s) nuevo(s)")
                 
-                # Procesar cada correo
-                for email_data in emails:  
-                    self.process_email(email_data)
+                # Procesar correos (en paralelo si hay varios workers)
+                self.process_emails(emails)
             
             # Reset contador de errores si fue exitoso
             self.error_count = 0
@@ -115,17 +146,47 @@ class EmailDaemon:
         except Exception as e:  
             self.logger.error(f"❌ Error revisando correos: {e}", exc_info=True)
             self.error_count += 1
+            failed = True
         
         finally:
-            # Siempre desconectar
-            self.email_reader.disconnect()
+            # Desconectar salvo que la sesión se mantenga para el próximo ciclo
+            self.mail_session.release(force=failed)
+    
+    def process_emails(self, emails: list):
+        """
+        Procesa un lote de correos con un pool acotado de threads
+        
+        Los correos de un mismo remitente se procesan en orden y en un solo
+        worker, así sus comandos nunca se ejecutan fuera de secuencia.
+        """
+        by_sender = OrderedDict()
+        for email_data in emails:
+            by_sender.setdefault(email_data['from_email'], []).append(email_data)
+        
+        workers = min(max(1, settings.PROCESSING_WORKERS), len(by_sender))
+        
+        if workers == 1:
+            for email_data in emails:
+                self.process_email(email_data)
+            return
+        
+        self.logger.info(f"🧵 Procesando {len(emails)} correo(s) de {len(by_sender)} remitente(s) con {workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='Worker') as pool:
+            futures = [pool.submit(self._process_sender_emails, queue) for queue in by_sender.values()]
+            for future in futures:
+                future.result()
+    
+    def _process_sender_emails(self, emails: list):
+        """Procesa en orden los correos de un mismo remitente"""
+        for email_data in emails:
+            self.process_email(email_data)
     
     def process_email(self, email_data:  dict):
         """Procesa un correo individual"""
         from_email = email_data['from_email']
         subject = email_data['subject']
         email_hash = email_data['hash']
-        message_id = email_data['message_id']
         
         self. logger.info(f"\n{'┌'+'─'*68+'┐'}")
         self.logger.info(f"│ ⚙️ PROCESANDO CORREO{' '*49}│")
@@ -136,6 +197,14 @@ class EmailDaemon:
         self.logger.info(f"│ Fecha: {email_data['date'][:58]:<58}│")
         self.logger.info(f"{'└'+'─'*68+'┘'}")
         
+        # La respuesta ya está en la cola: el comando se ejecutó antes de un corte
+        if self.outbound_queue and self.outbound_queue.contains(self._reply_key(email_data)):
+            self.logger.info("↩️ Correo ya respondido, solo se marca como procesado")
+            with self.mail_lock:
+                self.mail_source.mark_as_processed(email_data)
+            self._close_attachments(email_data)
+            return
+        
         try:
             # Procesar comando
             result = self.email_processor.process_email_command(email_data)
@@ -147,67 +216,120 @@ class EmailDaemon:
                 # Mostrar datos si existen
                 if result.get('data'):
                     data = result['data']
-                    if isinstance(data, list):
+                    if isinstance(data, (list, ResultSet)):
                         self.logger. info(f"📊 Datos:  {len(data)} registro(s)")
                     elif isinstance(data, dict):
                         self.logger.info(f"📊 Datos: {len(data)} campo(s)")
             else:
                 self.logger. warning(f"⚠️ Comando falló: {result['message']}")
             
-            # Enviar respuesta
-            self.logger.info("📤 Enviando respuesta por correo...")
-            sent = self.email_sender.send_command_response(
-                to_email=from_email,
-                command=subject,
-                success=result['success'],
-                message=result['message'],
-                data=result. get('data'),
-                in_reply_to=message_id
+            # Enviar (o encolar) respuesta
+            self.send_reply(
+                email_data, result['success'], result['message'], result.get('data'),
+                attachments=result.get('attachments')
             )
             
-            if sent:
-                self.logger. info("✅ Respuesta enviada correctamente")
-            else:
-                self.logger.error("❌ Error enviando respuesta")
-            
-            # Marcar como procesado
-            self. email_reader.mark_as_processed(email_data)
-            
-            # Eliminar del servidor si está configurado
-            if settings.POP3_DELETE_AFTER_READ:
-                self.email_reader.delete_email(email_data['index'])
+            # Marcar como procesado (la sesión POP3/IMAP no es thread-safe)
+            with self.mail_lock:
+                self. mail_source.mark_as_processed(email_data)
+                
+                # Eliminar del servidor si está configurado
+                if settings.POP3_DELETE_AFTER_READ:
+                    self.mail_source.delete_email(email_data['index'])
             
-            self.processed_count += 1
-            self.logger.info(f"✓ Total procesados en esta sesión: {self.processed_count}")
+            with self.stats_lock:
+                self.processed_count += 1
+                total = self.processed_count
+            self.logger.info(f"✓ Total procesados en esta sesión: {total}")
         
         except Exception as e: 
             self.logger.error(f"❌ Error procesando correo: {e}", exc_info=True)
             
             # Intentar enviar correo de error
             try:
-                self.email_sender.send_command_response(
-                    to_email=from_email,
-                    command=subject,
-                    success=False,
-                    message=f"Error interno del sistema:  {str(e)}",
-                    data=None,
-                    in_reply_to=message_id
-                )
+                self.send_reply(email_data, False, f"Error interno del sistema:  {str(e)}", None)
                 self.logger.info("📧 Correo de error enviado al usuario")
             except:  
                 self.logger.error("❌ No se pudo enviar correo de error")
+        
+        finally:
+            self._close_attachments(email_data)
+    
+    def send_reply(self, email_data: dict, success: bool, message: str, data, attachments=None) -> bool:
+        """
+        Responde al remitente de un correo
+        
+        Con la cola activa la respuesta se guarda y la envía OutboundSender;
+        si no, se envía aquí mismo por SMTP. ``attachments`` son dicts
+        (filename, content, mimetype) con contenido de texto.
+        """
+        payload = {
+            'to_email': email_data['from_email'],
+            'command': email_data['subject'],
+            'success': success,
+            'message': message,
+            'data': data,
+            'in_reply_to': email_data['message_id'],
+        }
+        if attachments:
+            payload['attachments'] = attachments
+        
+        if self.outbound_queue:
+            if self.outbound_queue.enqueue(self._reply_key(email_data), payload):
+                self.logger.info("📮 Respuesta encolada para envío")
+                self.outbound_sender.notify()
+            else:
+                self.logger.info("↩️ La respuesta ya estaba en la cola")
+            return True
+        
+        self.logger.info("📤 Enviando respuesta por correo...")
+        sent = self.email_sender.send_command_response(**payload)
+        
+        if sent:
+            self.logger. info("✅ Respuesta enviada correctamente")
+        else:
+            self.logger.error("❌ Error enviando respuesta")
+        return sent
+    
+    @staticmethod
+    def _close_attachments(email_data: dict):
+        """Libera los archivos temporales de los adjuntos CSV"""
+        close_attachments(email_data)
+    
+    @staticmethod
+    def _reply_key(email_data: dict) -> str:
+        """Clave de idempotencia de la respuesta (Message-ID o hash del correo)"""
+        return email_data.get('message_id') or email_data['hash']
     
     def stop(self):
         """Detiene el daemon"""
         self. logger.info("\n🛑 Deteniendo daemon...")
         self.running.clear()
+        self.stop_event.set()
     
     def cleanup(self):
         """Limpia recursos"""
         self.logger.info("\n🧹 Limpiando recursos...")
         
         try:
-            self.email_reader.disconnect()
+            self.mail_session.close()
+        except:
+            pass
+        
+        # Último intento de enviar lo pendiente antes de cerrar SMTP
+        if self.outbound_sender:
+            try:
+                self.outbound_sender.stop(drain=True, timeout=self.OUTBOUND_STOP_TIMEOUT)
+                if self.outbound_sender.is_alive():
+                    # SMTP y la cola se cierran recién cuando termina el envío en
+                    # curso: si no, quedaría pendiente y se enviaría dos veces
+                    self.logger.warning("⏳ Esperando a que termine el envío de respuesta en curso...")
+                    self.outbound_sender.join()
+            except Exception as e:
+                self.logger.error(f"❌ Error vaciando la cola de respuestas: {e}")
+        
+        try:
+            self.email_sender.close()
         except:
             pass
         
@@ -222,5 +344,28 @@ class EmailDaemon:
         self.logger.info(f"   - Ciclos ejecutados: {self.cycle_count}")
         self.logger.info(f"   - Correos procesados: {self.processed_count}")
         self.logger.info(f"   - Errores: {self.error_count}")
+        metrics = self.mail_session.get_metrics()
+        self.logger.info(f"   - Conexiones de correo: {metrics['connects']} (reutilizadas: {metrics['reuses']}, fallidas: {metrics['failures']})")
+        if metrics['avg_handshake_ms'] is not None:
+            self.logger.info(f"   - Latencia promedio: handshake {metrics['avg_handshake_ms']:.0f}ms, auth {metrics['avg_auth_ms']:.0f}ms")
+        cache = parse_cache_info()
+        self.logger.info(f"   - Caché de comandos: {cache.hits} aciertos, {cache.misses} parseos")
+        pool_stats = db.get_stats()
+        self.logger.info(
+            f"   - Conexiones BD: {pool_stats['created']} abiertas, máx. {pool_stats['max_in_use']} en uso, "
+            f"espera promedio {pool_stats['avg_wait_ms']:.1f}ms ({pool_stats['timeouts']} agotadas)"
+        )
+        query_stats = query_cache.get_stats()
+        self.logger.info(
+            f"   - Caché de consultas: {query_stats['hits']} aciertos, {query_stats['misses']} lecturas "
+            f"({query_stats['hit_rate']:.0%}), {query_stats['invalidations']} invalidaciones"
+        )
+        if self.outbound_queue:
+            queue_stats = self.outbound_queue.get_stats()
+            self.logger.info(f"   - Respuestas: {queue_stats['sent']} enviadas, {queue_stats['pending']} pendientes, {queue_stats['failed']} fallidas")
+            try:
+                self.outbound_queue.close()
+            except:
+                pass
         self.logger. info(f"{'='*70}")
         self.logger.info("👋 Daemon detenido correctamente\n")
\ No newline at end of file
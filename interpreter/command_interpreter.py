@@ -1,5 +1,9 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, NamedTuple, Tuple
+import csv
+import io
 import logging
+from config.rows import ResultSet
+from config.settings import settings
 from . base_interpreter import BaseInterpreter
 from .validators import ParameterValidator, ValidationError
 from lexer.parser import Command
@@ -11,6 +15,16 @@ from models.diagnostico import Diagnostico
 from models.orden_trabajo import OrdenTrabajo
 from models.pago import Pago
 
+
+class DispatchEntry(NamedTuple):
+    """Entrada precompilada de la tabla de despacho (entidad, acción)"""
+    handler: Callable
+    model: Any
+    entity_key: str
+    fields: Tuple[str, ...]
+    validators: Tuple[Tuple[str, Callable], ...]
+
+
 class CommandInterpreter(BaseInterpreter):
     """Intérprete de comandos del sistema"""
     
@@ -52,6 +66,66 @@ class CommandInterpreter(BaseInterpreter):
         'tipo':  lambda v:   ParameterValidator.validate_tipo_usuario(v),
     }
     
+    # Validadores que cambian según la entidad (reemplazan a los de FIELD_VALIDATORS)
+    ENTITY_VALIDATORS = {
+        'servicio': {'tipo': ParameterValidator.validate_tipo_servicio},
+    }
+    
+    # Subtipos de usuario (se normalizan a 'usuario')
+    USER_SUBTYPES = ('cliente', 'mecanico', 'secretaria', 'propietario')
+    
+    # Reportes agrupados: entidad -> (columna, grupos, clave de cada grupo, columnas a sumar)
+    REPORTS = {
+        'usuario': ('tipo', ('cliente', 'mecanico', 'secretaria', 'propietario'), 'total_{}s', ()),
+        'cita': ('estado', ('pendiente', 'confirmada', 'en_proceso', 'completada', 'cancelada'), 'estado_{}', ()),
+        'orden': (
+            'estado',
+            ('presupuestada', 'aprobada', 'en_proceso', 'completada', 'entregada', 'cancelada'),
+            'estado_{}',
+            ('subtotal',)
+        ),
+        'pago': (
+            'estado',
+            ('pendiente', 'pagado_parcial', 'pagado_total', 'vencido'),
+            'estado_{}',
+            ('monto_total', 'monto_pagado', 'monto_pendiente')
+        ),
+    }
+    
+    # Acciones válidas por entidad (las de 'system' no usan modelo)
+    ACTIONS = ('mostrar', 'ver', 'agregar', 'modificar', 'eliminar', 'reporte', 'importar', 'ayuda')
+    SYSTEM_ACTIONS = ('ayuda',)
+    
+    # Tabla (entidad, acción) -> DispatchEntry, armada al crear la clase
+    DISPATCH: Dict[Tuple[str, str], DispatchEntry] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Las subclases pueden cambiar modelos, campos o handlers
+        cls.DISPATCH = cls._build_dispatch()
+    
+    @classmethod
+    def _build_dispatch(cls) -> Dict[Tuple[str, str], DispatchEntry]:
+        """Precompila handler, modelo, campos y validadores de cada (entidad, acción)"""
+        table = {}
+        
+        for entity, model in cls.MODELS.items():
+            entity_key = 'usuario' if entity in cls.USER_SUBTYPES else entity
+            fields = tuple(cls.ENTITY_FIELDS.get(entity_key, []))
+            field_validators = {**cls.FIELD_VALIDATORS, **cls.ENTITY_VALIDATORS.get(entity_key, {})}
+            validators = tuple(
+                (field, field_validators[field]) for field in fields if field in field_validators
+            )
+            for action in cls.ACTIONS:
+                handler = getattr(cls, f"_handle_{action}", None)
+                if handler:
+                    table[(entity, action)] = DispatchEntry(handler, model, entity_key, fields, validators)
+        
+        for action in cls.SYSTEM_ACTIONS:
+            table[('system', action)] = DispatchEntry(getattr(cls, f"_handle_{action}"), None, 'system', (), ())
+        
+        return table
+    
     def __init__(self):
         self.logger = logging.getLogger('CommandInterpreter')
         self.validator = ParameterValidator()
@@ -59,22 +133,16 @@ class CommandInterpreter(BaseInterpreter):
     def interpret(self, command: Command, context: Optional[Dict] = None) -> Dict[str, Any]:
         """Interpreta y ejecuta un comando"""
         try:
-            # Validar
-            if not self.validate(command):
+            # Validar y obtener handler (una sola búsqueda en la tabla)
+            entry = self.DISPATCH.get((command.entity, command.action))
+            if entry is None:
                 return self. format_error(f"Comando inválido: {command}")
             
             # Log
             self.logger.info(f"🔧 Interpretando:   {command.entity} {command.action}")
             
-            # Obtener handler
-            handler_name = f"_handle_{command.action}"
-            if not hasattr(self, handler_name):
-                return self.format_error(f"Acción no soportada: {command.action}")
-            
-            handler = getattr(self, handler_name)
-            
             # Ejecutar
-            result = handler(command, context)
+            result = entry.handler(self, command, context, entry)
             
             # Log resultado
             status = "✅" if result['success'] else "❌"
@@ -90,37 +158,63 @@ class CommandInterpreter(BaseInterpreter):
     
     def validate(self, command: Command) -> bool:
         """Valida que el comando sea ejecutable"""
-        # Validar entidad
-        if command.entity not in self.MODELS and command.entity != 'system':
-            return False
-        
-        # Validar acción
-        valid_actions = ['mostrar', 'ver', 'agregar', 'modificar', 'eliminar', 'reporte', 'ayuda']
-        if command.action not in valid_actions:
-            return False
-        
-        return True
+        return (command.entity, command.action) in self.DISPATCH
     
     # ========================================================================
     # HANDLERS DE ACCIONES
     # ========================================================================
     
-    def _handle_mostrar(self, command: Command, context: Dict) -> Dict[str, Any]:
-        """Handler para acción MOSTRAR (listar todos)"""
-        model = self._get_model(command.entity)
+    def _handle_mostrar(self, command: Command, context: Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
+        """
+        Handler para acción MOSTRAR (listar por páginas)
         
-        # Si es subtipo de usuario, filtrar por tipo
-        if command. entity in ['cliente', 'mecanico', 'secretaria', 'propietario']:
-            data = Usuario.find_by_tipo(command.entity)
-        else:
-            data = model.find_all()
+        Parámetros opcionales: ``[pagina; limite]``, ``pagina=``, ``limite=``,
+        ``offset=`` o ``despues=<id>`` (cursor: registros con ID mayor). Con
+        ``todos`` se exporta la tabla completa como CSV adjunto.
+        """
+        entry = entry or self.DISPATCH[(command.entity, command.action)]
+        model = entry.model
         
-        return self.format_success(
-            f"Se encontraron {len(data)} registro(s)",
-            data
-        )
+        # Si es subtipo de usuario, filtrar por tipo (el parser lo deja en params[0])
+        params = list(command.params)
+        filters = None
+        if command.subtype:
+            filters = {'tipo': command.subtype}
+            if params and params[0] == command.subtype:
+                params.pop(0)
+        
+        try:
+            options = self._page_options(params)
+        except ValidationError as e:
+            return self.format_error(str(e))
+        
+        if options['todos']:
+            return self._export_csv(command, model, filters)
+        
+        limit = options['limite']
+        # Se pide uno de más para saber si hay otra página; las filas quedan
+        # como tuplas (ResultSet) y los formateadores las leen sin armar dicts
+        data = model.find_page(limit + 1, options['offset'], options['despues'], filters, row_factory=ResultSet)
+        has_more = len(data) > limit
+        data = data[:limit]
+        
+        message = f"Se encontraron {len(data)} registro(s)"
+        if options['despues'] is not None:
+            message += f" con ID mayor a {options['despues']}"
+        elif data and (options['offset'] or has_more):
+            message += f" (del {options['offset'] + 1} al {options['offset'] + len(data)})"
+        
+        if has_more:
+            if options['pagina']:
+                next_page = f"[pagina={options['pagina'] + 1}; limite={limit}]"
+            else:
+                next_page = f"[despues={data[-1]['id']}; limite={limit}]"
+            # Con subtipo la pista debe repetirlo: "usuario mostrar" perdería el filtro por tipo
+            message += f". Hay más registros: {command.subtype or command.entity} mostrar {next_page}"
+        
+        return self.format_success(message, data)
     
-    def _handle_ver(self, command:  Command, context:   Dict) -> Dict[str, Any]:
+    def _handle_ver(self, command:  Command, context:   Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
         """Handler para acción VER (detalle de uno)"""
         # Validar parámetros
         try:
@@ -135,7 +229,7 @@ class CommandInterpreter(BaseInterpreter):
             return self.format_error("El ID debe ser un número entero")
         
         # Buscar
-        model = self._get_model(command.entity)
+        model = (entry or self.DISPATCH[(command.entity, command.action)]).model
         data = model.find_by_id(id_registro)
         
         if not data:
@@ -146,10 +240,11 @@ class CommandInterpreter(BaseInterpreter):
             data
         )
     
-    def _handle_agregar(self, command: Command, context:  Dict) -> Dict[str, Any]:
+    def _handle_agregar(self, command: Command, context:  Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
         """Handler para acción AGREGAR (crear)"""
-        entity_key = self._get_entity_key(command.entity)
-        fields = self.ENTITY_FIELDS. get(entity_key, [])
+        entry = entry or self.DISPATCH[(command.entity, command.action)]
+        entity_key = entry.entity_key
+        fields = entry.fields
         
         # Validar cantidad de parámetros
         try:  
@@ -161,7 +256,7 @@ class CommandInterpreter(BaseInterpreter):
         data = {field: command.params[i] for i, field in enumerate(fields)}
         
         # Validar campos
-        validation_errors = self._validate_fields(data)
+        validation_errors = self._run_validators(entry.validators, data)
         if validation_errors:  
             return self.format_error("Errores de validación:   " + ", ".join(validation_errors))
         
@@ -170,7 +265,7 @@ class CommandInterpreter(BaseInterpreter):
             data['tipo'] = command.entity
         
         # Generar código si es necesario
-        model = self._get_model(command.entity)
+        model = entry.model
         if hasattr(model, 'generar_codigo'):
             data['codigo'] = model.generar_codigo()
         
@@ -188,10 +283,137 @@ class CommandInterpreter(BaseInterpreter):
         except Exception as e:
             return self.format_error(f"Error al crear:   {str(e)}")
     
-    def _handle_modificar(self, command: Command, context: Dict) -> Dict[str, Any]:
+    def _handle_importar(self, command: Command, context: Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
+        """
+        Handler para acción IMPORTAR (creación masiva)
+        
+        Los registros llegan en ``context['rows']`` como (línea, parámetros),
+        con los mismos campos que AGREGAR. Las filas inválidas se reportan y
+        las válidas se insertan juntas con ``bulk_create``.
+        """
+        entry = entry or self.DISPATCH[(command.entity, command.action)]
+        rows = (context or {}).get('rows') or []
+        
+        if not rows:
+            return self.format_error(
+                "No hay registros para importar. Escriba uno por línea en el cuerpo del correo: "
+                f"[{'; '.join(entry.fields)}]"
+            )
+        
+        fields = self.import_fields(command, entry)
+        records, rejected = self.validate_rows(command, entry, fields, rows)
+        
+        if not records:
+            return {
+                'success': False,
+                'message': f"Ningún registro válido para importar ({len(rejected)} rechazado(s))",
+                'data': rejected
+            }
+        
+        try:
+            ids = self.bulk_insert(entry, records)
+        except Exception as e:
+            return self.format_error(f"Error al importar: {str(e)}")
+        
+        if not ids:
+            return self.format_error("No se pudo importar ningún registro")
+        
+        message = f"{len(ids)} {command.entity}(s) importado(s) (IDs {ids[0]} a {ids[-1]})"
+        if rejected:
+            message += f", {len(rejected)} fila(s) rechazada(s)"
+            return self.format_success(message, rejected)
+        
+        return self.format_success(message, {'insertados': len(ids), 'primer_id': ids[0], 'ultimo_id': ids[-1]})
+    
+    def import_fields(self, command: Command, entry: DispatchEntry) -> Tuple[str, ...]:
+        """Campos de cada fila importada (con subtipo, el tipo no va en la fila)"""
+        if command.subtype and entry.entity_key == 'usuario':
+            return tuple(f for f in entry.fields if f != 'tipo')
+        return entry.fields
+    
+    def validate_rows(
+        self,
+        command: Command,
+        entry: DispatchEntry,
+        fields: Tuple[str, ...],
+        rows: List[Tuple[int, List[Any]]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Valida un bloque de filas (línea, parámetros) para importar
+        
+        Los validadores se aplican por columna sobre todo el bloque (un
+        ``map`` por campo) en lugar de fila por fila.
+        
+        Returns:
+            (registros válidos listos para bulk_create, filas rechazadas)
+        """
+        width = len(fields)
+        subtype = command.subtype if entry.entity_key == 'usuario' else None
+        
+        shaped = []
+        rejected = []
+        for line, params in rows:
+            if len(params) != width:
+                rejected.append({
+                    'linea': line,
+                    'error': f"Se esperaban {width} campos, se recibieron {len(params)}"
+                })
+            else:
+                shaped.append((line, params))
+        
+        errors = {}
+        for field, validator in entry.validators:
+            if field not in fields:
+                continue
+            index = fields.index(field)
+            column = [params[index] for _, params in shaped]
+            for position, ok in enumerate(map(self._safe_validator(validator), column)):
+                if not ok:
+                    errors.setdefault(position, []).append(f"{field}: valor inválido '{column[position]}'")
+        
+        model = entry.model
+        # generar_codigo tiene resolución de un segundo: todas las filas del
+        # bloque comparten la base y el número de línea las distingue (UNIQUE)
+        codigo = model.generar_codigo() if hasattr(model, 'generar_codigo') else None
+        records = []
+        for position, (line, params) in enumerate(shaped):
+            if position in errors:
+                rejected.append({'linea': line, 'error': ", ".join(errors[position])})
+                continue
+            
+            data = dict(zip(fields, params))
+            if subtype:
+                data['tipo'] = subtype
+            if codigo:
+                data['codigo'] = f"{codigo}-{line}"
+            records.append(data)
+        
+        rejected.sort(key=lambda row: row['linea'])
+        return records, rejected
+    
+    @staticmethod
+    def bulk_insert(entry: DispatchEntry, records: List[Dict[str, Any]]) -> List[int]:
+        """Inserta registros ya validados; retorna los IDs en orden"""
+        if entry.entity_key == 'usuario':
+            return Usuario.bulk_create_with_password(records)
+        return entry.model.bulk_create(records)
+    
+    @staticmethod
+    def _safe_validator(validator: Callable) -> Callable:
+        """Validador que trata valores vacíos o de tipo inesperado como inválidos"""
+        def check(value):
+            if value is None or value == '':
+                return False
+            try:
+                return validator(value)
+            except (TypeError, ValueError):
+                return False
+        return check
+    
+    def _handle_modificar(self, command: Command, context: Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
         """Handler para acción MODIFICAR (actualizar)"""
-        entity_key = self._get_entity_key(command.entity)
-        fields = ['id'] + self.ENTITY_FIELDS.get(entity_key, [])
+        entry = entry or self.DISPATCH[(command.entity, command.action)]
+        fields = ('id',) + entry.fields
         
         # Validar parámetros
         try:  
@@ -209,12 +431,12 @@ class CommandInterpreter(BaseInterpreter):
         data = {fields[i]: command.params[i] for i in range(1, len(fields))}
         
         # Validar campos
-        validation_errors = self._validate_fields(data)
+        validation_errors = self._run_validators(entry.validators, data)
         if validation_errors: 
             return self.format_error("Errores de validación:  " + ", ".  join(validation_errors))
         
         # Actualizar
-        model = self._get_model(command.entity)
+        model = entry.model
         try:
             if model.update(id_registro, data):
                 return self.format_success(f"{command.entity.capitalize()} actualizado exitosamente")
@@ -223,7 +445,7 @@ class CommandInterpreter(BaseInterpreter):
         except Exception as e:
             return self.format_error(f"Error al actualizar: {str(e)}")
     
-    def _handle_eliminar(self, command: Command, context: Dict) -> Dict[str, Any]:
+    def _handle_eliminar(self, command: Command, context: Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
         """Handler para acción ELIMINAR"""
         # Validar parámetros
         try:
@@ -238,7 +460,7 @@ class CommandInterpreter(BaseInterpreter):
             return self.format_error("El ID debe ser un número entero")
         
         # Eliminar
-        model = self._get_model(command.entity)
+        model = (entry or self.DISPATCH[(command.entity, command.action)]).model
         try:
             if model. delete(id_registro):
                 return self.format_success(f"{command.entity.capitalize()} eliminado exitosamente")
@@ -247,42 +469,54 @@ class CommandInterpreter(BaseInterpreter):
         except Exception as e:
             return self.format_error(f"Error al eliminar: {str(e)}")
     
-    def _handle_reporte(self, command: Command, context: Dict) -> Dict[str, Any]:
-        """Handler para acción REPORTE"""
-        model = self._get_model(command.entity)
+    def _handle_reporte(self, command: Command, context: Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
+        """
+        Handler para acción REPORTE
         
-        total = model.count()
-        report_data = {'total': total}
+        Cada reporte es una sola consulta GROUP BY (ver REPORTS): el total y
+        los totales por grupo salen de la misma fila de resultados.
+        """
+        entry = entry or self.DISPATCH[(command.entity, command.action)]
+        model = entry.model
+        
+        report = self.REPORTS.get(entry.entity_key)
+        if not report:
+            return self.format_success(
+                f"Reporte de {command.entity}s generado",
+                {'total': model.count()}
+            )
         
-        # Reportes específicos por entidad
-        if command.entity == 'usuario':
-            for tipo in ['cliente', 'mecanico', 'secretaria', 'propietario']:
-                count = Usuario.count({'tipo': tipo})
-                report_data[f'total_{tipo}s'] = count
+        column, buckets, key, sums = report
+        groups = model.aggregate(column, sums)
         
-        elif command.entity == 'cita':
-            for estado in ['pendiente', 'confirmada', 'completada', 'cancelada']: 
-                count = Cita.count({'estado': estado})
-                report_data[f'estado_{estado}'] = count
+        report_data = {'total': sum(group['total'] for group in groups.values())}
+        for name in sums:
+            report_data[name] = sum(group[name] for group in groups.values())
         
-        elif command.entity == 'pago':
-            for estado in ['pendiente', 'pagado_parcial', 'pagado_total']: 
-                count = Pago.count({'estado': estado})
-                report_data[f'estado_{estado}'] = count
+        # Los grupos sin registros aparecen con 0; los no previstos, al final
+        for bucket in list(buckets) + [g for g in groups if g is not None and g not in buckets]:
+            group = groups.get(bucket, {})
+            report_data[key.format(bucket)] = group.get('total', 0)
+            for name in sums:
+                report_data[f"{name}_{bucket}"] = group.get(name, 0)
         
         return self.format_success(
             f"Reporte de {command.entity}s generado",
             report_data
         )
     
-    def _handle_ayuda(self, command: Command, context: Dict) -> Dict[str, Any]:
+    def _handle_ayuda(self, command: Command, context: Dict, entry: Optional[DispatchEntry] = None) -> Dict[str, Any]:
         """Handler para comando AYUDA"""
         help_text = {
             'comandos_disponibles': [
                 'usuario mostrar',
+                'usuario mostrar [pagina; limite]',
+                'usuario mostrar [despues=id; limite=N]',
+                'usuario mostrar [todos] (CSV adjunto)',
                 'usuario ver [id]',
                 'usuario agregar [nombre; email; password; telefono; direccion; tipo]',
                 'vehiculo mostrar',
+                'vehiculo importar (un registro por línea en el cuerpo del correo)',
                 'servicio mostrar',
                 'cita mostrar',
                 'cita reporte'
@@ -294,13 +528,112 @@ class CommandInterpreter(BaseInterpreter):
     # MÉTODOS AUXILIARES
     # ========================================================================
     
+    # Parámetros con nombre de MOSTRAR
+    PAGE_PARAMS = ('pagina', 'limite', 'offset', 'despues')
+    
+    # Columnas que nunca se exportan con "mostrar [todos]"
+    EXPORT_EXCLUDED_FIELDS = ('password_hash',)
+    
+    def _page_options(self, params: List[Any]) -> Dict[str, Any]:
+        """
+        Interpreta los parámetros de paginación de MOSTRAR
+        
+        Returns:
+            Dict con pagina, limite, offset, despues y todos
+        
+        Raises:
+            ValidationError: Si algún parámetro es inválido
+        """
+        options = {'pagina': None, 'limite': None, 'offset': None, 'despues': None, 'todos': False}
+        positional = ['pagina', 'limite']
+        
+        for param in params:
+            text = str(param).strip().lower()
+            if text == 'todos':
+                options['todos'] = True
+                continue
+            
+            if '=' in text:
+                key, _, value = text.partition('=')
+                key = key.strip()
+                if key not in self.PAGE_PARAMS:
+                    raise ValidationError(f"Parámetro desconocido: {key} (use {', '.join(self.PAGE_PARAMS)})")
+            elif positional:
+                key, value = positional.pop(0), text
+            else:
+                raise ValidationError(f"Parámetro de más: {param}")
+            
+            try:
+                options[key] = int(value)
+            except ValueError:
+                raise ValidationError(f"{key} debe ser un número entero")
+        
+        if options['pagina'] is not None and options['pagina'] < 1:
+            raise ValidationError("pagina debe ser mayor a 0")
+        if options['offset'] is not None and options['offset'] < 0:
+            raise ValidationError("offset no puede ser negativo")
+        if sum(options[key] is not None for key in ('pagina', 'offset', 'despues')) > 1:
+            raise ValidationError("Use solo uno de pagina, offset o despues")
+        
+        limit = options['limite'] or settings.MOSTRAR_PAGE_SIZE
+        if limit < 1:
+            raise ValidationError("limite debe ser mayor a 0")
+        options['limite'] = min(limit, settings.MOSTRAR_MAX_LIMIT)
+        
+        if options['pagina']:
+            options['offset'] = (options['pagina'] - 1) * options['limite']
+        options['offset'] = options['offset'] or 0
+        
+        return options
+    
+    def _export_csv(self, command: Command, model, filters: Optional[Dict]) -> Dict[str, Any]:
+        """
+        Exporta la tabla completa como CSV adjunto a la respuesta
+        
+        Las filas se leen con un cursor del lado del servidor
+        (``iter_all``): solo el CSV generado queda en memoria. Las columnas
+        de ``EXPORT_EXCLUDED_FIELDS`` (contraseñas) no se piden a la BD.
+        """
+        name = command.subtype or command.entity
+        columns = [field for field in model.fields if field not in self.EXPORT_EXCLUDED_FIELDS]
+        output = io.StringIO()
+        writer = csv.writer(output)
+        count = 0
+        truncated = False
+        
+        rows = model.iter_all(filters, columns=columns)
+        try:
+            for row in rows:
+                if count >= settings.EXPORT_MAX_ROWS:
+                    truncated = True
+                    break
+                if count == 0:
+                    writer.writerow(row.keys())
+                writer.writerow('' if value is None else value for value in row.values())
+                count += 1
+        finally:
+            # Cierra el cursor y libera la conexión aunque se corte antes
+            rows.close()
+        
+        message = f"Se exportaron {count} registro(s) a {name}s.csv"
+        if truncated:
+            message += f" (solo los primeros {settings.EXPORT_MAX_ROWS})"
+        
+        result = self.format_success(message, {'archivo': f"{name}s.csv", 'registros': count})
+        result['attachments'] = [{
+            'filename': f"{name}s.csv",
+            'content': output.getvalue(),
+            'mimetype': 'text/csv',
+        }]
+        return result
+    
     def _get_model(self, entity: str):
         """Obtiene el modelo correspondiente a una entidad"""
         return self.MODELS.get(entity)
     
     def _get_entity_key(self, entity:  str) -> str:
         """Obtiene la clave de entidad normalizada"""
-        if entity in ['cliente', 'mecanico', 'secretaria', 'propietario']:
+        if entity in self.USER_SUBTYPES:
             return 'usuario'
         return entity
     
@@ -315,4 +648,20 @@ class CommandInterpreter(BaseInterpreter):
                 if not validator(value):
                     errors.append(f"{field}: valor inválido '{value}'")
         
-        return errors
\ No newline at end of file
+        return errors
+    
+    @staticmethod
+    def _run_validators(validators: Tuple[Tuple[str, Callable], ...], data: Dict[str, Any]) -> List[str]:
+        """Aplica la cadena de validadores precompilada de una entrada"""
+        errors = []
+        
+        for field, validator in validators:
+            value = data[field]
+            if not validator(value):
+                errors.append(f"{field}: valor inválido '{value}'")
+        
+        return errors
+
+
+# Tabla de despacho de la clase base (las subclases la arman en __init_subclass__)
+CommandInterpreter.DISPATCH = CommandInterpreter._build_dispatch()
\ No newline at end of file
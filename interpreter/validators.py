@@ -51,6 +51,11 @@ class ParameterValidator:
         """Valida tipo de usuario"""
         return str(tipo).lower() in ['propietario', 'secretaria', 'mecanico', 'cliente']
     
+    @staticmethod
+    def validate_tipo_servicio(tipo: str) -> bool:
+        """Valida tipo de servicio"""
+        return str(tipo).lower() in ['diagnostico', 'mantenimiento', 'reparacion']
+    
     @staticmethod
     def validate_number(value: Any, min_value: float = None, max_value: float = None) -> bool:
         """Valida que sea un número y esté en rango"""
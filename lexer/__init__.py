@@ -2,14 +2,17 @@
 Módulo Lexer - Análisis léxico de comandos
 """
 from .token import Token, TokenType
-from . lexer import Lexer, tokenize
-from .parser import parse_command, Command
+from . lexer import Lexer, tokenize, split_params
+from .parser import parse_command, parse_cache_info, clear_parse_cache, Command
 
 __all__ = [
     'Token',
     'TokenType',
     'Lexer',
     'tokenize',
+    'split_params',
     'parse_command',
+    'parse_cache_info',
+    'clear_parse_cache',
     'Command',
 ]
\ No newline at end of file
@@ -1,12 +1,50 @@
 """
 Analizador léxico (Lexer) para el sistema de taller mecánico
 """
-from typing import List
+import re
+from typing import List, Union
 from . token import Token, TokenType
 
 
+def _convert_value(text: str) -> Union[int, float, str]:
+    """Convierte un parámetro a número si es posible (float si tiene punto)"""
+    try:
+        if '.' in text:
+            return float(text)
+        return int(text)
+    except ValueError:
+        return text
+
+
+def split_params(text: str) -> List[Union[int, float, str]]:
+    """
+    Separa una línea ``a; b; c`` (con o sin corchetes) en parámetros
+    
+    Aplica las mismas reglas que los corchetes de un comando: se descartan
+    los parámetros vacíos y los números se convierten.
+    """
+    text = text.strip()
+    if text.startswith('['):
+        text = text[1:]
+    if text.endswith(']'):
+        text = text[:-1]
+    
+    params = []
+    for param in text.split(';'):
+        param = param.strip()
+        if param:
+            params.append(_convert_value(param))
+    return params
+
+
 class Lexer:
-    """Analizador léxico para comandos del sistema"""
+    """
+    Analizador léxico para comandos del sistema
+    
+    Recorre el texto una sola vez con un patrón compilado: cada coincidencia
+    es un bloque entre corchetes (hasta ``]`` o el final) o una palabra; los
+    espacios y los ``;``/``]`` sueltos quedan entre coincidencias y se saltan.
+    """
     
     # Mapeo de palabras clave (case-insensitive)
     KEYWORDS = {
@@ -32,6 +70,7 @@ class Lexer:
         'eliminar': TokenType.ELIMINAR,
         'ver': TokenType.VER,
         'reporte': TokenType.REPORTE,
+        'importar': TokenType.IMPORTAR,
         
         # Especiales
         'ayuda': TokenType.AYUDA,
@@ -42,6 +81,62 @@ class Lexer:
         'help': TokenType.AYUDA,
     }
     
+    # Bloque [param; param; ...] o palabra (hasta espacio o [ ] ;)
+    TOKEN_PATTERN = re.compile(r'(?P<bracket>\[[^\]]*\]?)|(?P<word>[^\s\[\];]+)')
+    
+    def __init__(self, text: str):
+        self.text = text.strip()
+    
+    def tokenize(self) -> List[Token]:
+        """Convierte el texto en lista de tokens"""
+        tokens = []
+        append = tokens.append
+        keywords = self.KEYWORDS
+        
+        for match in self.TOKEN_PATTERN.finditer(self.text):
+            start_pos = match.start()
+            text = match.group()
+            
+            if match.lastgroup == 'word':
+                # Keyword (case-insensitive, se guarda el valor original), número o string
+                token_type = keywords.get(text.lower())
+                if token_type:
+                    append(Token(token_type, text, start_pos))
+                else:
+                    value = _convert_value(text)
+                    append(Token(TokenType.STRING if value is text else TokenType.NUMBER, value, start_pos))
+                continue
+            
+            # Corchetes: LBRACKET, params separados por SEMICOLON, RBRACKET
+            content = text[1:-1] if text.endswith(']') else text[1:]
+            append(Token(TokenType.LBRACKET, '[', start_pos))
+            
+            first = True
+            for param in content.split(';'):
+                param = param.strip()
+                if not param:
+                    continue
+                if not first:
+                    append(Token(TokenType.SEMICOLON, ';', start_pos))
+                first = False
+                
+                value = _convert_value(param)
+                append(Token(TokenType.STRING if value is param else TokenType.NUMBER, value, start_pos))
+            
+            append(Token(TokenType.RBRACKET, ']', start_pos))
+        
+        # Agregar EOF al final
+        append(Token(TokenType.EOF, '', len(self.text)))
+        return tokens
+
+
+class CharLexer(Lexer):
+    """
+    Implementación anterior, carácter por carácter
+    
+    Se conserva como referencia para las pruebas diferenciales de Lexer.
+    """
+    
     def __init__(self, text: str):
         self.text = text. strip()
         self.pos = 0
@@ -1,22 +1,46 @@
 """
 Parser de comandos del sistema de taller mecánico
 """
-from typing import List, Optional, Any
-from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional, Any, Tuple
+from dataclasses import dataclass
 from .  token import Token, TokenType
 from . lexer import tokenize
 
+# Cantidad de asuntos distintos que se recuerdan ya parseados
+PARSE_CACHE_SIZE = 512
 
-@dataclass
+
+@dataclass(frozen=True, init=False)
 class Command:
-    """Representa un comando parseado"""
+    """
+    Representa un comando parseado
+    
+    Es inmutable (los parámetros se guardan como tupla) porque la misma
+    instancia se comparte entre todos los correos con el mismo asunto.
+    Usa __slots__ en lugar de __dict__ para ocupar menos memoria en cachés
+    y registros de auditoría.
+    """
+    __slots__ = ('entity', 'action', 'params', 'subtype')
+    
     entity: str
     action: str
-    params:  List[Any] = field(default_factory=list)
-    subtype: Optional[str] = None
+    params:  Tuple[Any, ...]
+    subtype: Optional[str]
+    
+    # __init__ propio: los valores por defecto de dataclass chocan con __slots__
+    def __init__(self, entity: str, action: str, params=(), subtype: Optional[str] = None):
+        object.__setattr__(self, 'entity', entity)
+        object.__setattr__(self, 'action', action)
+        object.__setattr__(self, 'params', params if isinstance(params, tuple) else tuple(params))
+        object.__setattr__(self, 'subtype', subtype)
+    
+    def __reduce__(self):
+        # copy/pickle no pueden restaurar slots de una clase congelada
+        return (self.__class__, (self.entity, self.action, self.params, self.subtype))
     
     def __repr__(self):
-        return f"Command(entity='{self.entity}', action='{self.action}', params={self.params}, subtype='{self.subtype}')"
+        return f"Command(entity='{self.entity}', action='{self.action}', params={list(self.params)}, subtype='{self.subtype}')"
 
 
 class Parser:
@@ -37,7 +61,8 @@ class Parser:
     # Acciones válidas
     ACTIONS = [
         TokenType.  MOSTRAR, TokenType.AGREGAR, TokenType.MODIFICAR,
-        TokenType. ELIMINAR, TokenType.VER, TokenType.REPORTE
+        TokenType. ELIMINAR, TokenType.VER, TokenType.REPORTE,
+        TokenType.IMPORTAR
     ]
     
     # Comandos especiales (standalone)
@@ -46,14 +71,16 @@ class Parser:
     ]
     
     def __init__(self, tokens: List[Token]):
-        self.tokens = [t for t in tokens if t. type != TokenType.EOF]
+        # Se recorre la lista recibida sin copiarla; el EOF final queda fuera del rango
+        self.tokens = tokens
+        self.end = len(tokens) - 1 if tokens and tokens[-1].type == TokenType.EOF else len(tokens)
         self.pos = 0
-        self.current_token = self.tokens[0] if self.tokens else None
+        self.current_token = self.tokens[0] if self.end else None
     
     def advance(self):
         """Avanza al siguiente token"""
         self.pos += 1
-        if self.pos < len(self. tokens):
+        if self.pos < self.end:
             self.current_token = self.tokens[self. pos]
         else:
             self.current_token = None
@@ -61,7 +88,7 @@ class Parser:
     def parse(self) -> Optional[Command]:
         """Parsea los tokens en un comando"""
         try:
-            if not self.tokens:
+            if not self.end:
                 return None
             
             # Verificar si es un comando especial (ayuda, salir, limpiar)
@@ -70,7 +97,7 @@ class Parser:
                 return Command(entity='system', action=action, params=[])
             
             # Necesita al menos 2 tokens (entidad + acción)
-            if len(self.tokens) < 2:
+            if self.end < 2:
                 return None
             
             entity = None
@@ -142,16 +169,60 @@ def parse_command(text: str) -> Optional[Command]:
     """
     Parsea un comando de texto
     
+    Los resultados se guardan en un LRU por texto (sin espacios en los
+    extremos, que el lexer ignora): un asunto repetido no se vuelve a
+    tokenizar ni parsear.
+    
     Args:
         text (str): Texto del comando
     
     Returns:
         Command: Comando parseado o None si hay error
     """
+    if not isinstance(text, str):
+        return None
+    return _parse_cached(text.strip())
+
+
+def batch_mode(subject: str) -> Optional[bool]:
+    """
+    Detecta el asunto de un lote ("lote", "lote simple", "lote atomico")
+    
+    Los comandos de un lote vienen en el cuerpo, así que el asunto no es
+    un comando que ``parse_command`` reconozca.
+    
+    Returns:
+        None si no es un lote, True si es atómico, False si es simple
+    """
+    if not isinstance(subject, str):
+        return None
+    words = subject.strip().lower().split()
+    if not words or words[0] != 'lote':
+        return None
+    if words[1:] in ([], ['simple']):
+        return False
+    if words[1:] in (['atomico'], ['atómico']):
+        return True
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cached(text: str) -> Optional[Command]:
+    """Tokeniza y parsea (sin caché)"""
     try:
         tokens = tokenize(text)
         parser = Parser(tokens)
         return parser.parse()
     except Exception as e: 
         print(f"❌ Error al parsear comando: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def parse_cache_info():
+    """Estadísticas del caché de parseo (hits, misses, maxsize, currsize)"""
+    return _parse_cached.cache_info()
+
+
+def clear_parse_cache():
+    """Vacía el caché de parseo y reinicia sus contadores"""
+    _parse_cached.cache_clear()
\ No newline at end of file
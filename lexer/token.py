@@ -1,6 +1,5 @@
 from enum import Enum
-from dataclasses import dataclass
-from typing import Any
+from typing import Any, NamedTuple
 
 class TokenType(Enum):
     """Tipos de tokens del lenguaje de comandos"""
@@ -27,6 +26,7 @@ class TokenType(Enum):
     ELIMINAR = 'eliminar'
     VER = 'ver'
     REPORTE = 'reporte'
+    IMPORTAR = 'importar'
     
     # Acciones especiales
     AYUDA = 'ayuda'
@@ -46,9 +46,14 @@ class TokenType(Enum):
     EOF = 'EOF'
     UNKNOWN = 'UNKNOWN'
 
-@dataclass
-class Token:
-    """Representa un token del lenguaje"""
+class Token(NamedTuple):
+    """
+    Representa un token del lenguaje
+    
+    Inmutable y sin __dict__. Es una tupla con nombre y no una dataclass
+    congelada porque el lexer crea muchos tokens y el __init__ congelado
+    es ~50% más lento.
+    """
     type: TokenType
     value: Any
     position: int
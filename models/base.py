@@ -1,7 +1,33 @@
 """
 Modelo base para todos los modelos de datos
 """
+import io
+import uuid
+from psycopg2.extensions import AsIs
+from psycopg2.extras import execute_values
 from config. database import db
+from config.settings import settings
+from .cache import query_cache
+
+# Valor para columnas ausentes en una fila de bulk_create (usa el DEFAULT de la tabla)
+DEFAULT = AsIs('DEFAULT')
+
+
+def _csv_field(value):
+    """
+    Campo CSV para COPY: None va sin comillas (NULL) y el texto siempre
+    entre comillas, así una cadena vacía no se confunde con NULL
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _freeze(params):
+    """Parámetros como clave de caché (las listas de filtros ANY pasan a tuplas)"""
+    return tuple(tuple(p) if isinstance(p, list) else p for p in params)
+
 
 class BaseModel:
     """Clase base para modelos de datos"""
@@ -9,18 +35,221 @@ class BaseModel:
     table_name = None
     fields = []
     
+    # Segundos que se guardan en caché las lecturas del modelo (0: sin caché).
+    # Para tablas que se leen mucho más de lo que se escriben.
+    cache_ttl = 0
+    
+    # Sufijos de comparación en filtros: {'fecha__gte': ...}
+    OPERATORS = {'ne': '<>', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>='}
+    
     @classmethod
-    def find_all(cls):
+    def find_all(cls, filters=None, columns=None, order_by=None, limit=None, offset=None, row_factory=None):
         """
-        Obtiene todos los registros de la tabla
+        Obtiene los registros de la tabla que cumplen los filtros
+        
+        Los filtros se traducen a un WHERE parametrizado (ver ``_where``),
+        así PostgreSQL puede usar los índices de esas columnas en lugar de
+        traer toda la tabla.
+        
+        Args:
+            filters (dict): Condiciones {columna: valor}
+            columns (list): Columnas a traer (por defecto todas)
+            order_by (str/list): Columna(s) de orden; con '-' delante es DESC
+            limit (int): Cantidad máxima de registros
+            offset (int): Registros a saltar
+            row_factory: Forma de las filas (ver config.rows; por defecto dicts)
         
         Returns:
             list: Lista de dicts con los registros
         """
-        query = f"SELECT * FROM {cls. table_name}"
-        result = db.execute(query, fetch_all=True)
+        query, params = cls._select(filters, columns, order_by)
+        
+        if limit is not None:
+            query += " LIMIT %s"
+            params += (limit,)
+        if offset:
+            query += " OFFSET %s"
+            params += (offset,)
+        
+        result = cls._read(query, params, fetch_all=True, row_factory=row_factory)
         return result if result is not None else []
     
+    @classmethod
+    def find_one(cls, filters, columns=None):
+        """
+        Obtiene el primer registro que cumple los filtros
+        
+        Returns:
+            dict: Registro encontrado o None
+        """
+        query, params = cls._select(filters, columns)
+        return cls._read(query + " LIMIT 1", params, fetch_one=True)
+    
+    @classmethod
+    def find_page(cls, limit, offset=0, after_id=None, filters=None, row_factory=None):
+        """
+        Obtiene una página de registros ordenados por ID
+        
+        Con ``after_id`` (paginación por cursor) se leen los registros con
+        ID mayor al dado: usa el índice de la clave primaria y no recorre
+        las filas anteriores como OFFSET.
+        
+        Args:
+            limit (int): Cantidad máxima de registros
+            offset (int): Registros a saltar (se ignora con after_id)
+            after_id (int): Último ID de la página anterior
+            filters (dict): Condiciones {columna: valor}, como en find_all
+            row_factory: Forma de las filas, como en find_all
+        
+        Returns:
+            list: Lista de dicts con los registros
+        """
+        if after_id is not None:
+            filters = dict(filters or {}, id__gt=after_id)
+            offset = None
+        
+        return cls.find_all(filters, order_by='id', limit=limit, offset=offset, row_factory=row_factory)
+    
+    @classmethod
+    def iter_all(cls, filters=None, batch_size=None, columns=None):
+        """
+        Recorre todos los registros (ordenados por ID) sin cargarlos en memoria
+        
+        Usa un cursor con nombre (del lado del servidor): PostgreSQL entrega
+        las filas de a ``batch_size`` a medida que se consumen. La conexión
+        queda tomada hasta terminar (o cerrar) el generador.
+        
+        Args:
+            columns (list): Columnas a leer (todas si es None)
+        
+        Yields:
+            dict: Un registro por vez
+        """
+        query, params = cls._select(filters, columns, order_by='id')
+        
+        with db.connection() as conn:
+            with conn.cursor(name=f"iter_{cls.table_name}_{uuid.uuid4().hex[:12]}") as cursor:
+                cursor.itersize = batch_size or settings.EXPORT_FETCH_SIZE
+                cursor.execute(query, params)
+                
+                columns = None
+                for row in cursor:
+                    if columns is None:
+                        columns = [desc[0] for desc in cursor.description]
+                    yield dict(zip(columns, row))
+    
+    @classmethod
+    def _read(cls, query, params=(), **options):
+        """
+        ``db.execute`` para lecturas, a través de la caché si el modelo la usa
+        
+        No se usa la caché dentro de una transacción: ahí las lecturas
+        deben ver las escrituras propias aún sin confirmar.
+        """
+        if not cls.cache_ttl or not settings.QUERY_CACHE_ENABLED or db.in_transaction():
+            return db.execute(query, params, **options)
+        
+        key = (query, _freeze(params), tuple(sorted(options.items())))
+        found, value = query_cache.get(cls.table_name, key)
+        if found:
+            return value
+        
+        version = query_cache.version(cls.table_name)
+        value = db.execute(query, params, **options)
+        if value is not None:
+            # None también es el resultado de un error: no se guarda
+            query_cache.set(cls.table_name, key, value, cls.cache_ttl, version)
+        return value
+    
+    @classmethod
+    def _written(cls):
+        """
+        Invalida las lecturas en caché de la tabla tras una escritura
+        
+        Dentro de una transacción se invalida también al confirmarla: otro
+        hilo pudo volver a leer el valor anterior mientras tanto.
+        """
+        query_cache.invalidate(cls.table_name)
+        if db.in_transaction():
+            db.on_commit(lambda: query_cache.invalidate(cls.table_name))
+    
+    @classmethod
+    def _select(cls, filters=None, columns=None, order_by=None):
+        """
+        Arma un SELECT con proyección, WHERE y ORDER BY
+        
+        Returns:
+            tuple: (sql, parámetros)
+        """
+        if columns:
+            projection = ', '.join(cls._column(column) for column in columns)
+        else:
+            projection = '*'
+        
+        where, params = cls._where(filters)
+        query = f"SELECT {projection} FROM {cls.table_name}{where}"
+        
+        if order_by:
+            if isinstance(order_by, str):
+                order_by = [order_by]
+            query += " ORDER BY " + ', '.join(
+                f"{cls._column(column[1:])} DESC" if column.startswith('-') else cls._column(column)
+                for column in order_by
+            )
+        
+        return query, params
+    
+    @classmethod
+    def _where(cls, filters):
+        """
+        Arma la cláusula WHERE a partir de un dict {columna: valor}
+        
+        - valor simple: ``columna = %s``
+        - lista/tupla/set: ``columna = ANY(%s)``
+        - None: ``columna IS NULL``
+        - sufijos ``__ne``, ``__lt``, ``__lte``, ``__gt``, ``__gte``:
+          comparación (``{'fecha__gte': hoy}``)
+        
+        Los nombres de columna se validan contra ``fields``; los valores van
+        siempre como parámetros.
+        
+        Returns:
+            tuple: (sql, parámetros); ('', ()) sin filtros
+        """
+        if not filters:
+            return '', ()
+        
+        conditions = []
+        params = []
+        for key, value in filters.items():
+            column, _, suffix = key.partition('__')
+            column = cls._column(column)
+            
+            if suffix:
+                if suffix not in cls.OPERATORS:
+                    raise ValueError(f"Operador inválido para {cls.table_name}: {key}")
+                if value is None:
+                    raise ValueError(f"{key}: no se puede comparar con NULL")
+                conditions.append(f"{column} {cls.OPERATORS[suffix]} %s")
+                params.append(value)
+            elif value is None:
+                conditions.append(f"{column} IS NULL")
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                conditions.append(f"{column} = ANY(%s)")
+                params.append(list(value))
+            else:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        
+        return " WHERE " + ' AND '.join(conditions), tuple(params)
+    
+    @classmethod
+    def _column(cls, column):
+        """Valida un nombre de columna contra ``fields`` (se interpola en el SQL)"""
+        if column not in cls.fields:
+            raise ValueError(f"Columna inválida para {cls.table_name}: {column}")
+        return column
+    
     @classmethod
     def find_by_id(cls, id):
         """
@@ -33,7 +262,7 @@ class BaseModel:
             dict:  Registro encontrado o None
         """
         query = f"SELECT * FROM {cls.table_name} WHERE id = %s"
-        return db.execute(query, (id,), fetch_one=True)
+        return cls._read(query, (id,), fetch_one=True, prepare=True)
     
     @classmethod
     def create(cls, data):
@@ -59,8 +288,83 @@ class BaseModel:
         
         # Ejecutar
         result = db.execute(query, tuple(valid_data.values()), fetch_one=True)
+        cls._written()
         return result['id'] if result else None
     
+    @classmethod
+    def bulk_create(cls, rows, page_size=None):
+        """
+        Crea muchos registros con INSERT multi-fila (o COPY si son muchos)
+        
+        Las filas se insertan en una sola transacción: si una falla no se
+        crea ninguna. Las columnas que falten en una fila toman el DEFAULT
+        de la tabla.
+        
+        Args:
+            rows (list): Lista de dicts con los datos de cada registro
+            page_size (int): Filas por sentencia INSERT
+        
+        Returns:
+            list: IDs creados, en el mismo orden que ``rows``
+        
+        Raises:
+            psycopg2.Error: Si falla la inserción
+        """
+        valid_rows = [{k: v for k, v in row.items() if k in cls.fields and k != 'id'} for row in rows]
+        columns = [f for f in cls.fields if f != 'id' and any(f in row for row in valid_rows)]
+        
+        if not valid_rows or not columns:
+            return []
+        
+        # COPY no admite DEFAULT por fila: solo si todas las filas traen todas las columnas
+        if len(valid_rows) >= settings.BULK_COPY_THRESHOLD and all(len(row) == len(columns) for row in valid_rows):
+            ids = cls._bulk_copy(columns, valid_rows)
+            cls._written()
+            return ids
+        
+        values = [tuple(row.get(c, DEFAULT) for c in columns) for row in valid_rows]
+        query = f"INSERT INTO {cls.table_name} ({', '.join(columns)}) VALUES %s RETURNING id"
+        
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                result = execute_values(
+                    cursor, query, values,
+                    page_size=page_size or settings.BULK_PAGE_SIZE,
+                    fetch=True
+                )
+        
+        cls._written()
+        return [row[0] for row in result]
+    
+    @classmethod
+    def _bulk_copy(cls, columns, rows):
+        """
+        Carga con COPY FROM STDIN (formato CSV)
+        
+        COPY no tiene RETURNING: los IDs se reservan antes con nextval sobre
+        la secuencia de la tabla y se escriben explícitamente en cada fila,
+        así el orden de los IDs es el de ``rows``.
+        """
+        page_size = settings.BULK_COPY_THRESHOLD
+        copy_sql = f"COPY {cls.table_name} (id, {', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                    (cls.table_name, len(rows))
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                
+                for start in range(0, len(rows), page_size):
+                    buffer = io.StringIO()
+                    for row_id, row in zip(ids[start:start + page_size], rows[start:start + page_size]):
+                        buffer.write(f"{row_id},{','.join(_csv_field(row[c]) for c in columns)}\n")
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_sql, buffer)
+        
+        return ids
+    
     @classmethod
     def update(cls, id, data):
         """
@@ -85,7 +389,8 @@ class BaseModel:
         
         # Ejecutar
         params = tuple(valid_data.values()) + (id,)
-        rowcount = db.execute(query, params)
+        rowcount = db.execute(query, params, prepare=True)
+        cls._written()
         
         return rowcount > 0 if rowcount is not None else False
     
@@ -101,21 +406,49 @@ class BaseModel:
             bool: True si se eliminó, False si no
         """
         query = f"DELETE FROM {cls.table_name} WHERE id = %s"
-        rowcount = db.execute(query, (id,))
+        rowcount = db.execute(query, (id,), prepare=True)
+        cls._written()
         return rowcount > 0 if rowcount is not None else False
     
     @classmethod
-    def count(cls):
+    def count(cls, filters=None):
         """
-        Cuenta total de registros
+        Cuenta los registros (que cumplen los filtros, si se dan)
+        
+        Args:
+            filters (dict): Condiciones {columna: valor}, como en find_all
         
         Returns:
             int:  Número de registros
         """
-        query = f"SELECT COUNT(*) as total FROM {cls.table_name}"
-        result = db.execute(query, fetch_one=True)
+        where, params = cls._where(filters)
+        query = f"SELECT COUNT(*) as total FROM {cls.table_name}{where}"
+        result = cls._read(query, params, fetch_one=True, prepare=True)
         return result['total'] if result else 0
     
+    @classmethod
+    def aggregate(cls, group_by, sums=(), filters=None):
+        """
+        Cuenta (y suma columnas) por grupo en una sola consulta
+        
+        Args:
+            group_by (str): Columna de agrupación
+            sums (tuple): Columnas numéricas a sumar por grupo
+            filters (dict): Condiciones {columna: valor}, como en find_all
+        
+        Returns:
+            dict: {valor del grupo: {'total': n, columna: suma, ...}}
+        """
+        column = cls._column(group_by)
+        select = [f"{column} AS grupo", "COUNT(*) AS total"]
+        select += [f"COALESCE(SUM({cls._column(name)}), 0) AS {name}" for name in sums]
+        
+        where, params = cls._where(filters)
+        query = f"SELECT {', '.join(select)} FROM {cls.table_name}{where} GROUP BY {column}"
+        
+        rows = cls._read(query, params, fetch_all=True) or []
+        return {row.pop('grupo'): row for row in rows}
+    
     @classmethod
     def exists(cls, id):
         """
@@ -128,5 +461,5 @@ class BaseModel:
             bool: True si existe, False si no
         """
         query = f"SELECT EXISTS(SELECT 1 FROM {cls.table_name} WHERE id = %s) as exists"
-        result = db.execute(query, (id,), fetch_one=True)
+        result = cls._read(query, (id,), fetch_one=True, prepare=True)
         return result['exists'] if result else False
\ No newline at end of file
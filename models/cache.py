@@ -0,0 +1,113 @@
+"""
+Caché de resultados de consultas de los modelos
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Tuple
+from config.rows import ResultSet
+from config.settings import settings
+
+
+class QueryCache:
+    """
+    Caché de lecturas por tabla con vencimiento (TTL) y LRU acotado
+
+    Cada entrada guarda la versión de su tabla al momento de leerse. Una
+    escritura en la tabla incrementa la versión (``invalidate``): las
+    entradas anteriores dejan de valer sin recorrerlas, y las que estaban
+    leyéndose durante la escritura tampoco quedan guardadas como vigentes.
+    Al llenarse se descartan las usadas hace más tiempo.
+
+    Los resultados se guardan y se entregan como copias: quien modifica
+    un registro recibido no altera lo que ven los demás.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = settings.QUERY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()          # (tabla, clave) -> (vence, versión, valor)
+        self._versions = defaultdict(int)      # tabla -> versión
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, table: str, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Busca un resultado vigente
+
+        Returns:
+            (encontrado, copia del valor)
+        """
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry:
+                expires, version, value = entry
+                if version == self._versions[table] and time.monotonic() < expires:
+                    self._entries.move_to_end((table, key))
+                    self.hits += 1
+                    return True, self._copy(value)
+                del self._entries[(table, key)]
+            self.misses += 1
+        return False, None
+
+    def version(self, table: str) -> int:
+        """Versión actual de la tabla (se toma antes de leer de la BD)"""
+        with self._lock:
+            return self._versions[table]
+
+    def set(self, table: str, key: Hashable, value: Any, ttl: float, version: int):
+        """Guarda un resultado leído con la versión ``version`` de la tabla"""
+        value = self._copy(value)
+        with self._lock:
+            if version != self._versions[table]:
+                # Hubo una escritura mientras se leía: el resultado puede ser viejo
+                return
+            self._entries[(table, key)] = (time.monotonic() + ttl, version, value)
+            self._entries.move_to_end((table, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, table: str):
+        """Invalida todas las lecturas guardadas de una tabla"""
+        with self._lock:
+            self._versions[table] += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for table in self._versions:
+                self._versions[table] += 1
+
+    def get_stats(self) -> Dict:
+        """Retorna estadísticas de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+            }
+
+    @staticmethod
+    def _copy(value):
+        """Copia de un resultado (los valores de cada columna son inmutables)"""
+        if isinstance(value, ResultSet):
+            return value[:]
+        if isinstance(value, list):
+            return [dict(row) if isinstance(row, dict) else row for row in value]
+        if isinstance(value, dict):
+            return dict(value)
+        return value
+
+
+# Instancia global
+query_cache = QueryCache()
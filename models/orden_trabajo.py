@@ -28,8 +28,8 @@ class OrdenTrabajo(BaseModel):
             VALUES (%s, %s, %s, %s)
             RETURNING id
         """
-        result = db.execute(query, (orden_id, servicio_id, cantidad, precio_unitario))
-        return result[0]['id']
+        result = db.execute(query, (orden_id, servicio_id, cantidad, precio_unitario), fetch_one=True)
+        return result['id'] if result else None
     
     @classmethod
     def get_servicios(cls, orden_id: int) -> List[Dict]:
@@ -41,7 +41,7 @@ class OrdenTrabajo(BaseModel):
             WHERE os.orden_trabajo_id = %s
             ORDER BY os.id
         """
-        return db.execute(query, (orden_id,))
+        return db.execute(query, (orden_id,), fetch_all=True) or []
     
     @classmethod
     def find_by_mecanico(cls, mecanico_id: int) -> List[Dict]:
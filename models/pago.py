@@ -22,7 +22,15 @@ class Pago(BaseModel):
                                metodo_pago: str, numero_cuota: int = 1,
                                numero_comprobante: str = None, 
                                recibido_por: int = None) -> int:
-        """Registra un detalle de pago (efectivo o QR)"""
+        """
+        Registra un detalle de pago (efectivo o QR)
+        
+        El detalle y la actualización del pago van en una transacción: o se
+        aplican los dos o ninguno.
+        
+        Raises:
+            RuntimeError: Si no se pudo registrar (no queda nada aplicado)
+        """
         query = """
             INSERT INTO pago_detalles 
             (pago_id, numero_cuota, monto, metodo_pago, numero_comprobante, 
@@ -30,8 +38,6 @@ class Pago(BaseModel):
             VALUES (%s, %s, %s, %s, %s, CURRENT_DATE, CURRENT_TIME, %s)
             RETURNING id
         """
-        result = db.execute(query, (pago_id, numero_cuota, monto, metodo_pago, 
-                                    numero_comprobante, recibido_por))
         
         # Actualizar monto_pagado y cuotas_pagadas en la tabla pagos
         query_update = """
@@ -46,9 +52,17 @@ class Pago(BaseModel):
                 updated_at = CURRENT_TIMESTAMP
             WHERE id = %s
         """
-        db.execute(query_update, (monto, monto, monto, pago_id), fetch=False)
         
-        return result[0]['id']
+        with db.transaction() as tx:
+            result = db.execute(query, (pago_id, numero_cuota, monto, metodo_pago, 
+                                        numero_comprobante, recibido_por), fetch_one=True)
+            updated = db.execute(query_update, (monto, monto, monto, pago_id)) if result else None
+            
+            if not updated:
+                tx.set_rollback()
+                raise RuntimeError(f"No se pudo registrar el pago de la cuota {numero_cuota} (pago {pago_id})")
+        
+        return result['id']
     
     @classmethod
     def get_detalles(cls, pago_id: int) -> List[Dict]:
@@ -60,7 +74,7 @@ class Pago(BaseModel):
             WHERE pd.pago_id = %s
             ORDER BY pd.numero_cuota
         """
-        return db.execute(query, (pago_id,))
+        return db.execute(query, (pago_id,), fetch_all=True) or []
     
     @classmethod
     def find_by_estado(cls, estado: str) -> List[Dict]:
@@ -70,9 +84,4 @@ class Pago(BaseModel):
     @classmethod
     def find_pendientes(cls) -> List[Dict]:
         """Obtiene pagos pendientes"""
-        query = f"""
-            SELECT * FROM {cls.table_name} 
-            WHERE estado IN ('pendiente', 'pagado_parcial')
-            ORDER BY fecha_vencimiento ASC
-        """
-        return db.execute(query)
\ No newline at end of file
+        return cls.find_all({'estado': ['pendiente', 'pagado_parcial']}, order_by='fecha_vencimiento')
\ No newline at end of file
@@ -8,6 +8,9 @@ class Servicio(BaseModel):
     fields = ['id', 'nombre', 'descripcion', 'tipo', 'precio_base',
               'duracion_estimada', 'estado', 'created_at', 'updated_at']
     
+    # Catálogo que casi no cambia: lecturas en caché por 5 minutos
+    cache_ttl = 300
+    
     @classmethod
     def find_by_tipo(cls, tipo: str) -> List[Dict]:
         """Obtiene servicios por tipo (diagnostico, mantenimiento, reparacion)"""
@@ -14,6 +14,10 @@ class Usuario(BaseModel):
     fields = ['id', 'nombre', 'email', 'password_hash', 'telefono', 
               'direccion', 'tipo', 'estado', 'foto', 'created_at', 'updated_at']
     
+    # find_by_tipo/find_all en caché por un minuto (find_by_email no: la
+    # autenticación siempre lee de la BD)
+    cache_ttl = 60
+    
     @classmethod
     def create_with_password(cls, data: Dict) -> Optional[int]:
         """
@@ -45,6 +49,27 @@ class Usuario(BaseModel):
         # Crear usando el método base
         return cls.create(data_copy)
     
+    @classmethod
+    def bulk_create_with_password(cls, rows: List[Dict]) -> List[int]:
+        """
+        Crea muchos usuarios con hash de contraseña (ver BaseModel.bulk_create)
+        
+        Args:
+            rows (list): Datos de cada usuario (con 'password')
+        
+        Returns:
+            list: IDs creados, en el mismo orden que ``rows``
+        """
+        prepared = []
+        for data in rows:
+            data_copy = data.copy()
+            if 'password' in data_copy:
+                data_copy['password_hash'] = cls.hash_password(data_copy.pop('password'))
+            data_copy.setdefault('estado', 'activo')
+            prepared.append(data_copy)
+        
+        return cls.bulk_create(prepared)
+    
     @staticmethod
     def hash_password(password: str) -> str:
         """
@@ -88,7 +113,7 @@ class Usuario(BaseModel):
             dict: Usuario encontrado o None
         """
         query = f"SELECT * FROM {cls.table_name} WHERE email = %s"
-        return db.execute(query, (email,), fetch_one=True)
+        return db.execute(query, (email,), fetch_one=True, prepare=True)
     
     @classmethod
     def find_by_tipo(cls, tipo: str) -> List[Dict]:
@@ -101,9 +126,7 @@ class Usuario(BaseModel):
         Returns:
             list: Lista de usuarios del tipo especificado
         """
-        query = f"SELECT * FROM {cls.table_name} WHERE tipo = %s"
-        result = db.execute(query, (tipo,), fetch_all=True)
-        return result if result is not None else []
+        return cls.find_all({'tipo': tipo})
     
     @classmethod
     def authenticate(cls, email: str, password: str) -> Optional[Dict]:
@@ -1,6 +1,5 @@
 from typing import List, Dict, Optional
 from . base import BaseModel
-from config. database import db
 
 class Vehiculo(BaseModel):
     """Modelo de Vehículo"""
@@ -18,6 +17,4 @@ class Vehiculo(BaseModel):
     @classmethod
     def find_by_placa(cls, placa: str) -> Optional[Dict]:
         """Busca vehículo por placa"""
-        query = f"SELECT * FROM {cls.table_name} WHERE placa = %s"
-        results = db.execute(query, (placa,))
-        return results[0] if results else None
\ No newline at end of file
+        return cls.find_one({'placa': placa})
\ No newline at end of file
@@ -5,10 +5,28 @@ from .email_reader import EmailReader
 from . email_sender import EmailSender
 from .email_processor import EmailCommandProcessor
 from .auth_service import AuthService
+from .mail_source import MailSource, create_mail_source
+from .mail_session import MailSessionManager
+from .imap_reader import IMAPEmailReader
+from .smtp_pool import SMTPConnectionPool
+from .outbound_queue import OutboundQueue, OutboundSender
+from .processed_store import ProcessedStore
+from .bloom_filter import BloomFilter
+from .csv_import import CsvImporter
 
 __all__ = [
     'EmailReader',
     'EmailSender',
     'EmailCommandProcessor',
-    'AuthService'
+    'AuthService',
+    'MailSource',
+    'create_mail_source',
+    'MailSessionManager',
+    'IMAPEmailReader',
+    'SMTPConnectionPool',
+    'OutboundQueue',
+    'OutboundSender',
+    'ProcessedStore',
+    'BloomFilter',
+    'CsvImporter'
 ]
\ No newline at end of file
@@ -0,0 +1,104 @@
+import hashlib
+import math
+import os
+import struct
+
+class BloomFilter:
+    """
+    Filtro de Bloom con persistencia en disco
+
+    Responde "seguro que no está" o "probablemente está" usando un arreglo de
+    bits de tamaño fijo: para 1 millón de claves con 1e-6 de falsos positivos
+    ocupa ~3.4 MB. No hay falsos negativos.
+
+    Formato del archivo: encabezado ``BLM1`` + capacidad, tasa de error,
+    cantidad de bits, cantidad de hashes y claves agregadas (big-endian),
+    seguido del arreglo de bits.
+    """
+
+    MAGIC = b'BLM1'
+    HEADER = struct.Struct('>4sQdQIQ')
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError(f"Parámetros inválidos: capacidad={capacity}, error={error_rate}")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[i >> 3] & (1 << (i & 7)) for i in self._indexes(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, key: str) -> bool:
+        """
+        Agrega una clave
+
+        Returns:
+            True si la clave no estaba (algún bit estaba apagado)
+        """
+        bits = self.bits
+        added = False
+        for i in self._indexes(key):
+            mask = 1 << (i & 7)
+            if not bits[i >> 3] & mask:
+                bits[i >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def is_saturated(self) -> bool:
+        """Indica si se superó la capacidad (la tasa de error real empieza a subir)"""
+        return self.count > self.capacity
+
+    def save(self, path: str):
+        """Guarda el filtro de forma atómica (archivo temporal + os.replace)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(
+                self.MAGIC, self.capacity, self.error_rate, self.num_bits, self.num_hashes, self.count
+            ))
+            f.write(self.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        """Carga un filtro guardado con save()"""
+        with open(path, 'rb') as f:
+            header = f.read(cls.HEADER.size)
+            if len(header) != cls.HEADER.size:
+                raise ValueError(f"Archivo de filtro truncado: {path}")
+
+            magic, capacity, error_rate, num_bits, num_hashes, count = cls.HEADER.unpack(header)
+            if magic != cls.MAGIC:
+                raise ValueError(f"Archivo de filtro inválido: {path}")
+
+            bloom = cls(capacity, error_rate)
+            if (bloom.num_bits, bloom.num_hashes) != (num_bits, num_hashes):
+                raise ValueError(f"Parámetros del filtro inconsistentes: {path}")
+
+            bits = f.read()
+            if len(bits) != len(bloom.bits):
+                raise ValueError(f"Archivo de filtro truncado: {path}")
+
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        return bloom
+
+    def _indexes(self, key: str):
+        """Posiciones de la clave (doble hashing sobre un digest de 128 bits)"""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
@@ -0,0 +1,227 @@
+import codecs
+import csv
+import io
+import logging
+import unicodedata
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from config.database import db
+from config.settings import settings
+from lexer.parser import Command
+from .mime_stream import CsvAttachment
+
+class CsvImporter:
+    """
+    Importa un adjunto CSV con los campos de AGREGAR
+
+    El archivo se lee en streaming desde el archivo temporal del adjunto:
+    se detecta codificación, separador y fila de encabezados con una muestra
+    del inicio, y las filas se validan (por columna) e insertan con
+    ``bulk_create`` en bloques de ``chunk_size``. Todos los bloques van en
+    una transacción: si falla la inserción no queda nada a medias. Las filas
+    inválidas no se insertan y se reportan con su número de línea.
+    """
+
+    # Entidades que aceptan "<entidad> agregar" + adjunto CSV
+    ENTITIES = ('usuario', 'vehiculo', 'servicio')
+
+    SAMPLE_SIZE = 64 * 1024
+    DELIMITERS = ',;\t|'
+
+    # Encabezados habituales que no coinciden con el nombre del campo
+    HEADER_ALIASES = {
+        'ano': 'anio',
+        'correo': 'email',
+        'contrasena': 'password',
+        'precio': 'precio_base',
+        'duracion': 'duracion_estimada',
+    }
+
+    def __init__(self, interpreter, chunk_size: Optional[int] = None, max_rejects: Optional[int] = None):
+        self.logger = logging.getLogger('CsvImporter')
+        self.interpreter = interpreter
+        self.chunk_size = chunk_size or settings.CSV_IMPORT_CHUNK_SIZE
+        self.max_rejects = settings.CSV_IMPORT_MAX_REJECTS if max_rejects is None else max_rejects
+
+    def run(self, command: Command, attachment: CsvAttachment) -> Dict:
+        """
+        Importa un adjunto
+
+        Returns:
+            Dict con resultado (success, message, data)
+        """
+        entry = self.interpreter.DISPATCH.get((command.entity, 'importar'))
+        if entry is None:
+            return self._error(f"No se puede importar {command.entity} desde CSV")
+
+        if attachment.truncated:
+            return self._error(
+                f"{attachment.filename}: el archivo supera el máximo de "
+                f"{settings.CSV_IMPORT_MAX_BYTES // (1024 * 1024)} MB o está dañado"
+            )
+
+        fields = self.interpreter.import_fields(command, entry)
+
+        raw = attachment.open_binary()
+        sample = raw.read(self.SAMPLE_SIZE)
+        raw.seek(0)
+        if not sample.strip():
+            return self._error(f"{attachment.filename}: el archivo está vacío")
+
+        encoding = self._detect_encoding(attachment.charset, sample)
+        dialect = self._sniff(sample.decode(encoding, errors='replace'))
+        text = io.TextIOWrapper(raw, encoding=encoding, errors='replace', newline='')
+
+        try:
+            reader = csv.reader(text, dialect)
+            rows, missing = self._rows(reader, fields)
+            if missing:
+                return self._error(f"{attachment.filename}: faltan columnas: {', '.join(missing)}")
+            return self._load(command, entry, fields, rows, attachment.filename)
+        except csv.Error as e:
+            return self._error(f"{attachment.filename}: CSV inválido: {e}")
+        finally:
+            # El archivo temporal lo cierra el dueño del adjunto
+            text.detach()
+
+    def _load(self, command: Command, entry, fields, rows: Iterator, filename: str) -> Dict:
+        """Valida e inserta por bloques dentro de una transacción"""
+        # Solo se guardan el primer y último ID: el archivo puede ser enorme
+        first_id = last_id = None
+        count = 0
+        rejected = []
+        rejected_count = 0
+        total = 0
+
+        try:
+            with db.transaction():
+                while True:
+                    chunk = list(islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    total += len(chunk)
+
+                    records, chunk_rejected = self.interpreter.validate_rows(command, entry, fields, chunk)
+                    rejected_count += len(chunk_rejected)
+                    rejected.extend(chunk_rejected[:self.max_rejects - len(rejected)])
+
+                    if records:
+                        ids = self.interpreter.bulk_insert(entry, records)
+                        if ids:
+                            first_id = ids[0] if first_id is None else first_id
+                            last_id = ids[-1]
+                            count += len(ids)
+        except Exception as e:
+            self.logger.error(f"❌ Error importando {filename}: {e}", exc_info=True)
+            return self._error(f"{filename}: error al importar, no se aplicó ningún cambio: {e}")
+
+        self.logger.info(f"📥 {filename}: {count} de {total} fila(s) importadas, {rejected_count} rechazada(s)")
+
+        if not count:
+            return {
+                'success': False,
+                'message': f"{filename}: ningún registro válido para importar ({rejected_count} rechazado(s))",
+                'data': rejected or None
+            }
+
+        message = f"{filename}: {count} {command.entity}(s) importado(s) (IDs {first_id} a {last_id})"
+        if rejected_count:
+            message += f", {rejected_count} fila(s) rechazada(s)"
+            if rejected_count > len(rejected):
+                message += f" (se detallan las primeras {len(rejected)})"
+            return {'success': True, 'message': message, 'data': rejected}
+
+        return {
+            'success': True,
+            'message': message,
+            'data': {'archivo': filename, 'insertados': count, 'primer_id': first_id, 'ultimo_id': last_id}
+        }
+
+    def _rows(self, reader, fields: Tuple[str, ...]) -> Tuple[Iterator, List[str]]:
+        """
+        Detecta encabezados y arma el iterador de filas (línea, valores)
+
+        Si la primera fila nombra los campos, las columnas se toman por
+        nombre (en cualquier orden, ignorando las demás); si no, por
+        posición en el orden de AGREGAR.
+
+        Returns:
+            (iterador de filas, campos faltantes en el encabezado)
+        """
+        first = next(reader, None)
+        if first is None:
+            return iter(()), []
+
+        header = [self._normalize(cell) for cell in first]
+        matches = [field for field in fields if field in header]
+
+        if matches:
+            missing = [field for field in fields if field not in header]
+            if missing:
+                return iter(()), missing
+            indexes = [header.index(field) for field in fields]
+            return self._iter_rows(reader, len(fields), indexes, None), []
+
+        return self._iter_rows(reader, len(fields), None, first), []
+
+    @staticmethod
+    def _iter_rows(reader, width: int, indexes: Optional[List[int]], first: Optional[List[str]]) -> Iterator:
+        """Filas (línea, valores); celdas vacías como None y filas vacías omitidas"""
+        def clean(cells):
+            values = [cell.strip() or None for cell in cells]
+            if indexes is not None:
+                return [values[i] if i < len(values) else None for i in indexes]
+            # Excel suele agregar separadores de sobra al final
+            while len(values) > width and values[-1] is None:
+                values.pop()
+            return values
+
+        if first is not None and any(cell.strip() for cell in first):
+            yield reader.line_num, clean(first)
+
+        for cells in reader:
+            if any(cell.strip() for cell in cells):
+                yield reader.line_num, clean(cells)
+
+    def _normalize(self, name: str) -> str:
+        """Nombre de columna sin tildes, en minúsculas y con _ en lugar de espacios"""
+        name = unicodedata.normalize('NFKD', name.strip().lstrip('\ufeff'))
+        name = ''.join(c for c in name if not unicodedata.combining(c)).lower().replace(' ', '_')
+        return self.HEADER_ALIASES.get(name, name)
+
+    @staticmethod
+    def _detect_encoding(charset: Optional[str], sample: bytes) -> str:
+        """Usa el charset declarado; sin él, UTF-8 (con o sin BOM) o cp1252 (Excel)"""
+        if charset and charset.lower() not in ('us-ascii', 'utf-8', 'utf8'):
+            try:
+                codecs.lookup(charset)
+                return charset
+            except LookupError:
+                pass
+
+        try:
+            sample.decode('utf-8')
+        except UnicodeDecodeError as e:
+            # Un carácter cortado al final de la muestra no cuenta
+            if e.start < len(sample) - 3:
+                return 'cp1252'
+        return 'utf-8-sig'
+
+    def _sniff(self, sample: str):
+        """Detecta el separador con las líneas completas de la muestra"""
+        if '\n' in sample:
+            sample = sample[:sample.rfind('\n')]
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=self.DELIMITERS)
+        except csv.Error:
+            first_line = sample.split('\n', 1)[0]
+            delimiter = max(self.DELIMITERS, key=first_line.count)
+
+            class Dialect(csv.excel):
+                pass
+            Dialect.delimiter = delimiter
+            return Dialect
+
+    @staticmethod
+    def _error(message: str) -> Dict:
+        return {'success': False, 'message': message, 'data': None}
@@ -1,8 +1,11 @@
 import logging
-from typing import Dict, Optional
-from lexer. parser import parse_command
+from typing import Dict, List, Optional, Tuple
+from lexer. parser import parse_command, batch_mode
+from lexer.lexer import split_params
 from interpreter.command_interpreter import CommandInterpreter
 from config.settings import settings
+from config.database import db
+from .csv_import import CsvImporter
 
 class EmailCommandProcessor:
     """Procesa comandos recibidos por correo electrónico"""
@@ -10,6 +13,7 @@ class EmailCommandProcessor:
     def __init__(self):
         self.logger = logging.getLogger('EmailProcessor')
         self.interpreter = CommandInterpreter()
+        self.csv_importer = CsvImporter(self.interpreter)
     
     def process_email_command(self, email_data: Dict) -> Dict:
         """
@@ -33,6 +37,11 @@ class EmailCommandProcessor:
         
         self.logger.info(f"📨 Procesando correo de {from_email}:  {subject}")
         
+        # Asunto "lote": los comandos vienen en el cuerpo, uno por línea
+        atomic = batch_mode(subject)
+        if atomic is not None:
+            return self.process_batch(email_data, atomic)
+        
         # 1. Parsear comando del subject
         command = parse_command(subject)
         
@@ -45,12 +54,16 @@ class EmailCommandProcessor:
             }
         
         # 2. Crear contexto de ejecución (sin usuario registrado)
-        context = {
-            'user_id': None,
-            'nombre': from_email. split('@')[0],  # Usar parte antes del @
-            'email': from_email,
-            'tipo': 'invitado'
-        }
+        context = self._build_context(from_email)
+        
+        # Adjuntos CSV: "vehiculo agregar" sin parámetros o "vehiculo importar"
+        attachments = email_data.get('attachments') or []
+        if attachments and self._wants_csv_import(command):
+            return self.import_csv(command, attachments)
+        
+        # Importación masiva: un registro por línea del cuerpo
+        if command.action == 'importar':
+            context['rows'] = self._import_rows(email_data.get('body') or '')
         
         self. logger.info(f"👤 Email: {from_email}")
         self.logger.info(f"🔧 Comando: {command.entity} {command.action}")
@@ -73,4 +86,198 @@ class EmailCommandProcessor:
                 'success':  False,
                 'message': f'Error al ejecutar comando: {str(e)}',
                 'data': None
-            }
\ No newline at end of file
+            }
+    
+    def process_batch(self, email_data: Dict, atomic: bool = False) -> Dict:
+        """
+        Ejecuta los comandos del cuerpo del correo (uno por línea)
+        
+        Se ignoran líneas vacías y comentarios (#); la lectura termina en la
+        firma (--) o en el texto citado de una respuesta (>). En modo atómico
+        todos los comandos comparten una transacción: si uno falla se
+        revierte el lote completo y los siguientes no se ejecutan.
+        
+        Returns:
+            Dict con resultado consolidado; ``data`` tiene una fila por línea
+        """
+        from_email = email_data['from_email']
+        lines = self._batch_lines(email_data.get('body') or '')
+        mode = 'atómico' if atomic else 'simple'
+        
+        if not lines:
+            return {
+                'success': False,
+                'message': 'El lote no contiene comandos. Escriba un comando por línea en el cuerpo del correo.',
+                'data': None
+            }
+        
+        if len(lines) > settings.BATCH_MAX_COMMANDS:
+            return {
+                'success': False,
+                'message': f'El lote tiene {len(lines)} comandos; el máximo es {settings.BATCH_MAX_COMMANDS}.',
+                'data': None
+            }
+        
+        self.logger.info(f"📦 Lote {mode} de {from_email}: {len(lines)} comando(s)")
+        
+        # Parsear todo antes de ejecutar: un error de sintaxis no deja el lote a medias
+        parsed = [(number, text, parse_command(text)) for number, text in lines]
+        rows = [
+            {'linea': number, 'comando': text, 'estado': 'pendiente', 'mensaje': ''}
+            for number, text, _ in parsed
+        ]
+        
+        invalid = 0
+        for row, (_, text, command) in zip(rows, parsed):
+            if not command:
+                row['estado'] = 'error'
+                row['mensaje'] = 'No se pudo parsear el comando. Verifique la sintaxis.'
+                invalid += 1
+        
+        context = self._build_context(from_email)
+        
+        if atomic:
+            if invalid:
+                self._mark_pending(rows, 'omitido', 'Lote no ejecutado por errores de sintaxis')
+            else:
+                try:
+                    committed = self._run_atomic(parsed, rows, context)
+                    reason = 'No ejecutado: el lote fue revertido'
+                except Exception as e:
+                    self.logger.error(f"❌ Error en la transacción del lote: {e}", exc_info=True)
+                    committed = False
+                    reason = f'Error de transacción: {e}'
+                
+                if not committed:
+                    self._mark_pending(rows, 'omitido', reason)
+                    for row in rows:
+                        if row['estado'] == 'ok':
+                            row['estado'] = 'revertido'
+        else:
+            for row, (_, _, command) in zip(rows, parsed):
+                if command:
+                    self._apply_result(row, self._execute(command, context))
+        
+        executed = sum(1 for row in rows if row['estado'] == 'ok')
+        success = executed == len(rows)
+        
+        if success:
+            message = f'Lote {mode}: {executed} de {len(rows)} comandos ejecutados correctamente'
+        elif atomic:
+            message = f'Lote atómico revertido: ningún cambio fue aplicado ({len(rows)} comandos)'
+        else:
+            message = f'Lote {mode}: {executed} de {len(rows)} comandos ejecutados, {len(rows) - executed} con error'
+        
+        log = self.logger.info if success else self.logger.warning
+        log(f"{'✅' if success else '⚠️'} {message}")
+        
+        return {'success': success, 'message': message, 'data': rows}
+    
+    def _run_atomic(self, parsed: List[Tuple[int, str, object]], rows: List[Dict], context: Dict) -> bool:
+        """
+        Ejecuta el lote en una transacción; al primer fallo revierte todo
+        
+        Returns:
+            True si se hizo commit
+        """
+        with db.transaction() as tx:
+            for row, (_, _, command) in zip(rows, parsed):
+                result = self._execute(command, context)
+                self._apply_result(row, result)
+                
+                # Una query fallida también aborta la transacción en PostgreSQL
+                if not result['success'] or tx.failed:
+                    tx.set_rollback()
+                    break
+        
+        return not tx.failed
+    
+    def import_csv(self, command, attachments: List) -> Dict:
+        """Importa los adjuntos CSV de un correo (un resultado consolidado)"""
+        self.logger.info(f"📎 Importando {len(attachments)} adjunto(s) CSV en {command.entity}")
+        
+        results = [self.csv_importer.run(command, attachment) for attachment in attachments]
+        if len(results) == 1:
+            return results[0]
+        
+        return {
+            'success': all(result['success'] for result in results),
+            'message': '; '.join(result['message'] for result in results),
+            'data': [
+                {
+                    'archivo': attachment.filename,
+                    'estado': 'ok' if result['success'] else 'error',
+                    'mensaje': result['message'],
+                }
+                for attachment, result in zip(attachments, results)
+            ]
+        }
+    
+    @staticmethod
+    def _wants_csv_import(command) -> bool:
+        """AGREGAR sin parámetros (en las entidades de CsvImporter) o IMPORTAR"""
+        if command.action == 'importar':
+            return True
+        if command.action != 'agregar':
+            return False
+        
+        params = list(command.params)
+        if command.subtype:
+            # El parser agrega el subtipo como primer parámetro
+            params = params[1:]
+            entity = 'usuario'
+        else:
+            entity = command.entity
+        return not params and entity in CsvImporter.ENTITIES
+    
+    def _execute(self, command, context: Dict) -> Dict:
+        """Interpreta un comando sin dejar escapar excepciones"""
+        try:
+            return self.interpreter.interpret(command, context)
+        except Exception as e:
+            self.logger.error(f"❌ Error ejecutando comando: {e}", exc_info=True)
+            return {
+                'success': False,
+                'message': f'Error al ejecutar comando: {str(e)}',
+                'data': None
+            }
+    
+    @staticmethod
+    def _apply_result(row: Dict, result: Dict):
+        row['estado'] = 'ok' if result['success'] else 'error'
+        row['mensaje'] = result['message']
+    
+    @staticmethod
+    def _mark_pending(rows: List[Dict], estado: str, mensaje: str):
+        for row in rows:
+            if row['estado'] == 'pendiente':
+                row['estado'] = estado
+                row['mensaje'] = mensaje
+    
+    @staticmethod
+    def _batch_lines(body: str) -> List[Tuple[int, str]]:
+        """Extrae (número de línea, comando) del cuerpo de un lote"""
+        lines = []
+        for number, line in enumerate(body.splitlines(), start=1):
+            text = line.strip()
+            if text.startswith('>') or line.rstrip() == '--':
+                break
+            if not text or text.startswith('#'):
+                continue
+            lines.append((number, text))
+        return lines
+    
+    @classmethod
+    def _import_rows(cls, body: str) -> List[Tuple[int, list]]:
+        """Registros de una importación: (número de línea, parámetros)"""
+        return [(number, split_params(text)) for number, text in cls._batch_lines(body)]
+    
+    @staticmethod
+    def _build_context(from_email: str) -> Dict:
+        """Contexto de ejecución (sin usuario registrado)"""
+        return {
+            'user_id': None,
+            'nombre': from_email. split('@')[0],  # Usar parte antes del @
+            'email': from_email,
+            'tipo': 'invitado'
+        }
@@ -1,6 +1,7 @@
 import poplib
 import email
 from email.header import decode_header, Header
+from email.parser import BytesHeaderParser
 from typing import List, Dict, Optional
 import logging
 import hashlib
@@ -8,50 +9,52 @@ import os
 import re
 import base64
 import quopri
+import time
 from config. settings import settings
+from lexer.parser import parse_command, batch_mode
+from .mail_source import MailSource
+from .processed_store import ProcessedStore
+from .mime_stream import (
+    close_attachments, extract_csv_attachments, parse_message_with_csv, retr_lines, split_lines
+)
 
-class EmailReader: 
+class EmailReader(MailSource):
     """Lee correos usando POP3 con soporte multi-proveedor (Gmail, Hotmail, Yahoo, etc.)"""
     
     def __init__(self):
         self.logger = logging. getLogger('EmailReader')
         self.pop3 = None
-        self.processed_ids = self._load_processed_ids()
+        self.pending_deletions = 0
+        self.last_connect_timings = {}
+        self.processed = ProcessedStore()
     
-    def _load_processed_ids(self) -> set:
-        """Carga IDs de correos ya procesados"""
-        os.makedirs(os.path.dirname(settings. PROCESSED_EMAILS_FILE), exist_ok=True)
-        
-        if os.path.exists(settings.PROCESSED_EMAILS_FILE):
-            with open(settings.PROCESSED_EMAILS_FILE, 'r', encoding='utf-8') as f:
-                return set(line. strip() for line in f.readlines())
-        return set()
-    
-    def _save_processed_id(self, email_id: str):
-        """Guarda ID de correo procesado"""
-        self.processed_ids.add(email_id)
-        
-        # Limitar tamaño del archivo
-        if len(self. processed_ids) > settings.MAX_PROCESSED_HISTORY:
-            self.processed_ids = set(list(self.processed_ids)[-settings.MAX_PROCESSED_HISTORY:])
-        
-        with open(settings.PROCESSED_EMAILS_FILE, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(self.processed_ids))
+    def _save_processed_id(self, email_id: str, uid: Optional[str] = None):
+        """Guarda ID de correo procesado (y su UID si se conoce)"""
+        self.processed.add(email_id, uid)
     
     def connect(self) -> bool:
         """Conecta al servidor POP3"""
         try: 
             self.logger.info(f"🔌 Conectando a {settings. POP3_HOST}:{settings.POP3_PORT}...")
+            self.pending_deletions = 0
+            started = time.perf_counter()
             
             if settings.POP3_USE_SSL:
                 self.pop3 = poplib.POP3_SSL(settings.POP3_HOST, settings.POP3_PORT, timeout=30)
             else:
                 self.pop3 = poplib.POP3(settings.POP3_HOST, settings.POP3_PORT, timeout=30)
             
+            connected = time.perf_counter()
+            
             # Autenticar
             self.pop3.user(settings.POP3_USER)
             self.pop3.pass_(settings.POP3_PASSWORD)
             
+            self.last_connect_timings = {
+                'handshake_ms': (connected - started) * 1000,
+                'auth_ms': (time.perf_counter() - connected) * 1000,
+            }
+            
             # Obtener estadísticas
             num_messages, mailbox_size = self.pop3.stat()
             
@@ -76,10 +79,35 @@ class EmailReader:
                 self.logger. info("🔌 Desconectado de POP3")
             except: 
                 pass
+            finally:
+                self.pop3 = None
+                self.pending_deletions = 0
+        
+        self.processed.flush()
+    
+    def is_connected(self) -> bool:
+        """Indica si hay una sesión POP3 abierta"""
+        return self.pop3 is not None
+    
+    def ping(self) -> bool:
+        """Verifica que la sesión POP3 siga viva (NOOP)"""
+        if not self.pop3:
+            return False
+        try:
+            self.pop3.noop()
+            return True
+        except Exception as e:
+            self.logger.debug(f"NOOP falló, la sesión POP3 no está disponible: {e}")
+            return False
     
     def get_new_emails(self) -> List[Dict]:
         """Obtiene correos nuevos (no procesados)"""
         try:
+            if settings.POP3_USE_UIDL:
+                uids = self._list_uids()
+                if uids is not None:
+                    return self._get_new_emails_by_uid(uids)
+            
             # Obtener número de mensajes
             num_messages = len(self.pop3.list()[1])
             
@@ -92,16 +120,17 @@ class EmailReader:
             
             # Iterar sobre todos los mensajes (del más nuevo al más viejo)
             for i in range(num_messages, 0, -1):
-                email_data = self._fetch_email(i)
+                email_data = self._fetch_candidate(i)
                 
                 if email_data:
                     # Verificar si ya fue procesado
                     email_hash = email_data['hash']
                     
-                    if email_hash not in self.processed_ids:
+                    if email_hash not in self.processed:
                         emails.append(email_data)
                         self. logger.info(f"📨 Nuevo correo #{i}: {email_data['from_email']} - {email_data['subject'][: 50]}")
                     else:
+                        close_attachments(email_data)
                         self.logger.debug(f"⏭️ Correo #{i} ya procesado anteriormente")
             
             return emails
@@ -110,18 +139,182 @@ class EmailReader:
             self.logger.error(f"❌ Error obteniendo correos:  {e}", exc_info=True)
             return []
     
+    def _list_uids(self) -> Optional[List[tuple]]:
+        """
+        Lista los UIDs de los mensajes con el comando UIDL
+        
+        Returns:
+            Lista de tuplas (número, uid) o None si el servidor no soporta UIDL
+        """
+        try:
+            response, lines, octets = self.pop3.uidl()
+        except poplib.error_proto as e:
+            self.logger.warning(f"⚠️ El servidor no soporta UIDL, usando descarga completa: {e}")
+            return None
+        
+        uids = []
+        for line in lines:
+            if isinstance(line, bytes):
+                line = line.decode('ascii', errors='replace')
+            parts = line.split()
+            if len(parts) >= 2:
+                uids.append((int(parts[0]), parts[1]))
+        return uids
+    
+    def _get_new_emails_by_uid(self, uids: List[tuple]) -> List[Dict]:
+        """Descarga solo los mensajes cuyo UID no fue visto antes"""
+        # Los UIDs se recuerdan mientras el servidor los liste
+        self.processed.retain_uids({uid for _, uid in uids})
+        
+        if not uids:
+            return []
+        
+        self.logger.info(f"📬 Total de mensajes en servidor: {len(uids)}")
+        
+        emails = []
+        skipped = 0
+        
+        # Del más nuevo al más viejo, igual que la descarga completa
+        for message_num, uid in sorted(uids, reverse=True):
+            if self.processed.has_uid(uid):
+                skipped += 1
+                continue
+            
+            email_data = self._fetch_candidate(message_num, uid)
+            if not email_data:
+                continue
+            
+            email_data['uid'] = uid
+            email_hash = email_data['hash']
+            
+            if email_hash in self.processed:
+                # Procesado antes de conocer su UID: recordarlo para no volver a descargarlo
+                self._save_processed_id(email_hash, uid)
+                close_attachments(email_data)
+                self.logger.debug(f"⏭️ Correo #{message_num} ya procesado anteriormente")
+            else:
+                emails.append(email_data)
+                self. logger.info(f"📨 Nuevo correo #{message_num}: {email_data['from_email']} - {email_data['subject'][: 50]}")
+        
+        if skipped:
+            self.logger.debug(f"⏭️ {skipped} correo(s) omitidos por UID sin descargarlos")
+        
+        return emails
+    
+    def _fetch_headers(self, message_num: int):
+        """Obtiene solo los headers de un correo (TOP n 0), sin cuerpo ni adjuntos"""
+        response, lines, octets = self.pop3.top(message_num, 0)
+        return BytesHeaderParser().parsebytes(b'\r\n'.join(lines))
+    
+    def _fetch_candidate(self, message_num: int, uid: Optional[str] = None) -> Optional[Dict]:
+        """
+        Obtiene un correo aún no procesado, pasando antes por el prefiltro
+        de headers si está activo
+        
+        Los correos de remitentes no autorizados (REQUIRE_AUTH y
+        ALLOWED_EMAILS) se marcan como procesados y no se retornan, con o
+        sin prefiltro: no reciben respuesta.
+        
+        Returns:
+            Datos del correo o None si se descarta o no se pudo obtener
+        """
+        if settings.POP3_HEADER_PREFILTER:
+            verdict, headers = self._header_prefilter(message_num, uid)
+            if verdict == 'skip':
+                return None
+            if verdict == 'headers':
+                # Asunto sin comando: la respuesta de error no necesita el cuerpo
+                return self._parse_message(message_num, headers)
+        
+        email_data = self._fetch_email(message_num)
+        if email_data and not self._is_sender_allowed(email_data['from_email']):
+            self._save_processed_id(email_data['hash'], uid)
+            close_attachments(email_data)
+            self.logger.info(f"🚫 Correo #{message_num} de remitente no autorizado: {email_data['from_email']}")
+            return None
+        return email_data
+    
+    def _header_prefilter(self, message_num: int, uid: Optional[str] = None):
+        """
+        Decide con los headers (TOP n 0) si vale la pena descargar el correo completo
+        
+        Returns:
+            (veredicto, headers):
+            - 'retr': descargar con RETR (también si TOP no está disponible)
+            - 'skip': ya procesado, o remitente no autorizado (se marca como procesado)
+            - 'headers': el asunto no es un comando ni un lote; se responde el
+              error con los headers, sin descargar el cuerpo ni los adjuntos
+        """
+        try:
+            headers = self._fetch_headers(message_num)
+        except Exception as e:
+            # TOP es opcional en POP3: ante cualquier fallo se descarga completo
+            self.logger.debug(f"TOP no disponible para correo #{message_num}: {e}")
+            return 'retr', None
+        
+        email_hash = self._generate_email_hash(headers)
+        
+        if email_hash in self.processed:
+            if uid:
+                self._save_processed_id(email_hash, uid)
+            self.logger.debug(f"⏭️ Correo #{message_num} ya procesado anteriormente")
+            return 'skip', headers
+        
+        from_email = self._extract_email(headers.get('From', ''))
+        if not self._is_sender_allowed(from_email):
+            self._save_processed_id(email_hash, uid)
+            self.logger.info(f"🚫 Correo #{message_num} de remitente no autorizado: {from_email}")
+            return 'skip', headers
+        
+        subject = self._decode_header(headers.get('Subject', ''))
+        if batch_mode(subject) is None and parse_command(subject) is None:
+            self.logger.info(f"⏭️ Correo #{message_num} sin comando válido en el asunto, no se descarga: {subject[:50]}")
+            return 'headers', headers
+        
+        return 'retr', headers
+    
+    def _is_sender_allowed(self, from_email: str) -> bool:
+        """Verifica el remitente contra la lista blanca (si la autenticación está activa)"""
+        if not settings.REQUIRE_AUTH or not settings.ALLOWED_EMAILS:
+            return True
+        return from_email.lower() in [e.lower() for e in settings.ALLOWED_EMAILS]
+    
     def _fetch_email(self, message_num: int) -> Optional[Dict]:
         """Obtiene datos de un correo específico"""
         try:
-            # Obtener el mensaje completo
-            response, lines, octets = self.pop3.retr(message_num)
-            
-            # Unir todas las líneas
-            email_bytes = b'\r\n'.join(lines)
+            if settings.MAIL_STREAMING_PARSE:
+                # Parsear a medida que llegan las líneas; solo los CSV se guardan (en archivo temporal)
+                lines = retr_lines(self.pop3, message_num)
+                try:
+                    email_message, attachments = parse_message_with_csv(lines)
+                finally:
+                    # Si el parseo falló, descarta el resto de la respuesta RETR
+                    lines.close()
+            else:
+                # Obtener el mensaje completo
+                response, lines, octets = self.pop3.retr(message_num)
+                email_message = email.message_from_bytes(b'\r\n'.join(lines))
+                attachments = extract_csv_attachments(email_message)
             
-            # Parsear el mensaje
+            return self._parse_message(message_num, email_message, attachments)
+        
+        except Exception as e:
+            self. logger.error(f"❌ Error procesando correo #{message_num}:  {e}", exc_info=True)
+            return None
+    
+    def _parse_email(self, message_num, email_bytes: bytes) -> Optional[Dict]:
+        """Construye el diccionario de datos a partir del correo crudo"""
+        if settings.MAIL_STREAMING_PARSE:
+            email_message, attachments = parse_message_with_csv(split_lines(email_bytes))
+        else:
             email_message = email.message_from_bytes(email_bytes)
-            
+            attachments = extract_csv_attachments(email_message)
+        
+        return self._parse_message(message_num, email_message, attachments)
+    
+    def _parse_message(self, message_num, email_message, attachments: Optional[List] = None) -> Optional[Dict]:
+        """Construye el diccionario de datos a partir del mensaje parseado"""
+        try:
             # Generar hash único del correo
             email_hash = self._generate_email_hash(email_message)
             
@@ -155,11 +348,14 @@ class EmailReader:
                 'body':  body,
                 'date': date,
                 'provider': provider,
+                'attachments': attachments or [],
                 'raw':  email_message
             }
         
         except Exception as e:
             self. logger.error(f"❌ Error procesando correo #{message_num}:  {e}", exc_info=True)
+            for attachment in attachments or []:
+                attachment.close()
             return None
     
     def _generate_email_hash(self, email_message) -> str:
@@ -442,7 +638,7 @@ class EmailReader:
     def mark_as_processed(self, email_data: dict):
         """Marca correo como procesado"""
         email_hash = email_data['hash']
-        self._save_processed_id(email_hash)
+        self._save_processed_id(email_hash, email_data.get('uid'))
         self.logger. debug(f"✓ Correo marcado como procesado: {email_hash}")
     
     def delete_email(self, message_num:  int):
@@ -450,6 +646,7 @@ class EmailReader:
         if settings.POP3_DELETE_AFTER_READ:
             try:
                 self.pop3.dele(message_num)
+                self.pending_deletions += 1
                 self.logger.info(f"🗑️ Correo #{message_num} eliminado del servidor")
             except Exception as e: 
                 self.logger.error(f"❌ Error eliminando correo #{message_num}: {e}")
\ No newline at end of file
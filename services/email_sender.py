@@ -1,16 +1,89 @@
 import smtplib
 from email.mime.text import MIMEText
 from email.mime. multipart import MIMEMultipart
+from email.mime.base import MIMEBase
 from email.header import Header
-from typing import Optional
+from email import encoders
+from typing import Dict, List, Optional
 import logging
+from config.rows import ResultSet
 from config. settings import settings
+from .smtp_pool import SMTPConnectionPool
 
 class EmailSender:
     """Envía correos usando SMTP con soporte multi-servidor"""
     
     def __init__(self):
         self.logger = logging. getLogger('EmailSender')
+        
+        # Sesiones SMTP reutilizables (SMTP_POOL_SIZE=0 abre una conexión por correo)
+        self.pool = SMTPConnectionPool(self._open_connection) if settings.SMTP_POOL_SIZE > 0 else None
+    
+    def _open_connection(self) -> smtplib.SMTP:
+        """Abre y autentica una conexión SMTP según la configuración (SSL, TLS o Plain)"""
+        if settings.SMTP_USE_SSL:
+            # Modo SSL (puerto 465 - típicamente Gmail)
+            self.logger.debug(f"Conectando vía SSL a {settings.SMTP_HOST}:{settings.SMTP_PORT}")
+            server = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+            
+            # Autenticar
+            if settings.SMTP_USER and settings.SMTP_PASSWORD:
+                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+            
+            return server
+        
+        # Modo Plain/TLS (puerto 25/587 - típicamente Tecnoweb)
+        self.logger. debug(f"Conectando a {settings.SMTP_HOST}:{settings.SMTP_PORT}")
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+        
+        # Intentar STARTTLS
+        try:
+            server.starttls()
+            self.logger.debug("STARTTLS activado")
+        except Exception as e:
+            self. logger.debug(f"STARTTLS no disponible: {e}")
+        
+        # Autenticar si hay credenciales
+        if settings. SMTP_USER and settings. SMTP_PASSWORD:
+            try:
+                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+                self.logger.debug("Autenticación exitosa")
+            except Exception as e:
+                self.logger.warning(f"Autenticación falló (continuando sin auth): {e}")
+        
+        return server
+    
+    def _send_pooled(self, msg):
+        """
+        Envía usando una sesión del pool
+        
+        Si la sesión reutilizada se cortó (el servidor cerró la conexión),
+        se descarta y se reintenta una vez con una sesión nueva.
+        """
+        for attempt in (1, 2):
+            conn = self.pool.acquire()
+            try:
+                conn.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                self.pool.release(conn, broken=True)
+                if attempt == 2:
+                    raise
+                self.logger.debug(f"Sesión SMTP caída, reintentando con una nueva: {e}")
+            except smtplib.SMTPResponseException:
+                # El servidor respondió: la sesión sigue sana (RSET la limpia al reutilizarla)
+                self.pool.release(conn)
+                raise
+            except Exception:
+                self.pool.release(conn, broken=True)
+                raise
+            else:
+                self.pool.release(conn, sent=True)
+                return
+    
+    def close(self):
+        """Cierra las sesiones SMTP abiertas"""
+        if self.pool:
+            self.pool.close_all()
     
     def send_email(
         self, 
@@ -19,7 +92,8 @@ class EmailSender:
         body_html: str, 
         body_text: Optional[str] = None,
         in_reply_to: Optional[str] = None,
-        references: Optional[str] = None
+        references: Optional[str] = None,
+        attachments: Optional[List[Dict]] = None
     ) -> bool:
         """
         Envía un correo electrónico con soporte UTF-8 y multi-servidor
@@ -31,14 +105,20 @@ class EmailSender:
             body_text:  Cuerpo en texto plano (opcional)
             in_reply_to: Message-ID del correo original (para respuestas)
             references: Referencias del hilo de conversación
+            attachments: Adjuntos de texto [{filename, content, mimetype}] (opcional)
         
         Returns:
             True si se envió correctamente, False en caso contrario
         """
         try:  
             # Crear mensaje con charset UTF-8
-            msg = MIMEMultipart('alternative')
+            body = msg = MIMEMultipart('alternative')
+            if attachments:
+                # multipart/mixed: cuerpo alternativo + adjuntos
+                msg = MIMEMultipart('mixed')
             msg.set_charset('utf-8')
+            if msg is not body:
+                msg.attach(body)
             
             # Headers
             msg['From'] = f"{settings. SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
@@ -54,48 +134,20 @@ class EmailSender:
             # Agregar cuerpo en texto plano
             if body_text:
                 part_text = MIMEText(body_text, 'plain', 'utf-8')
-                msg.attach(part_text)
+                body.attach(part_text)
             
             # Agregar cuerpo en HTML
             part_html = MIMEText(body_html, 'html', 'utf-8')
-            msg.attach(part_html)
+            body.attach(part_html)
             
-            # Conectar según configuración (SSL, TLS o Plain)
-            if settings.SMTP_USE_SSL:
-                # Modo SSL (puerto 465 - típicamente Gmail)
-                self.logger.debug(f"Conectando vía SSL a {settings.SMTP_HOST}:{settings.SMTP_PORT}")
-                server = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
-                
-                # Autenticar
-                if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                    server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                
-                # Enviar
-                server.send_message(msg)
-                server.quit()
-                
+            for attachment in attachments or []:
+                msg.attach(self._build_attachment(attachment))
+            
+            if self.pool:
+                self._send_pooled(msg)
             else:
-                # Modo Plain/TLS (puerto 25/587 - típicamente Tecnoweb)
-                self.logger. debug(f"Conectando a {settings.SMTP_HOST}:{settings.SMTP_PORT}")
-                server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
-                
-                # Intentar STARTTLS
-                try:
-                    server.starttls()
-                    self.logger.debug("STARTTLS activado")
-                except Exception as e:
-                    self. logger.debug(f"STARTTLS no disponible: {e}")
-                
-                # Autenticar si hay credenciales
-                if settings. SMTP_USER and settings. SMTP_PASSWORD:
-                    try:
-                        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                        self.logger.debug("Autenticación exitosa")
-                    except Exception as e:
-                        self.logger.warning(f"Autenticación falló (continuando sin auth): {e}")
-                
-                # Enviar
-                server. send_message(msg)
+                server = self._open_connection()
+                server.send_message(msg)
                 server.quit()
             
             self.logger.info(f"✅ Correo enviado a {to_email}:  {subject[: 50]}...")
@@ -120,7 +172,8 @@ class EmailSender:
         success: bool, 
         message:  str, 
         data: Optional[dict] = None,
-        in_reply_to:  Optional[str] = None
+        in_reply_to:  Optional[str] = None,
+        attachments: Optional[List[Dict]] = None
     ) -> bool:
         """
         Envía respuesta de comando ejecutado
@@ -132,6 +185,7 @@ class EmailSender:
             message: Mensaje de resultado
             data: Datos de respuesta (opcional)
             in_reply_to: Message-ID del correo original
+            attachments: Adjuntos (p. ej. CSV de "mostrar [todos]")
         
         Returns:
             True si se envió correctamente
@@ -151,9 +205,21 @@ class EmailSender:
             subject=subject,
             body_html=html,
             body_text=text,
-            in_reply_to=in_reply_to
+            in_reply_to=in_reply_to,
+            attachments=attachments
         )
     
+    @staticmethod
+    def _build_attachment(attachment: Dict) -> MIMEBase:
+        """Arma la parte MIME de un adjunto de texto"""
+        maintype, _, subtype = attachment.get('mimetype', 'text/csv').partition('/')
+        part = MIMEBase(maintype, subtype, charset='utf-8')
+        # UTF-8 con BOM para que Excel reconozca las tildes
+        part.set_payload(attachment['content'].encode('utf-8-sig'))
+        encoders.encode_base64(part)
+        part.add_header('Content-Disposition', 'attachment', filename=attachment['filename'])
+        return part
+    
     def _generate_response_html(self, command: str, success: bool, message: str, data: Optional[dict]) -> str:
         """Genera HTML de respuesta con diseño mejorado"""
         color = '#28a745' if success else '#dc3545'
@@ -319,24 +385,24 @@ No responda a este correo.
         if not data: 
             return ''
         
-        if isinstance(data, list) and len(data) > 0:
-            # Lista de registros
-            headers = list(data[0].keys()) if isinstance(data[0], dict) else []
-            
-            if not headers:
+        if isinstance(data, (list, ResultSet)) and len(data) > 0:
+            # Lista de registros: columnas + tuplas
+            if isinstance(data, ResultSet):
+                headers, rows = data.columns, data.rows
+            elif isinstance(data[0], dict):
+                headers = list(data[0].keys())
+                rows = ([row.get(h, "") for h in headers] for row in data)
+            else:
                 return f'<pre>{str(data)}</pre>'
             
             # Generar headers
             headers_html = ''.join([f'<th>{self._escape_html(str(h))}</th>' for h in headers])
             
             # Generar filas
-            rows_html = ''
-            for row in data: 
-                cells = ''. join([
-                    f'<td>{self._escape_html(str(row.get(h, "")))}</td>' 
-                    for h in headers
-                ])
-                rows_html += f'<tr>{cells}</tr>'
+            rows_html = ''.join(
+                '<tr>' + ''.join(f'<td>{self._escape_html(str(value))}</td>' for value in row) + '</tr>'
+                for row in rows
+            )
             
             return f"""
             <h3>📊 Datos ({len(data)} registro{'s' if len(data) != 1 else ''}):</h3>
@@ -372,6 +438,11 @@ No responda a este correo.
         try:
             from tabulate import tabulate
             
+            if isinstance(data, ResultSet) and len(data) > 0:
+                result = f"📊 DATOS ({len(data)} registro{'s' if len(data) != 1 else ''}):\n\n"
+                result += tabulate(data.rows, headers=data.columns, tablefmt='grid')
+                return result
+            
             if isinstance(data, list) and len(data) > 0:
                 result = f"📊 DATOS ({len(data)} registro{'s' if len(data) != 1 else ''}):\n\n"
                 result += tabulate(data, headers='keys', tablefmt='grid')
@@ -0,0 +1,268 @@
+import imaplib
+import logging
+import re
+import select
+import ssl
+import time
+from email.parser import BytesHeaderParser
+from threading import Event
+from typing import Dict, List, Optional
+from config.settings import settings
+from .email_reader import EmailReader
+
+class IMAPEmailReader(EmailReader):
+    """
+    Lee correos usando IMAP con notificaciones push (IDLE)
+
+    Reutiliza el parseo y el registro de correos procesados de EmailReader;
+    los UIDs se guardan como ``imap:<uidvalidity>:<uid>`` para no chocar con
+    los UIDs de POP3.
+    """
+
+    NEW_MAIL_PATTERN = re.compile(rb'^\* \d+ (EXISTS|RECENT)', re.IGNORECASE)
+
+    def __init__(self):
+        super().__init__()
+        self.logger = logging.getLogger('IMAPEmailReader')
+        self.imap = None
+        self.uidvalidity = None
+        self.supports_idle = False
+
+    def connect(self) -> bool:
+        """Conecta al servidor IMAP y selecciona el buzón"""
+        try:
+            self.logger.info(f"🔌 Conectando a {settings.IMAP_HOST}:{settings.IMAP_PORT} (IMAP)...")
+            started = time.perf_counter()
+
+            if settings.IMAP_USE_SSL:
+                self.imap = imaplib.IMAP4_SSL(settings.IMAP_HOST, settings.IMAP_PORT, timeout=30)
+            else:
+                self.imap = imaplib.IMAP4(settings.IMAP_HOST, settings.IMAP_PORT, timeout=30)
+
+            connected = time.perf_counter()
+
+            # Autenticar
+            self.imap.login(settings.IMAP_USER, settings.IMAP_PASSWORD)
+
+            self.last_connect_timings = {
+                'handshake_ms': (connected - started) * 1000,
+                'auth_ms': (time.perf_counter() - connected) * 1000,
+            }
+
+            typ, data = self.imap.select(settings.IMAP_MAILBOX)
+            if typ != 'OK':
+                raise imaplib.IMAP4.error(f"No se pudo seleccionar {settings.IMAP_MAILBOX}: {data}")
+
+            typ, validity = self.imap.response('UIDVALIDITY')
+            self.uidvalidity = validity[0].decode() if validity and validity[0] else '0'
+            self.supports_idle = 'IDLE' in self.imap.capabilities
+
+            self.logger.info(f"✅ Conectado a IMAP: {settings.IMAP_HOST}")
+            self.logger.info(f"📊 Mensajes en {settings.IMAP_MAILBOX}: {data[0].decode() if data and data[0] else 0}, IDLE: {self.supports_idle}")
+
+            return True
+
+        except imaplib.IMAP4.error as e:
+            self.logger.error(f"❌ Error de autenticación IMAP: {e}")
+            self._drop()
+            return False
+
+        except Exception as e:
+            self.logger.error(f"❌ Error conectando a IMAP: {e}")
+            self._drop()
+            return False
+
+    def disconnect(self):
+        """Desconecta del servidor IMAP"""
+        if self.imap:
+            try:
+                self.imap.logout()
+                self.logger.info("🔌 Desconectado de IMAP")
+            except:
+                pass
+            finally:
+                self.imap = None
+
+        self.processed.flush()
+
+    def is_connected(self) -> bool:
+        """Indica si hay una sesión IMAP abierta"""
+        return self.imap is not None
+
+    def ping(self) -> bool:
+        """Verifica que la sesión IMAP siga viva (NOOP)"""
+        if not self.imap:
+            return False
+        try:
+            typ, data = self.imap.noop()
+            return typ == 'OK'
+        except Exception as e:
+            self.logger.debug(f"NOOP falló, la sesión IMAP no está disponible: {e}")
+            return False
+
+    def session_settings(self) -> Dict:
+        """IDLE necesita la sesión abierta entre ciclos"""
+        return {
+            'keep_alive': True,
+            'max_age': settings.IMAP_SESSION_MAX_AGE,
+        }
+
+    def get_new_emails(self) -> List[Dict]:
+        """Obtiene correos nuevos (no procesados) por UID"""
+        try:
+            typ, data = self.imap.uid('SEARCH', None, 'ALL')
+            if typ != 'OK':
+                self.logger.error(f"❌ Error buscando correos IMAP: {data}")
+                return []
+
+            uids = data[0].split() if data and data[0] else []
+            return self._get_new_emails_by_uid([(int(uid), self._uid_key(uid)) for uid in uids])
+
+        except Exception as e:
+            self.logger.error(f"❌ Error obteniendo correos:  {e}", exc_info=True)
+            return []
+
+    def _uid_key(self, uid) -> str:
+        """Clave estable del correo para el registro de procesados"""
+        if isinstance(uid, bytes):
+            uid = uid.decode()
+        return f"imap:{self.uidvalidity}:{uid}"
+
+    def _fetch_headers(self, message_num: int):
+        """Obtiene solo los headers de un correo (sin marcarlo como leído)"""
+        typ, data = self.imap.uid('FETCH', str(message_num), '(BODY.PEEK[HEADER])')
+        return BytesHeaderParser().parsebytes(self._literal(data))
+
+    def _fetch_email(self, message_num: int) -> Optional[Dict]:
+        """Obtiene datos de un correo por UID"""
+        try:
+            typ, data = self.imap.uid('FETCH', str(message_num), '(BODY.PEEK[])')
+            if typ != 'OK':
+                raise imaplib.IMAP4.error(f"FETCH falló: {data}")
+            return self._parse_email(message_num, self._literal(data))
+
+        except Exception as e:
+            self.logger.error(f"❌ Error procesando correo UID {message_num}:  {e}", exc_info=True)
+            return None
+
+    @staticmethod
+    def _literal(data) -> bytes:
+        """Extrae el literal de una respuesta FETCH"""
+        for item in data:
+            if isinstance(item, tuple) and len(item) == 2:
+                return item[1]
+        raise imaplib.IMAP4.error(f"Respuesta FETCH sin contenido: {data}")
+
+    def delete_email(self, message_num: int):
+        """Elimina correo del servidor (¡CUIDADO!)"""
+        if settings.POP3_DELETE_AFTER_READ:
+            try:
+                self.imap.uid('STORE', str(message_num), '+FLAGS', '(\\Deleted)')
+                self.imap.expunge()
+                self.logger.info(f"🗑️ Correo UID {message_num} eliminado del servidor")
+            except Exception as e:
+                self.logger.error(f"❌ Error eliminando correo UID {message_num}: {e}")
+
+    def wait_for_mail(self, timeout: float, stop_event: Event) -> bool:
+        """
+        Espera correo nuevo con IMAP IDLE
+
+        Con IDLE activo el intervalo de polling se reemplaza por
+        IMAP_IDLE_TIMEOUT: el servidor avisa en cuanto llega un mensaje.
+        """
+        if not (settings.IMAP_USE_IDLE and self.supports_idle and self.imap):
+            return super().wait_for_mail(timeout, stop_event)
+
+        try:
+            return self._idle(settings.IMAP_IDLE_TIMEOUT, stop_event)
+        except Exception as e:
+            self.logger.warning(f"⚠️ IDLE interrumpido, se reconectará en el próximo ciclo: {e}")
+            self._drop()
+            return False
+
+    def _idle(self, timeout: float, stop_event: Event) -> bool:
+        """Ejecuta un ciclo IDLE/DONE (RFC 2177)"""
+        # imaplib no implementa IDLE antes de Python 3.14
+        tag = self.imap._new_tag()
+        self.imap.send(tag + b' IDLE\r\n')
+        got_mail = False
+
+        try:
+            while True:
+                line = self._readline()
+                if line.startswith(b'+'):
+                    break
+                if line.startswith(tag):
+                    self.logger.warning(f"⚠️ El servidor rechazó IDLE: {line.strip()}")
+                    self.supports_idle = False
+                    return super().wait_for_mail(timeout, stop_event)
+                got_mail = got_mail or self._is_new_mail(line)
+
+            self.logger.info("👂 Esperando correo nuevo (IMAP IDLE)...")
+            sock = self.imap.socket()
+            deadline = time.monotonic() + timeout
+
+            while not got_mail and not stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                # Revisar cada segundo para atender pedidos de detención
+                if not self._buffered(sock):
+                    readable, _, _ = select.select([sock], [], [], min(remaining, 1.0))
+                    if not readable:
+                        continue
+
+                got_mail = self._is_new_mail(self._readline())
+
+            self.imap.send(b'DONE\r\n')
+            while True:
+                line = self._readline()
+                if line.startswith(tag):
+                    break
+                got_mail = got_mail or self._is_new_mail(line)
+
+        finally:
+            self.imap.tagged_commands.pop(tag, None)
+
+        if got_mail:
+            self.logger.info("📨 El servidor notificó correo nuevo")
+        return got_mail
+
+    def _readline(self) -> bytes:
+        """Lee una línea de la conexión IMAP"""
+        line = self.imap.readline()
+        if not line:
+            raise imaplib.IMAP4.abort('conexión cerrada por el servidor')
+        return line
+
+    def _is_new_mail(self, line: bytes) -> bool:
+        """Indica si una respuesta sin tag anuncia correo nuevo"""
+        return bool(self.NEW_MAIL_PATTERN.match(line))
+
+    def _buffered(self, sock) -> bool:
+        """
+        Indica si hay datos listos para leer sin esperar al socket
+
+        imaplib lee a través de un archivo con buffer (``self.imap.file``):
+        una respuesta que llegó en el mismo paquete que "+ idling" ya está
+        en ese buffer (o en el de SSL) y select no la ve. ``peek`` con el
+        socket en modo no bloqueante entrega lo que haya sin esperar.
+        """
+        timeout = sock.gettimeout()
+        sock.settimeout(0)
+        try:
+            return bool(self.imap.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+    def _drop(self):
+        """Descarta la conexión actual sin LOGOUT"""
+        if self.imap:
+            try:
+                self.imap.shutdown()
+            except:
+                pass
+        self.imap = None
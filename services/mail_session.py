@@ -0,0 +1,128 @@
+import logging
+import time
+from typing import Dict, Optional
+from config.settings import settings
+
+class MailSessionManager:
+    """
+    Administra la sesión de la fuente de correo entre ciclos del daemon
+
+    - Reutiliza la sesión abierta si sigue viva (NOOP) y no superó su edad máxima
+    - Reconecta con backoff exponencial cuando la conexión falla
+    - Registra métricas de latencia de handshake y autenticación
+
+    Nota: en POP3 el buzón es una foto tomada al iniciar sesión, por lo que
+    muchos servidores solo muestran correo nuevo tras reconectar. La edad
+    máxima de la sesión acota ese retraso. Las eliminaciones (DELE) solo se
+    confirman con QUIT, así que si hay eliminaciones pendientes la sesión se
+    cierra al liberar.
+    """
+
+    def __init__(
+        self,
+        source,
+        keep_alive: Optional[bool] = None,
+        max_age: Optional[float] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None
+    ):
+        self.logger = logging.getLogger('MailSession')
+        self.source = source
+
+        defaults = source.session_settings()
+        self.keep_alive = defaults['keep_alive'] if keep_alive is None else keep_alive
+        self.max_age = defaults['max_age'] if max_age is None else max_age
+        self.backoff_base = settings.POP3_RECONNECT_BACKOFF if backoff_base is None else backoff_base
+        self.backoff_max = settings.POP3_RECONNECT_BACKOFF_MAX if backoff_max is None else backoff_max
+
+        self.connected_at = None
+        self.consecutive_failures = 0
+        self.next_attempt_at = 0.0
+
+        self.connects = 0
+        self.reuses = 0
+        self.failures = 0
+        self.handshake_ms_total = 0.0
+        self.auth_ms_total = 0.0
+        self.last_timings = {}
+
+    def acquire(self) -> bool:
+        """
+        Obtiene una sesión lista para usar
+
+        Returns:
+            True si hay sesión disponible, False si falló o se está esperando el backoff
+        """
+        now = time.monotonic()
+
+        if self._session_reusable(now):
+            if self.source.ping():
+                self.reuses += 1
+                self.logger.info("♻️ Reutilizando sesión de correo existente")
+                return True
+            self.logger.info("⚠️ Sesión de correo caída, reconectando...")
+
+        self._close()
+
+        if now < self.next_attempt_at:
+            wait = self.next_attempt_at - now
+            self.logger.warning(f"⏳ Reintento de conexión en {wait:.0f}s (backoff)")
+            return False
+
+        if not self.source.connect():
+            self.failures += 1
+            self.consecutive_failures += 1
+            delay = min(self.backoff_base * (2 ** (self.consecutive_failures - 1)), self.backoff_max)
+            self.next_attempt_at = time.monotonic() + delay
+            self.logger.warning(f"⏳ Próximo intento de conexión en {delay:.0f}s")
+            return False
+
+        self.connects += 1
+        self.consecutive_failures = 0
+        self.next_attempt_at = 0.0
+        self.connected_at = time.monotonic()
+
+        self.last_timings = dict(self.source.last_connect_timings or {})
+        self.handshake_ms_total += self.last_timings.get('handshake_ms', 0.0)
+        self.auth_ms_total += self.last_timings.get('auth_ms', 0.0)
+
+        return True
+
+    def release(self, force: bool = False):
+        """
+        Libera la sesión al terminar un ciclo
+
+        Args:
+            force: Cerrar siempre (por ejemplo, tras un error en el ciclo)
+        """
+        if force or not self.keep_alive or self.source.pending_deletions:
+            self._close()
+
+    def close(self):
+        """Cierra la sesión definitivamente"""
+        self._close()
+
+    def get_metrics(self) -> Dict:
+        """Retorna métricas de conexión de la sesión"""
+        return {
+            'connects': self.connects,
+            'reuses': self.reuses,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_handshake_ms': self.last_timings.get('handshake_ms'),
+            'last_auth_ms': self.last_timings.get('auth_ms'),
+            'avg_handshake_ms': self.handshake_ms_total / self.connects if self.connects else None,
+            'avg_auth_ms': self.auth_ms_total / self.connects if self.connects else None,
+        }
+
+    def _session_reusable(self, now: float) -> bool:
+        """Indica si la sesión actual puede reutilizarse"""
+        if not self.keep_alive or self.connected_at is None or not self.source.is_connected():
+            return False
+        return (now - self.connected_at) < self.max_age
+
+    def _close(self):
+        """Cierra la sesión actual si existe"""
+        if self.source.is_connected():
+            self.source.disconnect()
+        self.connected_at = None
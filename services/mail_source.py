@@ -0,0 +1,89 @@
+from abc import ABC, abstractmethod
+from threading import Event
+from typing import Dict, List
+from config.settings import settings
+
+class MailSource(ABC):
+    """
+    Interfaz de las fuentes de correo que consume el daemon
+
+    Cada implementación (POP3, IMAP) entrega los correos nuevos con el mismo
+    formato de diccionario que produce EmailReader.
+    """
+
+    # Eliminaciones que se confirman recién al cerrar la sesión
+    pending_deletions = 0
+
+    # Latencias de la última conexión: {'handshake_ms': float, 'auth_ms': float}
+    last_connect_timings: Dict = {}
+
+    @abstractmethod
+    def connect(self) -> bool:
+        """Abre la sesión con el servidor"""
+        pass
+
+    @abstractmethod
+    def disconnect(self):
+        """Cierra la sesión con el servidor"""
+        pass
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Indica si hay una sesión abierta"""
+        pass
+
+    @abstractmethod
+    def ping(self) -> bool:
+        """Verifica que la sesión siga viva"""
+        pass
+
+    @abstractmethod
+    def get_new_emails(self) -> List[Dict]:
+        """Obtiene los correos que aún no fueron procesados"""
+        pass
+
+    @abstractmethod
+    def mark_as_processed(self, email_data: dict):
+        """Marca un correo como procesado"""
+        pass
+
+    @abstractmethod
+    def delete_email(self, message_num):
+        """Elimina un correo del servidor (índice según la fuente)"""
+        pass
+
+    def session_settings(self) -> Dict:
+        """Configuración por defecto para MailSessionManager"""
+        return {
+            'keep_alive': settings.POP3_KEEP_ALIVE,
+            'max_age': settings.POP3_SESSION_MAX_AGE,
+        }
+
+    def wait_for_mail(self, timeout: float, stop_event: Event) -> bool:
+        """
+        Espera hasta que llegue correo, se cumpla el timeout o se pida detener
+
+        La implementación base solo espera (polling); las fuentes con push
+        (IMAP IDLE) retornan apenas el servidor avisa de un correo nuevo.
+
+        Returns:
+            True si se despertó por correo nuevo
+        """
+        stop_event.wait(timeout)
+        return False
+
+
+def create_mail_source() -> MailSource:
+    """Crea la fuente de correo según MAIL_SOURCE"""
+    source = settings.MAIL_SOURCE
+
+    if source == 'pop3':
+        from .email_reader import EmailReader
+        return EmailReader()
+
+    elif source == 'imap':
+        from .imap_reader import IMAPEmailReader
+        return IMAPEmailReader()
+
+    else:
+        raise ValueError(f"MAIL_SOURCE inválido: {source}. Use 'pop3' o 'imap'")
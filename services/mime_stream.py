@@ -0,0 +1,324 @@
+import binascii
+import io
+import poplib
+import tempfile
+from email.feedparser import BytesFeedParser
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import Iterable, Iterator, List, Optional, Tuple
+from config.settings import settings
+
+# Tipos MIME con los que los clientes de correo envían un CSV
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv', 'text/comma-separated-values')
+
+
+def is_csv_attachment(headers: Message) -> bool:
+    """Indica si una parte es un CSV (por tipo MIME o extensión del archivo)"""
+    filename = headers.get_filename() or ''
+    return filename.lower().endswith('.csv') or headers.get_content_type() in CSV_CONTENT_TYPES
+
+
+class CsvAttachment:
+    """
+    Adjunto CSV decodificado en un archivo temporal
+    
+    El contenido queda en memoria hasta ``max_memory`` bytes y luego pasa a
+    disco (SpooledTemporaryFile). Más allá de ``max_bytes`` se deja de
+    escribir y se marca como truncado.
+    """
+    
+    def __init__(self, filename: str, charset: Optional[str], max_bytes: int, max_memory: int):
+        self.filename = filename
+        self.charset = charset
+        self.max_bytes = max_bytes
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self.size = 0
+        self.truncated = False
+    
+    def write(self, data: bytes):
+        if self.truncated or not data:
+            return
+        if self.size + len(data) > self.max_bytes:
+            self.truncated = True
+            return
+        self.file.write(data)
+        self.size += len(data)
+    
+    def open_binary(self):
+        """Archivo binario posicionado al inicio"""
+        self.file.seek(0)
+        return self.file
+    
+    def close(self):
+        self.file.close()
+    
+    def __repr__(self):
+        return f"CsvAttachment({self.filename!r}, {self.size} bytes{', truncado' if self.truncated else ''})"
+
+
+class _PartDecoder:
+    """
+    Decodifica en streaming el cuerpo de una parte hacia un CsvAttachment
+    
+    Base64 se decodifica por bloques de 4 caracteres y quoted-printable por
+    línea (respetando los saltos suaves ``=``). El salto de línea previo a
+    un delimitador pertenece al delimitador, por eso cada salto se escribe
+    recién al llegar la línea siguiente.
+    """
+    
+    def __init__(self, encoding: str, attachment: CsvAttachment):
+        self.encoding = encoding
+        self.attachment = attachment
+        self._pending = b''
+        self._newline = False
+    
+    def feed(self, line: bytes):
+        if self.encoding == 'base64':
+            self._pending += b''.join(line.split())
+            usable = len(self._pending) - len(self._pending) % 4
+            if usable:
+                self._write_base64(self._pending[:usable])
+                self._pending = self._pending[usable:]
+            return
+        
+        if self._newline:
+            self.attachment.write(b'\r\n')
+        
+        if self.encoding == 'quoted-printable':
+            soft_break = line.endswith(b'=')
+            self.attachment.write(binascii.a2b_qp(line[:-1] if soft_break else line))
+            self._newline = not soft_break
+        else:
+            self.attachment.write(line)
+            self._newline = True
+    
+    def close(self) -> CsvAttachment:
+        if self._pending:
+            self._write_base64(self._pending + b'=' * (-len(self._pending) % 4))
+        return self.attachment
+    
+    def _write_base64(self, data: bytes):
+        try:
+            self.attachment.write(binascii.a2b_base64(data))
+        except binascii.Error:
+            # Base64 corrupto: se descarta el resto de la parte
+            self.attachment.truncated = True
+
+class StreamingMessageBuilder:
+    """
+    Arma un Message alimentando el correo línea por línea
+
+    Una máquina de estados sigue los límites MIME (boundaries) y decide, al
+    terminar los headers de cada parte, si su contenido se pasa al parser:
+
+    - Se conservan siempre los headers de todas las partes.
+    - Se conserva el cuerpo de la primera parte text/plain y de las text/html
+      anteriores a ella (fallback si no hay texto plano).
+    - Los adjuntos y cualquier cuerpo posterior al primer text/plain se
+      descartan sin decodificar: la memoria usada no depende del tamaño de
+      los adjuntos.
+    - Con ``keep_csv`` los adjuntos CSV se decodifican a archivos temporales
+      (``attachments``) en lugar de descartarse.
+    """
+
+    def __init__(self, keep_csv: bool = False):
+        self._parser = BytesFeedParser()
+        self._boundaries = []       # delimitadores activos (b'--' + boundary), del externo al interno
+        self._in_headers = True
+        self._header_lines = []
+        self._keep_body = True
+        self._found_plain = False
+        self._decoder = None
+        self.keep_csv = keep_csv
+        self.attachments = []       # CsvAttachment de los adjuntos CSV (con keep_csv)
+        self.skipped_bytes = 0
+
+    def feed_line(self, line: bytes):
+        """Procesa una línea del correo (sin CRLF)"""
+        if self._in_headers:
+            self._feed(line)
+            if line.strip():
+                self._header_lines.append(line)
+            else:
+                self._start_body()
+            return
+
+        if self._boundaries and line.startswith(b'--'):
+            marker = line.rstrip(b' \t')
+            for depth in range(len(self._boundaries) - 1, -1, -1):
+                boundary = self._boundaries[depth]
+                if marker == boundary:
+                    # Nueva parte: los multipart internos sin cerrar terminan aquí
+                    self._end_part()
+                    del self._boundaries[depth + 1:]
+                    self._feed(line)
+                    self._in_headers = True
+                    self._header_lines = []
+                    return
+                if marker == boundary + b'--':
+                    # Fin del multipart: lo que sigue es epílogo del padre
+                    self._end_part()
+                    del self._boundaries[depth:]
+                    self._feed(line)
+                    self._keep_body = True
+                    return
+
+        if self._decoder:
+            self._decoder.feed(line)
+        elif self._keep_body:
+            self._feed(line)
+        else:
+            self.skipped_bytes += len(line) + 2
+
+    def feed_lines(self, lines: Iterable[bytes]) -> 'StreamingMessageBuilder':
+        for line in lines:
+            self.feed_line(line)
+        return self
+
+    def close(self) -> Message:
+        """Termina el parseo y retorna el mensaje"""
+        self._end_part()
+        return self._parser.close()
+
+    def discard(self):
+        """Cierra los adjuntos CSV ya creados (el parseo falló o se abandonó)"""
+        if self._decoder:
+            self._decoder.attachment.close()
+            self._decoder = None
+        for attachment in self.attachments:
+            attachment.close()
+        self.attachments = []
+
+    def _start_body(self):
+        """Fin de los headers de una parte: decidir qué hacer con su cuerpo"""
+        self._in_headers = False
+        headers = BytesHeaderParser().parsebytes(b'\r\n'.join(self._header_lines) + b'\r\n\r\n')
+        self._header_lines = []
+
+        if headers.get_content_maintype() == 'multipart':
+            boundary = headers.get_boundary()
+            if boundary:
+                self._boundaries.append(b'--' + boundary.encode('utf-8', errors='replace'))
+            # Preámbulo: corto y sin contenido útil, se conserva para el parser
+            self._keep_body = True
+            return
+
+        if self.keep_csv and is_csv_attachment(headers):
+            # El CSV se decodifica a un archivo temporal, no pasa por el parser
+            attachment = CsvAttachment(
+                headers.get_filename() or 'adjunto.csv',
+                headers.get_content_charset(),
+                settings.CSV_IMPORT_MAX_BYTES,
+                settings.CSV_IMPORT_SPOOL_MEMORY
+            )
+            encoding = str(headers.get('Content-Transfer-Encoding', '')).strip().lower()
+            self._decoder = _PartDecoder(encoding, attachment)
+            self._keep_body = False
+            return
+        
+        self._keep_body = self._wants_body(headers)
+        if self._keep_body and headers.get_content_type() == 'text/plain':
+            self._found_plain = True
+    
+    def _end_part(self):
+        """Cierra el adjunto CSV en curso (si lo hay)"""
+        if self._decoder:
+            self.attachments.append(self._decoder.close())
+            self._decoder = None
+
+    def _wants_body(self, headers: Message) -> bool:
+        """Indica si el cuerpo de una parte (no multipart) debe conservarse"""
+        if self._found_plain:
+            return False
+        if 'attachment' in str(headers.get('Content-Disposition', '')).lower():
+            return False
+        return headers.get_content_type() in ('text/plain', 'text/html')
+
+    def _feed(self, line: bytes):
+        self._parser.feed(line + b'\r\n')
+
+
+def parse_message_lines(lines: Iterable[bytes]) -> Message:
+    """Parsea un correo a partir de sus líneas, descartando adjuntos"""
+    return StreamingMessageBuilder().feed_lines(lines).close()
+
+
+def extract_csv_attachments(message: Message) -> List[CsvAttachment]:
+    """Copia los adjuntos CSV de un mensaje ya parseado completo a archivos temporales"""
+    attachments = []
+    for part in message.walk():
+        if part.is_multipart() or not is_csv_attachment(part):
+            continue
+        attachment = CsvAttachment(
+            part.get_filename() or 'adjunto.csv',
+            part.get_content_charset(),
+            settings.CSV_IMPORT_MAX_BYTES,
+            settings.CSV_IMPORT_SPOOL_MEMORY
+        )
+        attachment.write(part.get_payload(decode=True) or b'')
+        attachments.append(attachment)
+    return attachments
+
+
+def parse_message_with_csv(lines: Iterable[bytes]) -> Tuple[Message, List[CsvAttachment]]:
+    """Parsea un correo a partir de sus líneas conservando los adjuntos CSV"""
+    builder = StreamingMessageBuilder(keep_csv=True)
+    try:
+        builder.feed_lines(lines)
+        return builder.close(), builder.attachments
+    except Exception:
+        # Sin esto cada reintento de un correo que falla deja archivos temporales abiertos
+        builder.discard()
+        raise
+
+
+def close_attachments(email_data: dict):
+    """Libera los archivos temporales de los adjuntos CSV de un correo"""
+    for attachment in email_data.get('attachments') or []:
+        attachment.close()
+
+
+def parse_message_bytes(data: bytes) -> Message:
+    """Parsea un correo en memoria (p. ej. un literal IMAP), descartando adjuntos"""
+    return parse_message_lines(split_lines(data))
+
+
+def split_lines(data: bytes) -> Iterator[bytes]:
+    """Recorre las líneas de un buffer sin copiarlo entero en una lista"""
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b'\n', start)
+        if end == -1:
+            yield data[start:]
+            return
+        line_end = end - 1 if end > start and data[end - 1] == 0x0d else end
+        yield data[start:line_end]
+        start = end + 1
+
+
+def retr_lines(pop3: poplib.POP3, which: int) -> Iterator[bytes]:
+    """
+    RETR en streaming: entrega las líneas a medida que llegan
+
+    ``poplib.POP3.retr`` acumula todo el mensaje en una lista; aquí se leen
+    las líneas con los métodos internos de poplib y se quita el
+    dot-stuffing (RFC 1939) igual que ``_getlongresp``. Si se cierra antes
+    de terminar (``close()``, p. ej. porque falló el parseo) se lee el resto
+    de la respuesta hasta el "." final para dejar la sesión sincronizada.
+    """
+    pop3._putcmd(f'RETR {which}')
+    pop3._getresp()
+
+    try:
+        while True:
+            line, _ = pop3._getline()
+            if line == b'.':
+                return
+            if line.startswith(b'..'):
+                line = line[1:]
+            yield line
+    except GeneratorExit:
+        while pop3._getline()[0] != b'.':
+            pass
+        raise
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional, Tuple
+from config.rows import to_serializable
+from config.settings import settings
+
+class OutboundQueue:
+    """
+    Cola persistente de respuestas por enviar (SQLite en data/)
+
+    Cada respuesta se identifica con el Message-ID del correo que la originó:
+    encolar dos veces la misma clave no genera un segundo envío, y un correo
+    cuya respuesta ya está en la cola no necesita volver a ejecutarse.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbound (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbound_due ON outbound (status, next_attempt_at);
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None
+    ):
+        self.logger = logging.getLogger('OutboundQueue')
+        self.path = path or settings.OUTBOUND_QUEUE_FILE
+        self.max_attempts = settings.OUTBOUND_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.backoff_base = settings.OUTBOUND_RETRY_BACKOFF if backoff_base is None else backoff_base
+        self.backoff_max = settings.OUTBOUND_RETRY_BACKOFF_MAX if backoff_max is None else backoff_max
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Una sola conexión compartida por los workers y el hilo de envío
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+
+    def enqueue(self, key: str, payload: Dict) -> bool:
+        """
+        Agrega una respuesta a la cola
+
+        Returns:
+            True si se encoló, False si ya existía una respuesta con esa clave
+        """
+        now = time.time()
+        data = json.dumps(payload, default=to_serializable, ensure_ascii=False)
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbound (idempotency_key, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, data, now, now)
+            )
+            return cursor.rowcount == 1
+
+    def contains(self, key: str) -> bool:
+        """Indica si ya hay una respuesta (pendiente, enviada o fallida) para la clave"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outbound WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def fetch_due(self, limit: int) -> List[Tuple[int, Dict, int]]:
+        """Obtiene hasta ``limit`` respuestas listas para enviar: (id, payload, intentos)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM outbound "
+                "WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+        return [(row_id, json.loads(payload), attempts) for row_id, payload, attempts in rows]
+
+    def mark_sent(self, row_id: int):
+        """Marca una respuesta como enviada"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbound SET status = 'sent', attempts = attempts + 1, sent_at = ?, last_error = NULL "
+                "WHERE id = ?",
+                (time.time(), row_id)
+            )
+
+    def mark_failed(self, row_id: int, attempts: int, error: str) -> bool:
+        """
+        Registra un intento fallido y programa el reintento con backoff exponencial
+
+        Returns:
+            True si se agotaron los intentos y la respuesta quedó como 'failed'
+        """
+        attempts += 1
+        exhausted = attempts >= self.max_attempts
+        delay = min(self.backoff_base * (2 ** (attempts - 1)), self.backoff_max)
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbound SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+                "WHERE id = ?",
+                ('failed' if exhausted else 'pending', attempts, time.time() + delay, error, row_id)
+            )
+        return exhausted
+
+    def prune(self, max_age: float) -> int:
+        """Elimina respuestas enviadas hace más de ``max_age`` segundos"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbound WHERE status = 'sent' AND sent_at < ?",
+                (time.time() - max_age,)
+            )
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict:
+        """Retorna cantidad de respuestas por estado"""
+        stats = {'pending': 0, 'sent': 0, 'failed': 0}
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbound GROUP BY status").fetchall()
+        stats.update(dict(rows))
+        return stats
+
+    def close(self):
+        """Cierra la base de datos de la cola"""
+        with self._lock:
+            self._conn.close()
+
+
+class OutboundSender(Thread):
+    """
+    Hilo que vacía la cola de respuestas en lotes
+
+    Los workers solo encolan; este hilo hace el envío SMTP, así la latencia
+    del servidor de salida no frena el procesamiento de comandos.
+    """
+
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, queue: OutboundQueue, email_sender, batch_size: Optional[int] = None, poll_interval: Optional[float] = None):
+        super().__init__(name='OutboundSender', daemon=True)
+        self.logger = logging.getLogger('OutboundSender')
+        self.queue = queue
+        self.email_sender = email_sender
+        self.batch_size = settings.OUTBOUND_BATCH_SIZE if batch_size is None else batch_size
+        self.poll_interval = settings.OUTBOUND_POLL_INTERVAL if poll_interval is None else poll_interval
+
+        self._wake = Event()
+        self._stop_event = Event()
+        self._last_prune = 0
+
+        self.sent_count = 0
+        self.failed_count = 0
+
+    def notify(self):
+        """Avisa que hay respuestas nuevas en la cola"""
+        self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            # Limpiar antes de leer la cola para no perder avisos durante el envío
+            self._wake.clear()
+            try:
+                sent = self.drain_once()
+                self._maybe_prune()
+            except Exception as e:
+                self.logger.error(f"❌ Error vaciando la cola de salida: {e}", exc_info=True)
+                sent = 0
+
+            # Si el lote vino lleno puede haber más pendientes: seguir sin esperar
+            if sent < self.batch_size:
+                self._wake.wait(self.poll_interval)
+
+    def drain_once(self) -> int:
+        """Envía un lote de respuestas pendientes; retorna cuántas se intentaron"""
+        batch = self.queue.fetch_due(self.batch_size)
+
+        for row_id, payload, attempts in batch:
+            try:
+                sent = self.email_sender.send_command_response(**payload)
+                error = None if sent else 'send_command_response retornó False'
+            except Exception as e:
+                sent = False
+                error = str(e)
+
+            if sent:
+                self.queue.mark_sent(row_id)
+                self.sent_count += 1
+                self.logger.info(f"✅ Respuesta enviada a {payload.get('to_email')}")
+            elif self.queue.mark_failed(row_id, attempts, error):
+                self.failed_count += 1
+                self.logger.error(f"❌ Respuesta a {payload.get('to_email')} descartada tras {attempts + 1} intentos: {error}")
+            else:
+                self.logger.warning(f"⚠️ Envío a {payload.get('to_email')} falló (intento {attempts + 1}), se reintentará: {error}")
+
+        return len(batch)
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = None):
+        """
+        Detiene el hilo; con ``drain`` intenta enviar lo que quede pendiente
+
+        Si el hilo sigue vivo tras ``timeout`` (p. ej. en medio de un envío)
+        no se vacía la cola desde aquí: dos hilos tomarían las mismas filas.
+        Lo pendiente se envía en el próximo inicio.
+        """
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+            if self.is_alive():
+                self.logger.warning("⚠️ El envío en curso no terminó a tiempo; las respuestas pendientes quedan en la cola")
+                return
+
+        if drain:
+            while self.drain_once() == self.batch_size:
+                pass
+
+    def _maybe_prune(self):
+        """Limpia periódicamente las respuestas ya enviadas"""
+        now = time.monotonic()
+        if now - self._last_prune >= self.PRUNE_INTERVAL:
+            self._last_prune = now
+            removed = self.queue.prune(settings.OUTBOUND_RETENTION_DAYS * 86400)
+            if removed:
+                self.logger.info(f"🧹 {removed} respuesta(s) enviada(s) eliminadas de la cola")
@@ -0,0 +1,232 @@
+import logging
+import os
+from collections import OrderedDict
+from threading import RLock
+from typing import Optional
+from config.settings import settings
+from .bloom_filter import BloomFilter
+
+class ProcessedStore:
+    """
+    Registro de correos procesados (log de solo-agregado con compactación)
+
+    En memoria es un OrderedDict ``hash -> uid`` en orden de inserción, así
+    consultar y marcar son O(1) y al superar ``max_entries`` se descartan los
+    más antiguos. En disco cada marca agrega una línea ``hash`` o
+    ``hash<TAB>uid`` (el mismo formato del archivo anterior); cuando el log
+    crece más de ``compact_ratio`` veces el máximo se reescribe de forma
+    atómica con las entradas vigentes.
+
+    Los hashes que salen de la ventana exacta quedan en un filtro de Bloom
+    (``<archivo>.bloom``) para detectar duplicados por años con unos pocos
+    MB. El filtro se guarda antes de cada compactación: todo hash marcado
+    está en el filtro guardado o en el log, que se reproduce al cargar.
+
+    Los UIDs no siguen la ventana: un buzón que conserva más correos que
+    ``max_entries`` volvería a descargar los que quedan fuera. Se guardan
+    mientras el servidor los liste y se olvidan con ``retain_uids``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        fsync_every: Optional[int] = None,
+        compact_ratio: int = 2,
+        bloom_capacity: Optional[int] = None,
+        bloom_error_rate: Optional[float] = None
+    ):
+        self.logger = logging.getLogger('ProcessedStore')
+        self.path = path or settings.PROCESSED_EMAILS_FILE
+        self.max_entries = settings.MAX_PROCESSED_HISTORY if max_entries is None else max_entries
+        self.fsync_every = settings.PROCESSED_FSYNC_EVERY if fsync_every is None else fsync_every
+        self.compact_ratio = compact_ratio
+
+        self._lock = RLock()
+        self._entries = OrderedDict()   # hash -> uid (o None)
+        self._by_uid = {}               # uid -> hash (también de hashes fuera de la ventana)
+        self._log_lines = 0
+        self._unsynced = 0
+        self._file = None
+        self._unterminated = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.bloom_path = f"{self.path}.bloom"
+        self._bloom = self._load_bloom(
+            settings.PROCESSED_BLOOM_CAPACITY if bloom_capacity is None else bloom_capacity,
+            settings.PROCESSED_BLOOM_ERROR_RATE if bloom_error_rate is None else bloom_error_rate
+        )
+
+        self._load()
+
+        # El archivo de versiones anteriores no termina en salto de línea
+        if self._unterminated or self._log_lines > self._compact_limit():
+            self.compact()
+        else:
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def __contains__(self, email_hash: str) -> bool:
+        if email_hash in self._entries:
+            return True
+        return self._bloom is not None and email_hash in self._bloom
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def has_uid(self, uid: str) -> bool:
+        """Indica si el UID corresponde a un correo ya procesado"""
+        return uid in self._by_uid
+
+    def add(self, email_hash: str, uid: Optional[str] = None):
+        """Marca un correo como procesado (y asocia su UID si se conoce)"""
+        with self._lock:
+            if email_hash in self._entries and (not uid or self._entries[email_hash] == uid):
+                return
+
+            self._put(email_hash, uid)
+            self._append(email_hash, uid)
+            self._evict()
+
+            if self._bloom is not None:
+                self._bloom.add(email_hash)
+
+            if self._log_lines > self._compact_limit():
+                self.compact()
+
+    def retain_uids(self, uids):
+        """
+        Olvida los UIDs que ya no están en el servidor
+
+        Args:
+            uids: Todos los UIDs del listado actual del buzón (UIDL / UID SEARCH)
+        """
+        with self._lock:
+            gone = [uid for uid in self._by_uid if uid not in uids]
+            for uid in gone:
+                email_hash = self._by_uid.pop(uid)
+                if self._entries.get(email_hash) == uid:
+                    self._entries[email_hash] = None
+
+    def flush(self):
+        """Fuerza a disco (fsync) las marcas pendientes"""
+        with self._lock:
+            if self._file and self._unsynced:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def compact(self):
+        """Reescribe el log solo con las entradas vigentes (reemplazo atómico)"""
+        with self._lock:
+            # Los hashes descartados de la ventana solo sobreviven en el filtro
+            if self._bloom is not None:
+                self._bloom.save(self.bloom_path)
+                if self._bloom.is_saturated():
+                    self.logger.warning(
+                        f"⚠️ El filtro de procesados superó su capacidad ({self._bloom.capacity}); "
+                        f"aumentar PROCESSED_BLOOM_CAPACITY"
+                    )
+
+            if self._file:
+                self._file.close()
+
+            tmp_path = f"{self.path}.tmp"
+            lines = 0
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                # Primero los UIDs de hashes fuera de la ventana: al cargar se
+                # descartan de la ventana antes que las entradas vigentes
+                for uid, email_hash in self._by_uid.items():
+                    if email_hash not in self._entries:
+                        f.write(self._format(email_hash, uid))
+                        lines += 1
+                for email_hash, uid in self._entries.items():
+                    f.write(self._format(email_hash, uid))
+                    lines += 1
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            self._log_lines = lines
+            self._unsynced = 0
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self.logger.debug(f"Registro de procesados compactado: {self._log_lines} entradas")
+
+    def close(self):
+        """Guarda lo pendiente y cierra el archivo"""
+        with self._lock:
+            if self._file:
+                self.flush()
+                self._file.close()
+                self._file = None
+
+    def _load(self):
+        """Reproduce el log en orden; la última aparición de un hash es la vigente"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                self._unterminated = not line.endswith('\n')
+                email_hash, _, uid = line.strip().partition('\t')
+                if not email_hash:
+                    continue
+                self._log_lines += 1
+                self._put(email_hash, uid or None)
+                if self._bloom is not None:
+                    self._bloom.add(email_hash)
+
+        self._evict()
+
+    def _load_bloom(self, capacity: int, error_rate: float) -> Optional[BloomFilter]:
+        """Carga el filtro guardado o crea uno vacío (capacidad 0 lo desactiva)"""
+        if capacity <= 0:
+            return None
+
+        if os.path.exists(self.bloom_path):
+            try:
+                bloom = BloomFilter.load(self.bloom_path)
+                if (bloom.capacity, bloom.error_rate) == (capacity, error_rate):
+                    return bloom
+                self.logger.warning("⚠️ Cambió la configuración del filtro de procesados, se crea uno nuevo")
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"⚠️ No se pudo cargar el filtro de procesados, se crea uno nuevo: {e}")
+
+        return BloomFilter(capacity, error_rate)
+
+    def _put(self, email_hash: str, uid: Optional[str]):
+        """Inserta (o renueva) una entrada en memoria"""
+        previous = self._entries.pop(email_hash, None)
+        if previous and not uid:
+            uid = previous
+        elif previous and previous != uid:
+            self._by_uid.pop(previous, None)
+
+        self._entries[email_hash] = uid
+        if uid:
+            self._by_uid[uid] = email_hash
+
+    def _append(self, email_hash: str, uid: Optional[str]):
+        """Agrega la marca al log; el fsync se hace cada ``fsync_every`` marcas"""
+        self._file.write(self._format(email_hash, uid))
+        self._file.flush()
+        self._log_lines += 1
+        self._unsynced += 1
+
+        if self._unsynced >= self.fsync_every:
+            self.flush()
+
+    def _evict(self):
+        """Descarta las entradas más antiguas por encima del máximo (sus UIDs se conservan)"""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _compact_limit(self) -> int:
+        """Líneas del log a partir de las cuales se compacta"""
+        return (self.max_entries + len(self._by_uid)) * self.compact_ratio
+
+    @staticmethod
+    def _format(email_hash: str, uid: Optional[str]) -> str:
+        return f"{email_hash}\t{uid}\n" if uid else f"{email_hash}\n"
@@ -0,0 +1,151 @@
+import logging
+import smtplib
+import time
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from typing import Callable, Dict, Optional
+from config.settings import settings
+
+class SMTPConnectionPool:
+    """
+    Pool de sesiones SMTP autenticadas
+
+    Mantiene abiertas hasta ``max_size`` conexiones y las reutiliza entre
+    envíos. Antes de reutilizar una conexión se verifica con RSET (que además
+    limpia cualquier transacción a medias); si no responde 250 se descarta y
+    se abre otra. Las conexiones ociosas por más de ``idle_timeout`` segundos
+    o que ya enviaron ``max_messages`` correos se cierran.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], smtplib.SMTP],
+        max_size: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        max_messages: Optional[int] = None,
+        acquire_timeout: float = 60
+    ):
+        self.logger = logging.getLogger('SMTPPool')
+        self.factory = factory
+        self.max_size = settings.SMTP_POOL_SIZE if max_size is None else max_size
+        self.idle_timeout = settings.SMTP_POOL_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.max_messages = settings.SMTP_POOL_MAX_MESSAGES if max_messages is None else max_messages
+        self.acquire_timeout = acquire_timeout
+
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(self.max_size)
+        self._idle = []        # [(conexión, último uso)]
+        self._sent = {}        # id(conexión) -> correos enviados
+
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self) -> smtplib.SMTP:
+        """Obtiene una conexión lista para enviar (reutilizada o nueva)"""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise smtplib.SMTPException("Pool SMTP agotado: no hay conexiones disponibles")
+
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, last_used = self._idle.pop()
+
+                if time.monotonic() - last_used > self.idle_timeout:
+                    self._discard(conn, "ociosa demasiado tiempo")
+                    continue
+
+                if self._is_alive(conn):
+                    with self._lock:
+                        self.reused += 1
+                    return conn
+
+                self._discard(conn, "no respondió a RSET")
+
+            conn = self.factory()
+            with self._lock:
+                self.created += 1
+                self._sent[id(conn)] = 0
+            return conn
+
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False, sent: bool = False):
+        """
+        Devuelve una conexión al pool
+
+        Args:
+            conn: Conexión obtenida con acquire()
+            broken: La conexión falló y debe descartarse
+            sent: Se envió un correo con ella
+        """
+        try:
+            with self._lock:
+                if sent:
+                    self._sent[id(conn)] = self._sent.get(id(conn), 0) + 1
+                exhausted = self._sent.get(id(conn), 0) >= self.max_messages
+
+            if broken:
+                self._discard(conn, "error durante el envío")
+            elif exhausted:
+                self._discard(conn, f"alcanzó {self.max_messages} correos")
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager: ``with pool.connection() as conn: ...``"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, broken=True)
+            raise
+        else:
+            self.release(conn)
+
+    def close_all(self):
+        """Cierra todas las conexiones ociosas"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn, "cierre del pool")
+
+    def get_stats(self) -> Dict:
+        """Retorna estadísticas del pool"""
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded,
+                'idle': len(self._idle),
+            }
+
+    def _is_alive(self, conn: smtplib.SMTP) -> bool:
+        """Verifica la conexión con RSET"""
+        try:
+            code, _ = conn.rset()
+            return code == 250
+        except Exception:
+            return False
+
+    def _discard(self, conn: smtplib.SMTP, reason: str):
+        """Cierra una conexión y la saca del pool"""
+        with self._lock:
+            self.discarded += 1
+            self._sent.pop(id(conn), None)
+        self.logger.debug(f"Descartando conexión SMTP ({reason})")
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
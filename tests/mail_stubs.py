@@ -0,0 +1,268 @@
+"""
+Servidores POP3 e IMAP mínimos en proceso para los tests
+Implementan solo los comandos que usan EmailReader e IMAPEmailReader
+"""
+import socketserver
+import threading
+
+
+class _StubServer(socketserver.ThreadingTCPServer):
+    """Base: servidor TCP en 127.0.0.1 con puerto libre y hilo propio"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, handler, user='bot@example.com', password='secret'):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.user = user
+        self.password = password
+        self.commands = []
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    """Base: lectura y escritura de líneas terminadas en CRLF"""
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+
+    def send_line(self, line):
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        with self.write_lock:
+            self.wfile.write(line + b'\r\n')
+            self.wfile.flush()
+
+    def send_raw(self, data: bytes):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def read_line(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        return line.decode('utf-8').rstrip('\r\n')
+
+
+# ============================================================================
+# POP3
+# ============================================================================
+
+class _POP3Handler(_LineHandler):
+
+    def handle(self):
+        server = self.server
+        snapshot = []
+        deleted = set()
+        self.send_line('+OK stub POP3 ready')
+
+        while True:
+            line = self.read_line()
+            if line is None:
+                return
+            server.commands.append(line)
+            cmd, *args = line.split(' ')
+            cmd = cmd.upper()
+
+            if cmd == 'USER':
+                self.send_line('+OK')
+            elif cmd == 'PASS':
+                if args and args[0] == server.password:
+                    with server.lock:
+                        snapshot = list(zip(server.uids, server.messages))
+                    self.send_line('+OK logged in')
+                else:
+                    self.send_line('-ERR invalid password')
+            elif cmd == 'STAT':
+                size = sum(len(m) for _, m in snapshot)
+                self.send_line(f'+OK {len(snapshot)} {size}')
+            elif cmd == 'LIST':
+                self.send_multiline('+OK', [f'{i} {len(m)}'.encode() for i, (_, m) in enumerate(snapshot, 1)])
+            elif cmd == 'UIDL':
+                self.send_multiline('+OK', [f'{i} {uid}'.encode() for i, (uid, _) in enumerate(snapshot, 1)])
+            elif cmd in ('RETR', 'TOP'):
+                message = snapshot[int(args[0]) - 1][1]
+                if cmd == 'TOP':
+                    message = message.split(b'\r\n\r\n', 1)[0] + b'\r\n'
+                self.send_multiline('+OK', message.split(b'\r\n'))
+            elif cmd == 'DELE':
+                deleted.add(snapshot[int(args[0]) - 1][0])
+                self.send_line('+OK deleted')
+            elif cmd == 'NOOP':
+                self.send_line('+OK')
+            elif cmd == 'QUIT':
+                with server.lock:
+                    for uid in deleted:
+                        index = server.uids.index(uid)
+                        del server.uids[index]
+                        del server.messages[index]
+                self.send_line('+OK bye')
+                return
+            else:
+                self.send_line('-ERR unknown command')
+
+    def send_multiline(self, status, lines):
+        payload = status.encode() + b'\r\n'
+        for line in lines:
+            if line.startswith(b'.'):
+                line = b'.' + line
+            payload += line + b'\r\n'
+        self.send_raw(payload + b'.\r\n')
+
+
+class StubPOP3Server(_StubServer):
+    """Servidor POP3 en proceso (foto del buzón al autenticarse, como RFC 1939)"""
+
+    def __init__(self, messages=None, **kwargs):
+        super().__init__(_POP3Handler, **kwargs)
+        self.messages = []
+        self.uids = []
+        self._next_uid = 1
+        for message in messages or []:
+            self.add_message(message)
+
+    def add_message(self, raw: bytes):
+        with self.lock:
+            self.messages.append(raw)
+            self.uids.append(f'STUB{self._next_uid:04d}')
+            self._next_uid += 1
+
+
+# ============================================================================
+# IMAP
+# ============================================================================
+
+class _IMAPHandler(_LineHandler):
+
+    def handle(self):
+        server = self.server
+        self.send_line('* OK [CAPABILITY IMAP4rev1 IDLE] stub IMAP ready')
+
+        while True:
+            line = self.read_line()
+            if line is None:
+                return
+            server.commands.append(line)
+            tag, _, rest = line.partition(' ')
+            cmd, _, args = rest.partition(' ')
+            cmd = cmd.upper()
+
+            if cmd == 'CAPABILITY':
+                self.send_line('* CAPABILITY IMAP4rev1 IDLE')
+                self.send_line(f'{tag} OK CAPABILITY completed')
+            elif cmd == 'LOGIN':
+                user, _, password = args.partition(' ')
+                if password.strip('"') == server.password:
+                    self.send_line(f'{tag} OK LOGIN completed')
+                else:
+                    self.send_line(f'{tag} NO invalid credentials')
+            elif cmd in ('SELECT', 'EXAMINE'):
+                self.send_line(f'* {len(server.messages)} EXISTS')
+                self.send_line(f'* OK [UIDVALIDITY {server.uidvalidity}] UIDs valid')
+                self.send_line(f'{tag} OK [READ-WRITE] SELECT completed')
+            elif cmd == 'NOOP':
+                self.send_line(f'{tag} OK NOOP completed')
+            elif cmd == 'UID':
+                self.handle_uid(tag, args)
+            elif cmd == 'EXPUNGE':
+                with server.lock:
+                    for uid in sorted(server.deleted):
+                        server.messages.pop(uid, None)
+                    server.deleted.clear()
+                self.send_line(f'{tag} OK EXPUNGE completed')
+            elif cmd == 'IDLE':
+                self.handle_idle(tag)
+            elif cmd == 'LOGOUT':
+                self.send_line('* BYE logging out')
+                self.send_line(f'{tag} OK LOGOUT completed')
+                return
+            else:
+                self.send_line(f'{tag} BAD unknown command')
+
+    def handle_uid(self, tag, args):
+        server = self.server
+        subcmd, _, rest = args.partition(' ')
+        subcmd = subcmd.upper()
+
+        with server.lock:
+            uids = sorted(server.messages)
+
+        if subcmd == 'SEARCH':
+            self.send_line('* SEARCH ' + ' '.join(str(uid) for uid in uids))
+        elif subcmd == 'FETCH':
+            uid_text, _, items = rest.partition(' ')
+            uid = int(uid_text)
+            message = server.messages[uid]
+            section = 'BODY[]'
+            if 'HEADER' in items.upper():
+                message = message.split(b'\r\n\r\n', 1)[0] + b'\r\n\r\n'
+                section = 'BODY[HEADER]'
+            seq = uids.index(uid) + 1
+            self.send_raw(f'* {seq} FETCH (UID {uid} {section} {{{len(message)}}}\r\n'.encode() + message + b')\r\n')
+        elif subcmd == 'STORE':
+            uid = int(rest.split(' ')[0])
+            with server.lock:
+                server.deleted.add(uid)
+            self.send_line(f'* {uids.index(uid) + 1} FETCH (UID {uid} FLAGS (\\Deleted))')
+        else:
+            self.send_line(f'{tag} BAD unknown UID command')
+            return
+
+        self.send_line(f'{tag} OK UID {subcmd} completed')
+
+    def handle_idle(self, tag):
+        server = self.server
+        # Avisos pendientes en el mismo paquete que la continuación
+        self.send_raw(b''.join(f'{line}\r\n'.encode() for line in ['+ idling'] + server.idle_notices))
+        with server.lock:
+            server.idlers.append(self)
+        try:
+            while True:
+                line = self.read_line()
+                if line is None or line.upper() == 'DONE':
+                    break
+        finally:
+            with server.lock:
+                server.idlers.remove(self)
+        self.send_line(f'{tag} OK IDLE terminated')
+
+
+class StubIMAPServer(_StubServer):
+    """Servidor IMAP en proceso con soporte de IDLE"""
+
+    def __init__(self, messages=None, uidvalidity=1, **kwargs):
+        super().__init__(_IMAPHandler, **kwargs)
+        self.uidvalidity = uidvalidity
+        self.messages = {}
+        self.deleted = set()
+        self.idlers = []
+        self.idle_notices = []
+        self._next_uid = 1
+        for message in messages or []:
+            self.deliver(message)
+
+    def deliver(self, raw: bytes):
+        """Agrega un mensaje y avisa a las sesiones en IDLE"""
+        with self.lock:
+            self.messages[self._next_uid] = raw
+            self._next_uid += 1
+            count = len(self.messages)
+            idlers = list(self.idlers)
+        for handler in idlers:
+            handler.send_line(f'* {count} EXISTS')
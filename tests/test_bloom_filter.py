@@ -0,0 +1,71 @@
+"""
+Tests para el filtro de Bloom
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bloom_filter import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Tests para BloomFilter"""
+
+    def test_no_false_negatives(self):
+        """Test que toda clave agregada se encuentra"""
+        bloom = BloomFilter(1000, 1e-4)
+        keys = [f'hash-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertEqual(len(bloom), 1000)
+
+    def test_false_positive_rate(self):
+        """Test que la tasa de falsos positivos respeta la configurada"""
+        bloom = BloomFilter(2000, 0.01)
+        for i in range(2000):
+            bloom.add(f'hash-{i}')
+
+        false_positives = sum(f'otro-{i}' in bloom for i in range(10000))
+
+        self.assertLess(false_positives / 10000, 0.02)
+
+    def test_sizing(self):
+        """Test del tamaño para un millón de claves con 1e-6"""
+        bloom = BloomFilter(1000000, 1e-6)
+
+        self.assertLess(len(bloom.bits), 4 * 1024 * 1024)
+        self.assertEqual(bloom.num_hashes, 20)
+
+    def test_save_and_load(self):
+        """Test persistencia en disco"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'filter.bloom')
+            bloom = BloomFilter(100, 1e-3)
+            bloom.add('a')
+            bloom.save(path)
+
+            loaded = BloomFilter.load(path)
+
+        self.assertIn('a', loaded)
+        self.assertNotIn('b', loaded)
+        self.assertEqual((loaded.capacity, loaded.error_rate, len(loaded)), (100, 1e-3, 1))
+
+    def test_load_rejects_garbage(self):
+        """Test que un archivo inválido se rechaza"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'filter.bloom')
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+
+            with self.assertRaises(ValueError):
+                BloomFilter.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
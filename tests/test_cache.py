@@ -0,0 +1,142 @@
+"""
+Tests para la caché de consultas de los modelos
+"""
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.rows import ResultSet
+from models.base import BaseModel
+from models.cache import QueryCache
+
+
+class TestQueryCache(unittest.TestCase):
+    """Tests para QueryCache"""
+
+    def setUp(self):
+        self.cache = QueryCache(max_entries=2)
+
+    def test_hit_and_miss(self):
+        """Test que un resultado guardado se encuentra y cuenta aciertos"""
+        self.assertEqual(self.cache.get('t', 'a'), (False, None))
+        self.cache.set('t', 'a', [{'id': 1}], ttl=60, version=self.cache.version('t'))
+
+        self.assertEqual(self.cache.get('t', 'a'), (True, [{'id': 1}]))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+
+    def test_ttl_expires(self):
+        """Test que una entrada vencida no se entrega"""
+        self.cache.set('t', 'a', {'id': 1}, ttl=60, version=0)
+
+        with mock.patch('models.cache.time.monotonic', return_value=10 ** 9):
+            self.assertEqual(self.cache.get('t', 'a'), (False, None))
+        self.assertEqual(self.cache.get_stats()['entries'], 0)
+
+    def test_lru_eviction(self):
+        """Test que al llenarse se descarta la entrada usada hace más tiempo"""
+        for key in ('a', 'b'):
+            self.cache.set('t', key, key, ttl=60, version=0)
+        self.cache.get('t', 'a')
+        self.cache.set('t', 'c', 'c', ttl=60, version=0)
+
+        self.assertTrue(self.cache.get('t', 'a')[0])
+        self.assertFalse(self.cache.get('t', 'b')[0])
+        self.assertEqual(self.cache.get_stats()['evictions'], 1)
+
+    def test_invalidate_only_affects_table(self):
+        """Test que invalidar una tabla no toca las demás"""
+        self.cache.set('t', 'a', 1, ttl=60, version=0)
+        self.cache.set('u', 'a', 2, ttl=60, version=0)
+        self.cache.invalidate('t')
+
+        self.assertFalse(self.cache.get('t', 'a')[0])
+        self.assertEqual(self.cache.get('u', 'a'), (True, 2))
+
+    def test_write_during_read_not_stored(self):
+        """Test que un resultado leído antes de una escritura no se guarda"""
+        version = self.cache.version('t')
+        self.cache.invalidate('t')
+        self.cache.set('t', 'a', [{'id': 1}], ttl=60, version=version)
+
+        self.assertFalse(self.cache.get('t', 'a')[0])
+
+    def test_returns_copies(self):
+        """Test que modificar un resultado entregado no altera la caché"""
+        self.cache.set('t', 'a', [{'id': 1}], ttl=60, version=0)
+        self.cache.get('t', 'a')[1][0]['id'] = 99
+        self.cache.set('t', 'b', ResultSet(['id'], [(1,)]), ttl=60, version=0)
+        self.cache.get('t', 'b')[1].rows.append((2,))
+
+        self.assertEqual(self.cache.get('t', 'a')[1], [{'id': 1}])
+        self.assertEqual(len(self.cache.get('t', 'b')[1]), 1)
+
+
+class CachedModel(BaseModel):
+    table_name = 'servicios'
+    fields = ['id', 'nombre', 'tipo']
+    cache_ttl = 60
+
+
+class TestModelCache(unittest.TestCase):
+    """Tests para las lecturas en caché de BaseModel"""
+
+    def setUp(self):
+        cache = QueryCache(max_entries=100)
+        patcher_cache = mock.patch('models.base.query_cache', cache)
+        patcher_db = mock.patch('models.base.db')
+        patcher_cache.start()
+        self.db = patcher_db.start()
+        self.addCleanup(patcher_cache.stop)
+        self.addCleanup(patcher_db.stop)
+
+        self.db.in_transaction.return_value = False
+        self.db.on_commit.side_effect = lambda callback: callback()
+        self.db.execute.return_value = [{'id': 1, 'nombre': 'Cambio de aceite', 'tipo': 'mantenimiento'}]
+
+    def test_repeated_reads_hit_cache(self):
+        """Test que la misma lectura va una sola vez a la BD"""
+        for _ in range(3):
+            CachedModel.find_all({'tipo': ['mantenimiento', 'reparacion']})
+        CachedModel.find_all({'tipo': 'diagnostico'})
+
+        self.assertEqual(self.db.execute.call_count, 2)
+
+    def test_write_invalidates(self):
+        """Test que create y update invalidan las lecturas de la tabla"""
+        CachedModel.find_all()
+        self.db.execute.return_value = {'id': 2}
+        CachedModel.create({'nombre': 'Frenos'})
+        self.db.execute.return_value = []
+        self.assertEqual(CachedModel.find_all(), [])
+
+        self.db.execute.return_value = 1
+        CachedModel.update(2, {'nombre': 'Frenos y pastillas'})
+        self.db.execute.return_value = []
+        CachedModel.find_all()
+
+        self.assertEqual(self.db.execute.call_count, 5)
+
+    def test_bypassed_in_transaction(self):
+        """Test que dentro de una transacción se lee siempre de la BD"""
+        self.db.in_transaction.return_value = True
+        CachedModel.find_all()
+        CachedModel.find_all()
+
+        self.assertEqual(self.db.execute.call_count, 2)
+
+    def test_disabled(self):
+        """Test que con QUERY_CACHE_ENABLED=False no se usa la caché"""
+        with mock.patch('config.settings.settings.QUERY_CACHE_ENABLED', False):
+            CachedModel.find_all()
+            CachedModel.find_all()
+
+        self.assertEqual(self.db.execute.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests para la importación de adjuntos CSV
+"""
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import db
+from interpreter.command_interpreter import CommandInterpreter
+from lexer.parser import Command
+from models.servicio import Servicio
+from models.vehiculo import Vehiculo
+from services.csv_import import CsvImporter
+from services.email_processor import EmailCommandProcessor
+from services.mime_stream import CsvAttachment
+from tests.test_email_processor import FakeConnection
+
+
+def make_attachment(text, encoding='utf-8', charset=None, filename='datos.csv'):
+    attachment = CsvAttachment(filename, charset, max_bytes=10 * 1024 * 1024, max_memory=1024)
+    attachment.write(text.encode(encoding))
+    return attachment
+
+
+class FakeBulk:
+    """bulk_create falso: asigna IDs consecutivos y registra cada bloque"""
+
+    def __init__(self):
+        self.calls = []
+        self.next_id = 1
+
+    def __call__(self, records):
+        self.calls.append(records)
+        ids = list(range(self.next_id, self.next_id + len(records)))
+        self.next_id += len(records)
+        return ids
+
+
+class TestCsvImporter(unittest.TestCase):
+    """Tests para CsvImporter"""
+
+    def setUp(self):
+        self.conn = FakeConnection()
+        self.bulk = FakeBulk()
+        patches = [
+            mock.patch.object(db, 'get_connection', return_value=self.conn),
+            mock.patch.object(db, 'return_connection'),
+            mock.patch.object(Vehiculo, 'bulk_create', self.bulk),
+            mock.patch.object(Servicio, 'bulk_create', self.bulk),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.importer = CsvImporter(CommandInterpreter(), chunk_size=2)
+
+    def run_import(self, entity, attachment):
+        try:
+            return self.importer.run(Command(entity, 'agregar', []), attachment)
+        finally:
+            attachment.close()
+
+    def test_header_by_name_with_semicolons(self):
+        """Test encabezados en otro orden, con tildes y columnas extra"""
+        text = (
+            "Placa;Cliente ID;Marca;Modelo;Año;Color;Kilometraje;Notas\r\n"
+            "SCZ-0001;1;Toyota;Corolla;2020;Gris;1000;x\r\n"
+            "\r\n"
+            "SCZ-0002;2;Honda;Civic;2021;;2000;y\r\n"
+            "SCZ-0003;3;Nissan;Sentra;2019;Azul;3000;z\r\n"
+        )
+        result = self.run_import('vehiculo', make_attachment(text))
+
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['data']['insertados'], 3)
+        self.assertEqual([len(chunk) for chunk in self.bulk.calls], [2, 1])
+        first = self.bulk.calls[0][0]
+        self.assertEqual((first['placa'], first['cliente_id'], first['anio']), ('SCZ-0001', '1', '2020'))
+        self.assertIsNone(self.bulk.calls[0][1]['color'])
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (1, 0))
+
+    def test_positional_rows_and_rejects(self):
+        """Test sin encabezados: columnas por posición y filas inválidas reportadas"""
+        text = (
+            "1,SCZ-0001,Toyota,Corolla,2020,Gris,1000,,\n"
+            "2,PLACA MALA,Honda,Civic,2021,Rojo,2000\n"
+            "3,SCZ-0003,Nissan\n"
+            "4,LPZ-0004,Suzuki,Swift,2018,Azul,4000\n"
+        )
+        result = self.run_import('vehiculo', make_attachment(text))
+
+        self.assertTrue(result['success'])
+        self.assertIn('2 fila(s) rechazada(s)', result['message'])
+        self.assertEqual([row['linea'] for row in result['data']], [2, 3])
+        self.assertEqual(sum(len(chunk) for chunk in self.bulk.calls), 2)
+
+    def test_cp1252_from_excel(self):
+        """Test archivo de Excel en cp1252 sin charset declarado"""
+        text = "nombre;descripcion;tipo;precio_base;duracion_estimada\r\nAlineación;Tren delantero;mantenimiento;80;60\r\n"
+        result = self.run_import('servicio', make_attachment(text, encoding='cp1252'))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.bulk.calls[0][0]['nombre'], 'Alineación')
+
+    def test_missing_columns(self):
+        """Test encabezados incompletos"""
+        result = self.run_import('vehiculo', make_attachment("placa,marca\nSCZ-0001,Toyota\n"))
+
+        self.assertFalse(result['success'])
+        self.assertIn('cliente_id', result['message'])
+        self.assertEqual(self.bulk.calls, [])
+
+    def test_failed_insert_rolls_back(self):
+        """Test que un error de inserción revierte todos los bloques"""
+        text = "".join(f"{i},SCZ-000{i},Toyota,Corolla,2020,Gris,1000\n" for i in range(1, 6))
+        with mock.patch.object(Vehiculo, 'bulk_create', side_effect=[[1, 2], RuntimeError('duplicado')]):
+            result = self.run_import('vehiculo', make_attachment(text))
+
+        self.assertFalse(result['success'])
+        self.assertIn('no se aplicó ningún cambio', result['message'])
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (0, 1))
+
+    def test_processor_routes_agregar_with_attachment(self):
+        """Test que 'vehiculo agregar' sin parámetros + CSV usa la importación"""
+        processor = EmailCommandProcessor()
+        text = "1,SCZ-0001,Toyota,Corolla,2020,Gris,1000\n"
+        email_data = {
+            'from_email': 'cliente@example.com',
+            'subject': 'vehiculo agregar',
+            'body': '',
+            'attachments': [make_attachment(text)],
+        }
+
+        result = processor.process_email_command(email_data)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(len(self.bulk.calls), 1)
+        self.assertFalse(EmailCommandProcessor._wants_csv_import(Command('cita', 'agregar', [])))
+        self.assertFalse(EmailCommandProcessor._wants_csv_import(Command('vehiculo', 'agregar', ['1'])))
+        self.assertTrue(EmailCommandProcessor._wants_csv_import(
+            Command('usuario', 'agregar', ['cliente'], subtype='cliente')
+        ))
+
+
+if __name__ == '__main__':
+    unittest.main()
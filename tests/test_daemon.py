@@ -0,0 +1,137 @@
+"""
+Tests para el daemon de correo
+"""
+import unittest
+import sys
+import os
+import logging
+import threading
+import time
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from daemon.email_daemon import EmailDaemon
+
+
+class FakeSource:
+    """Fuente de correo falsa que registra los correos marcados"""
+
+    def __init__(self):
+        self.marked = []
+        self.pending_deletions = 0
+
+    def mark_as_processed(self, email_data):
+        self.marked.append(email_data['hash'])
+
+    def delete_email(self, message_num):
+        pass
+
+    def session_settings(self):
+        return {'keep_alive': False, 'max_age': 300}
+
+
+class RecordingProcessor:
+    """Procesador falso que registra el orden de ejecución por remitente"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.executed = []
+        self.threads = set()
+
+    def process_email_command(self, email_data):
+        time.sleep(self.delay)
+        with self.lock:
+            self.executed.append((email_data['from_email'], email_data['subject']))
+            self.threads.add(threading.current_thread().name)
+        return {'success': True, 'message': 'ok', 'data': None}
+
+
+def make_email(number, sender):
+    return {
+        'index': number,
+        'hash': f'hash-{number}',
+        'message_id': f'<msg-{number}@example.com>',
+        'from_email': sender,
+        'from_name': sender.split('@')[0],
+        'subject': f'comando {number}',
+        'date': '',
+    }
+
+
+def build_daemon():
+    """Crea un daemon sin logging a archivo, señales ni conexiones reales"""
+    def fake_logging(daemon):
+        daemon.logger = logging.getLogger('EmailDaemonTest')
+
+    with mock.patch('daemon.email_daemon.create_mail_source', return_value=FakeSource()), \
+            mock.patch.object(settings, 'OUTBOUND_QUEUE_ENABLED', False), \
+            mock.patch.object(EmailDaemon, 'setup_logging', fake_logging), \
+            mock.patch.object(EmailDaemon, 'setup_signal_handlers'):
+        daemon = EmailDaemon()
+
+    daemon.email_processor = RecordingProcessor()
+    daemon.email_sender = mock.Mock()
+    daemon.email_sender.send_command_response.return_value = True
+    return daemon
+
+
+class TestConcurrentProcessing(unittest.TestCase):
+    """Tests para el pool de procesamiento concurrente"""
+
+    def setUp(self):
+        self.emails = [
+            make_email(i, f'remitente{i % 3}@example.com') for i in range(1, 10)
+        ]
+
+    def test_per_sender_order_preserved(self):
+        """Test que los comandos de un remitente se ejecutan en orden"""
+        daemon = build_daemon()
+
+        with mock.patch.object(settings, 'PROCESSING_WORKERS', 3):
+            daemon.process_emails(self.emails)
+
+        executed = daemon.email_processor.executed
+        for sender in {e['from_email'] for e in self.emails}:
+            expected = [e['subject'] for e in self.emails if e['from_email'] == sender]
+            self.assertEqual([s for f, s in executed if f == sender], expected)
+
+    def test_accounting_and_marking(self):
+        """Test que todos los correos se cuentan y se marcan una sola vez"""
+        daemon = build_daemon()
+
+        with mock.patch.object(settings, 'PROCESSING_WORKERS', 3):
+            daemon.process_emails(self.emails)
+
+        self.assertEqual(daemon.processed_count, len(self.emails))
+        self.assertEqual(sorted(daemon.mail_source.marked), sorted(e['hash'] for e in self.emails))
+        self.assertEqual(daemon.email_sender.send_command_response.call_count, len(self.emails))
+
+    def test_runs_concurrently(self):
+        """Test que remitentes distintos se procesan en paralelo"""
+        daemon = build_daemon()
+
+        started = time.monotonic()
+        with mock.patch.object(settings, 'PROCESSING_WORKERS', 3):
+            daemon.process_emails(self.emails)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(len(daemon.email_processor.threads), 3)
+        self.assertLess(elapsed, 0.05 * len(self.emails))
+
+    def test_single_worker_is_sequential(self):
+        """Test que con un worker se procesa en el hilo principal y en orden"""
+        daemon = build_daemon()
+
+        with mock.patch.object(settings, 'PROCESSING_WORKERS', 1):
+            daemon.process_emails(self.emails)
+
+        self.assertEqual([s for _, s in daemon.email_processor.executed], [e['subject'] for e in self.emails])
+        self.assertEqual(daemon.email_processor.threads, {threading.current_thread().name})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
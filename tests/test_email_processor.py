@@ -0,0 +1,145 @@
+"""
+Tests para el procesador de comandos por correo (modo lote)
+"""
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import db
+from lexer.parser import batch_mode
+from services.email_processor import EmailCommandProcessor
+
+
+class FakeConnection:
+    """Conexión falsa que cuenta commits y rollbacks"""
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeInterpreter:
+    """Intérprete falso: registra los comandos y falla en la acción indicada"""
+
+    def __init__(self, fail_action=None):
+        self.fail_action = fail_action
+        self.executed = []
+
+    def interpret(self, command, context):
+        self.executed.append((command.entity, command.action))
+        if command.action == self.fail_action:
+            return {'success': False, 'message': 'falló', 'data': None}
+        return {'success': True, 'message': 'ok', 'data': None}
+
+
+def make_email(subject, body):
+    return {'from_email': 'cliente@example.com', 'subject': subject, 'body': body}
+
+
+class TestBatchMode(unittest.TestCase):
+    """Tests para lotes de comandos en el cuerpo del correo"""
+
+    def setUp(self):
+        self.processor = EmailCommandProcessor()
+        self.conn = FakeConnection()
+        patches = [
+            mock.patch.object(db, 'get_connection', return_value=self.conn),
+            mock.patch.object(db, 'return_connection'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_batch_mode_detection(self):
+        """Test detección del asunto de lote"""
+        self.assertFalse(batch_mode('lote'))
+        self.assertFalse(batch_mode('LOTE simple'))
+        self.assertTrue(batch_mode('lote atomico'))
+        self.assertTrue(batch_mode('Lote Atómico'))
+        self.assertIsNone(batch_mode('vehiculo mostrar'))
+        self.assertIsNone(batch_mode('lote mostrar'))
+
+    def test_batch_lines_skip_comments_and_stop_at_signature(self):
+        """Test extracción de líneas: comentarios, vacías, firma"""
+        body = "# carga\nvehiculo mostrar\n\n  servicio mostrar  \n--\ncita mostrar\n"
+        self.assertEqual(
+            EmailCommandProcessor._batch_lines(body),
+            [(2, 'vehiculo mostrar'), (4, 'servicio mostrar')]
+        )
+        self.assertEqual(
+            EmailCommandProcessor._batch_lines("vehiculo mostrar\n> servicio mostrar"),
+            [(1, 'vehiculo mostrar')]
+        )
+
+    def test_simple_batch_continues_after_errors(self):
+        """Test lote simple: cada línea se ejecuta aunque otra falle"""
+        self.processor.interpreter = FakeInterpreter(fail_action='eliminar')
+        body = "vehiculo mostrar\nvehiculo eliminar [1]\nesto no parsea\nservicio mostrar"
+
+        result = self.processor.process_email_command(make_email('lote', body))
+
+        self.assertFalse(result['success'])
+        self.assertEqual([row['estado'] for row in result['data']], ['ok', 'error', 'error', 'ok'])
+        self.assertEqual([row['linea'] for row in result['data']], [1, 2, 3, 4])
+        self.assertEqual(len(self.processor.interpreter.executed), 3)
+        self.assertEqual(self.conn.commits + self.conn.rollbacks, 0)
+
+    def test_atomic_batch_commits_once(self):
+        """Test lote atómico exitoso: un único commit"""
+        self.processor.interpreter = FakeInterpreter()
+        body = "vehiculo mostrar\nservicio mostrar\ncita mostrar"
+
+        result = self.processor.process_email_command(make_email('lote atomico', body))
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.conn.commits, 1)
+        self.assertEqual(self.conn.rollbacks, 0)
+        self.assertFalse(db.in_transaction())
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        """Test lote atómico: al primer fallo se revierte y se detiene"""
+        self.processor.interpreter = FakeInterpreter(fail_action='eliminar')
+        body = "vehiculo mostrar\nvehiculo eliminar [1]\nservicio mostrar"
+
+        result = self.processor.process_email_command(make_email('lote atomico', body))
+
+        self.assertFalse(result['success'])
+        self.assertEqual([row['estado'] for row in result['data']], ['revertido', 'error', 'omitido'])
+        self.assertEqual(len(self.processor.interpreter.executed), 2)
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (0, 1))
+
+    def test_atomic_batch_with_syntax_error_runs_nothing(self):
+        """Test lote atómico con errores de sintaxis: no se ejecuta nada"""
+        self.processor.interpreter = FakeInterpreter()
+        body = "vehiculo mostrar\nesto no parsea"
+
+        result = self.processor.process_email_command(make_email('lote atomico', body))
+
+        self.assertFalse(result['success'])
+        self.assertEqual([row['estado'] for row in result['data']], ['omitido', 'error'])
+        self.assertEqual(self.processor.interpreter.executed, [])
+
+    def test_batch_limit(self):
+        """Test lote por encima del máximo de comandos"""
+        self.processor.interpreter = FakeInterpreter()
+        body = "\n".join(['vehiculo mostrar'] * 3)
+
+        with mock.patch('config.settings.settings.BATCH_MAX_COMMANDS', 2):
+            result = self.processor.process_email_command(make_email('lote', body))
+
+        self.assertFalse(result['success'])
+        self.assertEqual(self.processor.interpreter.executed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,284 @@
+"""
+Tests para el lector de correos POP3
+"""
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import poplib
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from config.settings import settings
+from services.email_reader import EmailReader
+from services.mime_stream import CsvAttachment
+
+
+def build_message(number: int, subject: str = 'usuario mostrar', sender: str = 'cliente@example.com') -> bytes:
+    """Construye un correo RFC 822 simple"""
+    return (
+        f"From: Cliente <{sender}>\r\n"
+        f"To: bot@example.com\r\n"
+        f"Subject: {subject}\r\n"
+        f"Message-ID: <msg-{number}@example.com>\r\n"
+        f"Date: Mon, 1 Jan 2024 10:00:0{number % 10} +0000\r\n"
+        f"\r\n"
+        f"Cuerpo del mensaje {number}\r\n"
+    ).encode('utf-8')
+
+
+class FakePOP3:
+    """Servidor POP3 falso en memoria que registra los comandos recibidos"""
+
+    def __init__(self, messages, uids=None, supports_uidl=True):
+        self.messages = messages
+        self.uids = uids or [f"UID{i}" for i in range(1, len(messages) + 1)]
+        self.supports_uidl = supports_uidl
+        self.commands = []
+
+    def list(self):
+        self.commands.append('LIST')
+        return b'+OK', [f"{i} {len(m)}".encode() for i, m in enumerate(self.messages, 1)], 0
+
+    def uidl(self):
+        self.commands.append('UIDL')
+        if not self.supports_uidl:
+            raise poplib.error_proto(b'-ERR unknown command')
+        return b'+OK', [f"{i} {uid}".encode() for i, uid in enumerate(self.uids, 1)], 0
+
+    def retr(self, which):
+        self.commands.append(f'RETR {which}')
+        lines = self.messages[which - 1].split(b'\r\n')
+        return b'+OK', lines, len(self.messages[which - 1])
+
+    def top(self, which, howmuch):
+        self.commands.append(f'TOP {which} {howmuch}')
+        headers = self.messages[which - 1].split(b'\r\n\r\n', 1)[0]
+        return b'+OK', headers.split(b'\r\n'), len(headers)
+
+    # Métodos internos de poplib usados por el RETR en streaming
+    def _putcmd(self, line):
+        self.commands.append(line)
+        which = int(line.split(' ')[1])
+        lines = self.messages[which - 1].split(b'\r\n')
+        self._pending = [b'.' + l if l.startswith(b'.') else l for l in lines] + [b'.']
+
+    def _getresp(self):
+        return b'+OK'
+
+    def _getline(self):
+        line = self._pending.pop(0)
+        return line, len(line) + 2
+
+    def retr_count(self):
+        return len([c for c in self.commands if c.startswith('RETR')])
+
+
+class EmailReaderTestCase(unittest.TestCase):
+    """Base: aísla el archivo de correos procesados en un directorio temporal"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.processed_file = os.path.join(self.tmpdir.name, 'processed_emails.txt')
+        patcher = mock.patch.object(settings, 'PROCESSED_EMAILS_FILE', self.processed_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def make_reader(self, pop3):
+        reader = EmailReader()
+        reader.pop3 = pop3
+        return reader
+
+
+class TestUidlIncrementalFetch(EmailReaderTestCase):
+    """Tests para la descarga incremental basada en UIDL"""
+
+    def test_new_messages_are_fetched_with_uid(self):
+        """Test que los correos nuevos se descargan y llevan su UID"""
+        pop3 = FakePOP3([build_message(1), build_message(2)])
+        reader = self.make_reader(pop3)
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', True):
+            emails = reader.get_new_emails()
+
+        self.assertEqual(len(emails), 2)
+        self.assertEqual({e['uid'] for e in emails}, {'UID1', 'UID2'})
+        self.assertEqual(pop3.retr_count(), 2)
+
+    def test_processed_uids_are_skipped_without_retr(self):
+        """Test que un UID ya procesado no se vuelve a descargar"""
+        pop3 = FakePOP3([build_message(1), build_message(2), build_message(3)])
+        reader = self.make_reader(pop3)
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', True):
+            for email_data in reader.get_new_emails():
+                reader.mark_as_processed(email_data)
+
+            pop3.commands.clear()
+            pop3.messages.append(build_message(4))
+            pop3.uids.append('UID4')
+
+            # Un lector nuevo debe recuperar el mapa UID -> hash del archivo
+            reader = self.make_reader(pop3)
+            emails = reader.get_new_emails()
+
+        self.assertEqual([e['uid'] for e in emails], ['UID4'])
+        self.assertEqual(pop3.commands, ['UIDL', 'RETR 4'])
+
+    def test_mailbox_larger_than_history_is_not_downloaded_again(self):
+        """Test que un buzón con más correos que el historial no se vuelve a descargar"""
+        pop3 = FakePOP3([build_message(i) for i in range(1, 13)])
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', True), \
+                mock.patch.object(settings, 'MAX_PROCESSED_HISTORY', 5):
+            reader = self.make_reader(pop3)
+            for email_data in reader.get_new_emails():
+                reader.mark_as_processed(email_data)
+            reader.processed.close()
+
+            pop3.commands.clear()
+            reader = self.make_reader(pop3)
+            self.assertEqual(reader.get_new_emails(), [])
+            self.assertEqual(reader.get_new_emails(), [])
+
+        self.assertEqual(pop3.retr_count(), 0)
+
+    def test_legacy_hash_entries_learn_their_uid(self):
+        """Test que un hash procesado sin UID queda asociado a su UID"""
+        pop3 = FakePOP3([build_message(1)])
+        reader = self.make_reader(pop3)
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', False):
+            reader.mark_as_processed(reader.get_new_emails()[0])
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', True):
+            self.assertEqual(reader.get_new_emails(), [])
+            pop3.commands.clear()
+            self.assertEqual(reader.get_new_emails(), [])
+
+        self.assertEqual(pop3.retr_count(), 0)
+
+    def test_already_processed_message_releases_csv_attachments(self):
+        """Test que al descartar un correo ya procesado se cierran sus adjuntos CSV"""
+        message = MIMEMultipart()
+        message['From'] = 'Cliente <cliente@example.com>'
+        message['Subject'] = 'vehiculo agregar'
+        message['Message-ID'] = '<msg-csv@example.com>'
+        message.attach(MIMEText('ver adjunto'))
+        message.attach(MIMEApplication(b'placa\nSCZ-1234\n', 'csv', Name='vehiculos.csv'))
+        message.get_payload()[1]['Content-Disposition'] = 'attachment; filename="vehiculos.csv"'
+        pop3 = FakePOP3([message.as_bytes().replace(b'\n', b'\r\n')])
+        reader = self.make_reader(pop3)
+        reader.processed.add(reader._generate_email_hash(message))
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', True), \
+                mock.patch.object(CsvAttachment, 'close', autospec=True) as close:
+            self.assertEqual(reader.get_new_emails(), [])
+
+        self.assertEqual(pop3.retr_count(), 1)
+        self.assertEqual(close.call_count, 1)
+
+    def test_unauthorized_sender_dropped_without_prefilter(self):
+        """Test que la lista blanca también se aplica al descargar con RETR"""
+        pop3 = FakePOP3([build_message(1, sender='intruso@example.com'), build_message(2, sender='admin@example.com')])
+        reader = self.make_reader(pop3)
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', True), \
+                mock.patch.object(settings, 'POP3_HEADER_PREFILTER', False), \
+                mock.patch.object(settings, 'REQUIRE_AUTH', True), \
+                mock.patch.object(settings, 'ALLOWED_EMAILS', ['admin@example.com']):
+            emails = reader.get_new_emails()
+
+        self.assertEqual([e['from_email'] for e in emails], ['admin@example.com'])
+        self.assertTrue(reader.processed.has_uid('UID1'))
+
+    def test_fallback_when_uidl_not_supported(self):
+        """Test que sin soporte UIDL se usa la descarga completa"""
+        pop3 = FakePOP3([build_message(1), build_message(2)], supports_uidl=False)
+        reader = self.make_reader(pop3)
+
+        with mock.patch.object(settings, 'POP3_USE_UIDL', True):
+            emails = reader.get_new_emails()
+
+        self.assertEqual(len(emails), 2)
+        self.assertIn('LIST', pop3.commands)
+
+
+class TestHeaderPrefilter(EmailReaderTestCase):
+    """Tests para el prefiltro de headers con POP3 TOP"""
+
+    def setUp(self):
+        super().setUp()
+        for name, value in (('POP3_USE_UIDL', True), ('POP3_HEADER_PREFILTER', True)):
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_invalid_subject_is_not_downloaded(self):
+        """Test que un asunto sin comando válido no se descarga pero se entrega para responder el error"""
+        pop3 = FakePOP3([build_message(1, subject='Re: fotos del auto'), build_message(2)])
+        reader = self.make_reader(pop3)
+
+        emails = {e['uid']: e for e in reader.get_new_emails()}
+
+        self.assertEqual(sorted(emails), ['UID1', 'UID2'])
+        self.assertEqual((emails['UID1']['subject'], emails['UID1']['body']), ('Re: fotos del auto', ''))
+        self.assertNotIn('RETR 1', pop3.commands)
+        self.assertIn('TOP 1 0', pop3.commands)
+
+    def test_batch_subject_passes(self):
+        """Test que un asunto de lote se descarga (sus comandos vienen en el cuerpo)"""
+        pop3 = FakePOP3([build_message(1, subject='lote'), build_message(2, subject='lote atomico')])
+        reader = self.make_reader(pop3)
+
+        emails = reader.get_new_emails()
+
+        self.assertEqual(sorted(e['subject'] for e in emails), ['lote', 'lote atomico'])
+        self.assertIn('RETR 1', pop3.commands)
+        self.assertEqual(len(reader.processed), 0)
+
+    def test_rejected_message_is_not_checked_again(self):
+        """Test que un correo descartado queda marcado y no se vuelve a pedir"""
+        pop3 = FakePOP3([build_message(1, sender='intruso@example.com')])
+        reader = self.make_reader(pop3)
+
+        with mock.patch.object(settings, 'REQUIRE_AUTH', True), \
+                mock.patch.object(settings, 'ALLOWED_EMAILS', ['admin@example.com']):
+            reader.get_new_emails()
+            pop3.commands.clear()
+            reader.get_new_emails()
+
+        self.assertEqual(pop3.commands, ['UIDL'])
+
+    def test_unauthorized_sender_is_not_downloaded(self):
+        """Test que un remitente fuera de la lista blanca no se descarga"""
+        pop3 = FakePOP3([build_message(1, sender='intruso@example.com'),
+                         build_message(2, sender='admin@example.com')])
+        reader = self.make_reader(pop3)
+
+        with mock.patch.object(settings, 'REQUIRE_AUTH', True), \
+                mock.patch.object(settings, 'ALLOWED_EMAILS', ['Admin@example.com']):
+            emails = reader.get_new_emails()
+
+        self.assertEqual([e['from_email'] for e in emails], ['admin@example.com'])
+        self.assertNotIn('RETR 1', pop3.commands)
+
+    def test_header_hash_matches_full_message_hash(self):
+        """Test que el hash de los headers coincide con el del correo completo"""
+        pop3 = FakePOP3([build_message(1)])
+        reader = self.make_reader(pop3)
+
+        email_data = reader.get_new_emails()[0]
+        headers = reader._fetch_headers(1)
+
+        self.assertEqual(reader._generate_email_hash(headers), email_data['hash'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
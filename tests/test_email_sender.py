@@ -0,0 +1,202 @@
+"""
+Tests para el envío de correos con sesiones SMTP reutilizadas
+"""
+import unittest
+import sys
+import os
+import smtplib
+import threading
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services.email_sender import EmailSender
+from services.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Conexión SMTP falsa que registra los comandos recibidos"""
+
+    def __init__(self):
+        self.sent = []
+        self.alive = True
+        self.closed = False
+        self.fail_next_send = None
+
+    def rset(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected('connection closed')
+        return 250, b'OK'
+
+    def send_message(self, msg):
+        if self.fail_next_send:
+            error, self.fail_next_send = self.fail_next_send, None
+            raise error
+        self.sent.append(msg['To'])
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFactory:
+    """Crea FakeSMTP y guarda las conexiones abiertas"""
+
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        conn = FakeSMTP()
+        self.connections.append(conn)
+        return conn
+
+
+class TestSMTPConnectionPool(unittest.TestCase):
+    """Tests para SMTPConnectionPool"""
+
+    def setUp(self):
+        self.factory = FakeFactory()
+        self.pool = SMTPConnectionPool(self.factory, max_size=2, idle_timeout=60, max_messages=100)
+
+    def test_reuses_connection(self):
+        """Test que una conexión devuelta se reutiliza"""
+        for _ in range(3):
+            conn = self.pool.acquire()
+            self.pool.release(conn, sent=True)
+
+        self.assertEqual(len(self.factory.connections), 1)
+        self.assertEqual(self.pool.get_stats()['reused'], 2)
+
+    def test_dead_connection_replaced(self):
+        """Test que una conexión que no responde a RSET se reemplaza"""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        conn.alive = False
+
+        new_conn = self.pool.acquire()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+
+    def test_idle_timeout(self):
+        """Test que las conexiones ociosas demasiado tiempo se cierran"""
+        self.pool.idle_timeout = 0
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        with mock.patch('services.smtp_pool.time.monotonic', return_value=10 ** 9):
+            new_conn = self.pool.acquire()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+
+    def test_max_messages_recycles(self):
+        """Test que una conexión se recicla tras max_messages envíos"""
+        self.pool.max_messages = 2
+        for _ in range(3):
+            conn = self.pool.acquire()
+            self.pool.release(conn, sent=True)
+
+        self.assertEqual(len(self.factory.connections), 2)
+        self.assertTrue(self.factory.connections[0].closed)
+
+    def test_exhausted_pool(self):
+        """Test que el pool limita las conexiones simultáneas"""
+        self.pool.acquire_timeout = 0.05
+        self.pool.acquire()
+        self.pool.acquire()
+
+        with self.assertRaises(smtplib.SMTPException):
+            self.pool.acquire()
+
+    def test_concurrent_counters(self):
+        """Test que los contadores no pierden incrementos con varios hilos"""
+        def worker():
+            for _ in range(200):
+                self.pool.release(self.pool.acquire(), sent=True)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['created'], len(self.factory.connections))
+        self.assertEqual(stats['created'] + stats['reused'], 800)
+
+    def test_close_all(self):
+        """Test que close_all cierra las conexiones ociosas"""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        self.pool.close_all()
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.get_stats()['idle'], 0)
+
+
+class TestEmailSenderPooled(unittest.TestCase):
+    """Tests para EmailSender con pool"""
+
+    def setUp(self):
+        patcher = mock.patch.object(settings, 'SMTP_POOL_SIZE', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.factory = FakeFactory()
+        self.sender = EmailSender()
+        self.sender.pool.factory = self.factory
+
+    def test_sends_over_single_session(self):
+        """Test que varios correos usan la misma sesión SMTP"""
+        for i in range(3):
+            self.assertTrue(self.sender.send_email(f'user{i}@example.com', 'Asunto', '<p>Hola</p>'))
+
+        self.assertEqual(len(self.factory.connections), 1)
+        self.assertEqual(len(self.factory.connections[0].sent), 3)
+
+    def test_retries_once_on_disconnect(self):
+        """Test que una sesión cortada se reemplaza y el envío se reintenta"""
+        self.sender.send_email('a@example.com', 'Asunto', '<p>Hola</p>')
+        self.factory.connections[0].fail_next_send = smtplib.SMTPServerDisconnected('closed')
+
+        self.assertTrue(self.sender.send_email('b@example.com', 'Asunto', '<p>Hola</p>'))
+
+        self.assertEqual(len(self.factory.connections), 2)
+        self.assertEqual(self.factory.connections[1].sent, ['b@example.com'])
+
+    def test_refused_recipient_keeps_session(self):
+        """Test que un rechazo del servidor no descarta la sesión"""
+        self.sender.send_email('a@example.com', 'Asunto', '<p>Hola</p>')
+        conn = self.factory.connections[0]
+        conn.fail_next_send = smtplib.SMTPDataError(554, b'rejected')
+
+        self.assertFalse(self.sender.send_email('b@example.com', 'Asunto', '<p>Hola</p>'))
+        self.assertTrue(self.sender.send_email('c@example.com', 'Asunto', '<p>Hola</p>'))
+
+        self.assertEqual(len(self.factory.connections), 1)
+        self.assertFalse(conn.closed)
+
+    def test_attachment_makes_mixed_message(self):
+        """Test que un adjunto arma multipart/mixed con el cuerpo alternativo"""
+        attachment = {'filename': 'vehiculos.csv', 'content': 'id,placa\n1,SCZ-0001\n', 'mimetype': 'text/csv'}
+        with mock.patch.object(self.sender, '_send_pooled') as send:
+            self.assertTrue(self.sender.send_email(
+                'a@example.com', 'Asunto', '<p>Hola</p>', 'Hola', attachments=[attachment]
+            ))
+
+        msg = send.call_args[0][0]
+        self.assertEqual(msg.get_content_type(), 'multipart/mixed')
+        body, part = msg.get_payload()
+        self.assertEqual(body.get_content_type(), 'multipart/alternative')
+        self.assertEqual(part.get_filename(), 'vehiculos.csv')
+        self.assertEqual(part.get_payload(decode=True).decode('utf-8-sig'), attachment['content'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
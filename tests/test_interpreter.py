@@ -163,6 +163,163 @@ class TestCommandInterpreter(unittest.TestCase):
         self.assertEqual(self.interpreter._get_entity_key('mecanico'), 'usuario')
         self.assertEqual(self.interpreter._get_entity_key('vehiculo'), 'vehiculo')
     
+    def test_dispatch_table(self):
+        """Test tabla de despacho precompilada"""
+        from models.vehiculo import Vehiculo
+        
+        entry = CommandInterpreter.DISPATCH[('vehiculo', 'agregar')]
+        self.assertIs(entry.model, Vehiculo)
+        self.assertEqual(entry.fields, tuple(CommandInterpreter.ENTITY_FIELDS['vehiculo']))
+        self.assertEqual([field for field, _ in entry.validators], ['placa'])
+        
+        self.assertEqual(CommandInterpreter.DISPATCH[('cliente', 'agregar')].entity_key, 'usuario')
+        servicio_validators = dict(CommandInterpreter.DISPATCH[('servicio', 'agregar')].validators)
+        self.assertTrue(servicio_validators['tipo']('mantenimiento'))
+        self.assertFalse(servicio_validators['tipo']('cliente'))
+        self.assertIn(('system', 'ayuda'), CommandInterpreter.DISPATCH)
+        self.assertNotIn(('system', 'mostrar'), CommandInterpreter.DISPATCH)
+    
+    def test_dispatch_table_subclass(self):
+        """Test que las subclases arman su propia tabla"""
+        class FakeModel:
+            @classmethod
+            def find_by_id(cls, id):
+                return {'id': id}
+        
+        class CustomInterpreter(CommandInterpreter):
+            MODELS = {'vehiculo': FakeModel}
+        
+        result = CustomInterpreter().interpret(Command('vehiculo', 'ver', ['5']))
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['data'], {'id': 5})
+        self.assertNotIn(('pago', 'ver'), CustomInterpreter.DISPATCH)
+        self.assertIn(('pago', 'ver'), CommandInterpreter.DISPATCH)
+    
+    def test_handle_importar(self):
+        """Test importación masiva: filas inválidas se reportan, válidas van a bulk_create"""
+        from unittest import mock
+        from models.vehiculo import Vehiculo
+        
+        rows = [
+            (1, [2, 'SCZ-1234', 'Toyota', 'Corolla', 2020, 'Gris', 45000]),
+            (2, [2, 'INVALIDA', 'Honda', 'Civic', 2021, 'Rojo', 30000]),
+            (3, [3, 'LPZ-5678', 'Nissan']),
+            (4, [4, 'CBA-9012', 'Suzuki', 'Swift', 2019, 'Azul', 80000]),
+        ]
+        context = dict(self.context, rows=rows)
+        
+        with mock.patch.object(Vehiculo, 'bulk_create', return_value=[10, 11]) as bulk_create:
+            result = self.interpreter.interpret(Command('vehiculo', 'importar', []), context)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual([row['linea'] for row in result['data']], [2, 3])
+        records = bulk_create.call_args[0][0]
+        self.assertEqual([record['placa'] for record in records], ['SCZ-1234', 'CBA-9012'])
+    
+    def test_handle_importar_unique_codes(self):
+        """Test que cada fila importada de una entidad con código recibe uno distinto"""
+        from unittest import mock
+        from models.pago import Pago
+        
+        rows = [(1, [1, 500, 'contado', 1]), (2, [2, 800, 'credito', 3])]
+        context = dict(self.context, rows=rows)
+        
+        with mock.patch.object(Pago, 'bulk_create', return_value=[20, 21]) as bulk_create:
+            result = self.interpreter.interpret(Command('pago', 'importar', []), context)
+        
+        self.assertTrue(result['success'])
+        codes = [record['codigo'] for record in bulk_create.call_args[0][0]]
+        self.assertEqual(len(set(codes)), 2)
+        self.assertTrue(all(code.startswith('PAG-') for code in codes))
+    
+    def test_handle_importar_without_rows(self):
+        """Test importación sin registros"""
+        result = self.interpreter.interpret(Command('vehiculo', 'importar', []), self.context)
+        self.assertFalse(result['success'])
+    
+    def test_handle_mostrar_pages(self):
+        """Test paginación: LIMIT+1 para detectar más registros y pista de la siguiente página"""
+        from unittest import mock
+        from config.rows import ResultSet
+        from models.usuario import Usuario
+        
+        rows = ResultSet(['id', 'tipo'], [(i, 'cliente') for i in range(1, 4)])
+        with mock.patch.object(Usuario, 'find_page', return_value=rows) as find_page:
+            result = self.interpreter.interpret(
+                Command('usuario', 'mostrar', ['cliente', 'despues=0', 'limite=2'], subtype='cliente'),
+                self.context
+            )
+        
+        find_page.assert_called_once_with(3, 0, 0, {'tipo': 'cliente'}, row_factory=ResultSet)
+        self.assertEqual(len(result['data']), 2)
+        self.assertIn('cliente mostrar [despues=2; limite=2]', result['message'])
+        
+        options = self.interpreter._page_options([3, 10])
+        self.assertEqual((options['offset'], options['limite']), (20, 10))
+        for params in (['pagina=0'], ['orden=id'], ['pagina=2', 'offset=5'], [1, 2, 3]):
+            with self.assertRaises(ValidationError):
+                self.interpreter._page_options(params)
+    
+    def test_handle_reporte_single_query(self):
+        """Test reporte con una consulta agrupada: grupos vacíos en 0 y sumas"""
+        from decimal import Decimal
+        from unittest import mock
+        from models.pago import Pago
+        
+        groups = {
+            'pendiente': {'total': 2, 'monto_total': Decimal('300'), 'monto_pagado': Decimal('0'),
+                          'monto_pendiente': Decimal('300')},
+            'pagado_parcial': {'total': 1, 'monto_total': Decimal('100'), 'monto_pagado': Decimal('40'),
+                               'monto_pendiente': Decimal('60')},
+        }
+        with mock.patch.object(Pago, 'aggregate', return_value=groups) as aggregate, \
+                mock.patch.object(Pago, 'count') as count:
+            result = self.interpreter.interpret(Command('pago', 'reporte', []), self.context)
+        
+        aggregate.assert_called_once_with('estado', ('monto_total', 'monto_pagado', 'monto_pendiente'))
+        count.assert_not_called()
+        data = result['data']
+        self.assertEqual((data['total'], data['estado_pendiente'], data['estado_pagado_total']), (3, 2, 0))
+        self.assertEqual(data['monto_pendiente'], Decimal('360'))
+        self.assertEqual(data['monto_pendiente_pagado_parcial'], Decimal('60'))
+    
+    def test_handle_mostrar_export(self):
+        """Test exportación completa como CSV adjunto"""
+        from unittest import mock
+        from models.vehiculo import Vehiculo
+        
+        def rows(filters, columns=None):
+            yield {'id': 1, 'placa': 'SCZ-0001', 'color': None}
+            yield {'id': 2, 'placa': 'SCZ-0002', 'color': 'Rojo'}
+        
+        with mock.patch.object(Vehiculo, 'iter_all', side_effect=rows):
+            result = self.interpreter.interpret(Command('vehiculo', 'mostrar', ['todos']), self.context)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['data']['registros'], 2)
+        attachment = result['attachments'][0]
+        self.assertEqual(attachment['filename'], 'vehiculos.csv')
+        self.assertEqual(attachment['content'].splitlines(), ['id,placa,color', '1,SCZ-0001,', '2,SCZ-0002,Rojo'])
+    
+    def test_handle_mostrar_export_excludes_password_hash(self):
+        """Test que la exportación de usuarios no pide ni escribe password_hash"""
+        from unittest import mock
+        from models.usuario import Usuario
+        
+        rows = ({'id': i, 'email': f'm{i}@example.com'} for i in (1, 2))
+        with mock.patch.object(Usuario, 'iter_all', return_value=rows) as iter_all:
+            result = self.interpreter.interpret(
+                Command('usuario', 'mostrar', ['mecanico', 'todos'], subtype='mecanico'), self.context
+            )
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['attachments'][0]['filename'], 'mecanicos.csv')
+        columns = iter_all.call_args.kwargs['columns']
+        self.assertNotIn('password_hash', columns)
+        self.assertIn('email', columns)
+        self.assertEqual(iter_all.call_args[0][0], {'tipo': 'mecanico'})
+    
     def test_format_error(self):
         """Test formateo de error"""
         result = self.interpreter. format_error("Test error")
@@ -4,12 +4,14 @@ Tests para el analizador léxico (Lexer y Parser)
 import unittest
 import sys
 import os
+import random
 
 # Agregar directorio raíz al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from lexer.lexer import Lexer, tokenize
-from lexer.parser import Parser, parse_command
+from lexer.lexer import Lexer, CharLexer, tokenize, split_params
+from dataclasses import FrozenInstanceError
+from lexer.parser import Parser, Command, parse_command, parse_cache_info, clear_parse_cache
 from lexer.token import Token, TokenType
 
 class TestLexer(unittest.TestCase):
@@ -49,6 +51,12 @@ class TestLexer(unittest.TestCase):
         string_tokens = [t for t in tokens if t.type == TokenType.STRING]
         self.assertIn('José María', [t.value for t in string_tokens])
     
+    def test_split_params(self):
+        """Test separación de una línea de parámetros (importación)"""
+        self.assertEqual(split_params("[2; SCZ-1234; Toyota; 2020]"), [2, 'SCZ-1234', 'Toyota', 2020])
+        self.assertEqual(split_params(" Ana ; ana@mail.com;; 7.5 "), ['Ana', 'ana@mail.com', 7.5])
+        self.assertEqual(split_params(""), [])
+    
     def test_keywords_case_insensitive(self):
         """Test que keywords son case-insensitive"""
         tokens1 = tokenize("USUARIO MOSTRAR")
@@ -59,6 +67,32 @@ class TestLexer(unittest.TestCase):
         self.assertEqual(tokens2[0].type, TokenType. USUARIO)
         self.assertEqual(tokens3[0].type, TokenType.USUARIO)
 
+class TestLexerDifferential(unittest.TestCase):
+    """Compara Lexer con la implementación anterior (CharLexer) sobre un corpus aleatorio"""
+    
+    FRAGMENTS = [
+        'usuario', 'Cliente', 'MOSTRAR', 'agregar', 'ver', 'help', 'pago', 'reporte',
+        '[', ']', ';', ' ', '  ', '\t', '\n', '\u00a0', '\x1c',
+        '1', '42', '-7', '+3', '1.5', '.5', '1.', '1.2.3', '1e3', '2.5e-1', '1_000', 'nan', 'inf',
+        'Juan', 'José María', 'juan@mail.com', 'SCZ-1234', '2025-01-15', '09:00', 'ñ', '_', '.',
+    ]
+    
+    def assertSameTokens(self, text):
+        self.assertEqual(Lexer(text).tokenize(), CharLexer(text).tokenize(), repr(text))
+    
+    def test_fuzzed_corpus(self):
+        """Test que ambos lexers producen los mismos tokens y posiciones"""
+        rng = random.Random(20240115)
+        for _ in range(3000):
+            text = ''.join(rng.choice(self.FRAGMENTS) for _ in range(rng.randint(0, 25)))
+            self.assertSameTokens(text)
+    
+    def test_edge_cases(self):
+        """Test casos límite: vacío, corchetes sin cerrar, separadores sueltos"""
+        for text in ['', '   ', '[', ']', ';', '[]', '[;;]', '[ a ; ; b', 'a]b;c', 'x [1] [2]', '[[a]]']:
+            self.assertSameTokens(text)
+
+
 class TestParser(unittest.TestCase):
     """Tests para el Parser"""
     
@@ -133,6 +167,55 @@ class TestParser(unittest.TestCase):
         self.assertEqual(command.entity, 'mecanico')
         self.assertEqual(command.action, 'mostrar')
 
+class TestParseCache(unittest.TestCase):
+    """Tests para el caché de comandos parseados"""
+    
+    def setUp(self):
+        clear_parse_cache()
+    
+    def test_repeated_subject_is_cached(self):
+        """Test que un asunto repetido no se vuelve a parsear"""
+        first = parse_command("cita mostrar")
+        second = parse_command("  cita mostrar ")
+        
+        self.assertIs(first, second)
+        info = parse_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+    
+    def test_invalid_subject_is_cached(self):
+        """Test que los asuntos inválidos también se recuerdan"""
+        self.assertIsNone(parse_command("hola"))
+        self.assertIsNone(parse_command("hola"))
+        
+        self.assertEqual(parse_cache_info().hits, 1)
+    
+    def test_command_is_immutable(self):
+        """Test que el comando compartido no puede modificarse"""
+        command = parse_command("usuario ver [5]")
+        
+        self.assertEqual(command.params, (5,))
+        with self.assertRaises(FrozenInstanceError):
+            command.action = 'eliminar'
+    
+    def test_slotted_types(self):
+        """Test que Token y Command no tienen __dict__ y el parser no copia los tokens"""
+        tokens = tokenize("usuario ver [5]")
+        parser = Parser(tokens)
+        command = parser.parse()
+        
+        self.assertFalse(hasattr(tokens[0], '__dict__'))
+        self.assertFalse(hasattr(command, '__dict__'))
+        self.assertIs(parser.tokens, tokens)
+        with self.assertRaises(AttributeError):
+            tokens[0].value = 'cita'
+    
+    def test_list_params_are_converted(self):
+        """Test que los parámetros en lista se guardan como tupla"""
+        command = Command('usuario', 'agregar', ['Juan', 'juan@mail.com'])
+        
+        self.assertEqual(command.params, ('Juan', 'juan@mail.com'))
+        self.assertEqual(hash(command), hash(Command('usuario', 'agregar', ('Juan', 'juan@mail.com'))))
+
 class TestTokenTypes(unittest.TestCase):
     """Tests para tipos de tokens"""
     
@@ -0,0 +1,156 @@
+"""
+Tests para el administrador de sesiones de correo
+"""
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.mail_session import MailSessionManager
+
+
+class FakeReader:
+    """Fuente de correo falsa que simula conexiones"""
+
+    def __init__(self, connect_results=None):
+        self.pop3 = None
+        self.pending_deletions = 0
+        self.last_connect_timings = {}
+        self.connect_results = list(connect_results or [])
+        self.connect_calls = 0
+        self.disconnect_calls = 0
+        self.alive = True
+
+    def connect(self):
+        self.connect_calls += 1
+        ok = self.connect_results.pop(0) if self.connect_results else True
+        if ok:
+            self.pop3 = object()
+            self.last_connect_timings = {'handshake_ms': 40.0, 'auth_ms': 10.0}
+        return ok
+
+    def disconnect(self):
+        self.disconnect_calls += 1
+        self.pop3 = None
+        self.pending_deletions = 0
+
+    def is_connected(self):
+        return self.pop3 is not None
+
+    def ping(self):
+        return self.pop3 is not None and self.alive
+
+    def session_settings(self):
+        return {'keep_alive': False, 'max_age': 300}
+
+
+class TestMailSessionManager(unittest.TestCase):
+    """Tests para la reutilización y reconexión de sesiones"""
+
+    def make_manager(self, reader, **kwargs):
+        options = {'keep_alive': True, 'max_age': 300, 'backoff_base': 5, 'backoff_max': 60}
+        options.update(kwargs)
+        return MailSessionManager(reader, **options)
+
+    def test_session_reused_between_cycles(self):
+        """Test que la sesión se reutiliza si sigue viva"""
+        reader = FakeReader()
+        manager = self.make_manager(reader)
+
+        for _ in range(3):
+            self.assertTrue(manager.acquire())
+            manager.release()
+
+        self.assertEqual(reader.connect_calls, 1)
+        self.assertEqual(manager.get_metrics()['reuses'], 2)
+
+    def test_without_keep_alive_disconnects_each_cycle(self):
+        """Test que sin keep-alive se conecta y desconecta en cada ciclo"""
+        reader = FakeReader()
+        manager = self.make_manager(reader, keep_alive=False)
+
+        for _ in range(2):
+            self.assertTrue(manager.acquire())
+            manager.release()
+
+        self.assertEqual(reader.connect_calls, 2)
+        self.assertEqual(reader.disconnect_calls, 2)
+
+    def test_dead_session_reconnects(self):
+        """Test que una sesión que no responde a NOOP se reemplaza"""
+        reader = FakeReader()
+        manager = self.make_manager(reader)
+
+        manager.acquire()
+        manager.release()
+        reader.alive = False
+
+        self.assertTrue(manager.acquire())
+        self.assertEqual(reader.connect_calls, 2)
+
+    def test_pending_deletions_force_quit(self):
+        """Test que las eliminaciones pendientes cierran la sesión (QUIT confirma DELE)"""
+        reader = FakeReader()
+        manager = self.make_manager(reader)
+
+        manager.acquire()
+        reader.pending_deletions = 1
+        manager.release()
+
+        self.assertIsNone(reader.pop3)
+
+    def test_old_session_is_renewed(self):
+        """Test que una sesión más vieja que max_age se renueva"""
+        reader = FakeReader()
+        manager = self.make_manager(reader, max_age=10)
+
+        with mock.patch('services.mail_session.time.monotonic', side_effect=[0, 0, 20, 20]):
+            manager.acquire()
+            manager.release()
+            manager.acquire()
+
+        self.assertEqual(reader.connect_calls, 2)
+
+    def test_backoff_after_failures(self):
+        """Test que tras un fallo no se reintenta hasta que pase el backoff"""
+        reader = FakeReader(connect_results=[False, False, True])
+        manager = self.make_manager(reader)
+
+        with mock.patch('services.mail_session.time.monotonic') as monotonic:
+            monotonic.return_value = 0
+            self.assertFalse(manager.acquire())
+
+            monotonic.return_value = 3
+            self.assertFalse(manager.acquire())
+            self.assertEqual(reader.connect_calls, 1)
+
+            monotonic.return_value = 6
+            self.assertFalse(manager.acquire())
+            self.assertEqual(reader.connect_calls, 2)
+
+            # Segundo fallo: el backoff se duplica a 10s
+            monotonic.return_value = 12
+            self.assertFalse(manager.acquire())
+            monotonic.return_value = 17
+            self.assertTrue(manager.acquire())
+
+        self.assertEqual(manager.get_metrics()['failures'], 2)
+        self.assertEqual(manager.get_metrics()['consecutive_failures'], 0)
+
+    def test_latency_metrics(self):
+        """Test que se registran las latencias de handshake y autenticación"""
+        reader = FakeReader()
+        manager = self.make_manager(reader, keep_alive=False)
+
+        manager.acquire()
+        metrics = manager.get_metrics()
+
+        self.assertEqual(metrics['last_handshake_ms'], 40.0)
+        self.assertEqual(metrics['avg_auth_ms'], 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
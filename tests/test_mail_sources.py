@@ -0,0 +1,192 @@
+"""
+Tests de las fuentes de correo (POP3 e IMAP IDLE) contra servidores en proceso
+"""
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services.mail_source import MailSource, create_mail_source
+from services.mail_session import MailSessionManager
+from services.email_reader import EmailReader
+from services.imap_reader import IMAPEmailReader
+from tests.mail_stubs import StubPOP3Server, StubIMAPServer
+from tests.test_email_reader import build_message
+
+
+class MailSourceTestCase(unittest.TestCase):
+    """Base: aísla el archivo de procesados y aplica parches de configuración"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.patch_settings(PROCESSED_EMAILS_FILE=os.path.join(self.tmpdir.name, 'processed.txt'))
+
+    def patch_settings(self, **values):
+        for name, value in values.items():
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestMailSourceFactory(MailSourceTestCase):
+    """Tests para la selección de la fuente de correo"""
+
+    def test_pop3_is_default_source(self):
+        """Test que MAIL_SOURCE=pop3 crea un EmailReader"""
+        self.patch_settings(MAIL_SOURCE='pop3')
+        source = create_mail_source()
+
+        self.assertIsInstance(source, EmailReader)
+        self.assertIsInstance(source, MailSource)
+
+    def test_imap_source(self):
+        """Test que MAIL_SOURCE=imap crea un IMAPEmailReader"""
+        self.patch_settings(MAIL_SOURCE='imap')
+        self.assertIsInstance(create_mail_source(), IMAPEmailReader)
+
+    def test_invalid_source(self):
+        """Test que una fuente desconocida es un error de configuración"""
+        self.patch_settings(MAIL_SOURCE='mapi')
+        with self.assertRaises(ValueError):
+            create_mail_source()
+
+
+class TestPOP3Source(MailSourceTestCase):
+    """Tests de EmailReader contra el servidor POP3 en proceso"""
+
+    def setUp(self):
+        super().setUp()
+        self.server = StubPOP3Server([build_message(1), build_message(2)]).start()
+        self.addCleanup(self.server.stop)
+        self.patch_settings(
+            POP3_HOST='127.0.0.1', POP3_PORT=self.server.port, POP3_USE_SSL=False,
+            POP3_USER=self.server.user, POP3_PASSWORD=self.server.password,
+            POP3_USE_UIDL=True, POP3_HEADER_PREFILTER=False,
+        )
+
+    def test_fetch_and_skip_processed(self):
+        """Test descarga de correos nuevos y omisión por UID en la siguiente sesión"""
+        reader = EmailReader()
+        self.assertTrue(reader.connect())
+        emails = reader.get_new_emails()
+        for email_data in emails:
+            reader.mark_as_processed(email_data)
+        reader.disconnect()
+
+        self.assertEqual(sorted(e['subject'] for e in emails), ['usuario mostrar'] * 2)
+
+        self.server.add_message(build_message(3, subject='cita reporte'))
+        self.server.commands.clear()
+
+        self.assertTrue(reader.connect())
+        emails = reader.get_new_emails()
+        reader.disconnect()
+
+        self.assertEqual([e['subject'] for e in emails], ['cita reporte'])
+        self.assertEqual([c for c in self.server.commands if c.startswith('RETR')], ['RETR 3'])
+
+    def test_session_manager_reuses_connection(self):
+        """Test que el administrador de sesión reutiliza la conexión POP3"""
+        reader = EmailReader()
+        session = MailSessionManager(reader, keep_alive=True, max_age=60)
+
+        self.assertTrue(session.acquire())
+        session.release()
+        self.assertTrue(session.acquire())
+        session.close()
+
+        self.assertEqual(len([c for c in self.server.commands if c.startswith('USER')]), 1)
+        self.assertIn('NOOP', self.server.commands)
+
+
+class TestIMAPSource(MailSourceTestCase):
+    """Tests de IMAPEmailReader contra el servidor IMAP en proceso"""
+
+    def setUp(self):
+        super().setUp()
+        self.server = StubIMAPServer([build_message(1)]).start()
+        self.addCleanup(self.server.stop)
+        self.patch_settings(
+            IMAP_HOST='127.0.0.1', IMAP_PORT=self.server.port, IMAP_USE_SSL=False,
+            IMAP_USER=self.server.user, IMAP_PASSWORD=self.server.password,
+            IMAP_MAILBOX='INBOX', IMAP_USE_IDLE=True, IMAP_IDLE_TIMEOUT=5,
+            POP3_HEADER_PREFILTER=False,
+        )
+        self.reader = IMAPEmailReader()
+        self.assertTrue(self.reader.connect())
+        self.addCleanup(self.reader.disconnect)
+
+    def test_fetch_new_emails(self):
+        """Test descarga de correos por UID"""
+        emails = self.reader.get_new_emails()
+
+        self.assertEqual(len(emails), 1)
+        self.assertEqual(emails[0]['uid'], 'imap:1:1')
+        self.assertEqual(emails[0]['from_email'], 'cliente@example.com')
+
+        self.reader.mark_as_processed(emails[0])
+        self.assertEqual(self.reader.get_new_emails(), [])
+
+    def test_idle_wakes_on_new_mail(self):
+        """Test que IDLE retorna apenas llega un correo"""
+        self.reader.mark_as_processed(self.reader.get_new_emails()[0])
+        timer = threading.Timer(0.2, self.server.deliver, args=[build_message(2, subject='pago reporte')])
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        started = time.monotonic()
+        woke = self.reader.wait_for_mail(30, threading.Event())
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(woke)
+        self.assertLess(elapsed, 3)
+        self.assertTrue(self.reader.ping())
+        self.assertEqual([e['subject'] for e in self.reader.get_new_emails()], ['pago reporte'])
+
+    def test_idle_sees_notice_sent_with_continuation(self):
+        """Test que un EXISTS que llega junto con "+ idling" no espera al timeout"""
+        self.server.idle_notices = ['* 2 EXISTS']
+
+        started = time.monotonic()
+        woke = self.reader.wait_for_mail(30, threading.Event())
+
+        self.assertTrue(woke)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(self.reader.ping())
+
+    def test_idle_times_out(self):
+        """Test que IDLE termina al cumplirse IMAP_IDLE_TIMEOUT sin correo"""
+        self.patch_settings(IMAP_IDLE_TIMEOUT=0.5)
+
+        self.assertFalse(self.reader.wait_for_mail(30, threading.Event()))
+        self.assertTrue(self.reader.ping())
+
+    def test_idle_honors_stop_event(self):
+        """Test que IDLE termina cuando se pide detener el daemon"""
+        stop_event = threading.Event()
+        threading.Timer(0.2, stop_event.set).start()
+
+        started = time.monotonic()
+        self.assertFalse(self.reader.wait_for_mail(30, stop_event))
+        self.assertLess(time.monotonic() - started, 3)
+
+    def test_delete_email(self):
+        """Test eliminación con STORE \\Deleted + EXPUNGE"""
+        self.patch_settings(POP3_DELETE_AFTER_READ=True)
+        email_data = self.reader.get_new_emails()[0]
+
+        self.reader.delete_email(email_data['index'])
+
+        self.assertEqual(self.server.messages, {})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,225 @@
+"""
+Tests para el parseo MIME en streaming
+"""
+import unittest
+import sys
+import os
+import base64
+import email
+from email import encoders
+import tempfile
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services.email_reader import EmailReader
+from services.mime_stream import (
+    CsvAttachment, StreamingMessageBuilder, extract_csv_attachments, parse_message_bytes, parse_message_with_csv, split_lines
+)
+from tests.mail_stubs import StubPOP3Server
+
+
+ATTACHMENT = os.urandom(256 * 1024)
+
+
+def build_multipart(html_first=False, with_plain=True) -> bytes:
+    """Correo multipart/mixed con cuerpo alternativo y un adjunto binario"""
+    alternative = MIMEMultipart('alternative')
+    parts = [MIMEText('<p>Hola <b>HTML</b></p>', 'html', 'utf-8')]
+    if with_plain:
+        parts.insert(0, MIMEText('cita agregar\n.línea con punto', 'plain', 'utf-8'))
+    for part in (reversed(parts) if html_first else parts):
+        alternative.attach(part)
+
+    message = MIMEMultipart('mixed')
+    message['From'] = 'Cliente <cliente@example.com>'
+    message['Subject'] = 'usuario mostrar'
+    message['Message-ID'] = '<multi-1@example.com>'
+    message.attach(alternative)
+    message.attach(MIMEApplication(ATTACHMENT, Name='factura.pdf'))
+    message.get_payload()[1].add_header('Content-Disposition', 'attachment', filename='factura.pdf')
+    return message.as_bytes().replace(b'\n', b'\r\n')
+
+
+class TestStreamingMessageBuilder(unittest.TestCase):
+    """Tests para StreamingMessageBuilder"""
+
+    def parse(self, raw):
+        builder = StreamingMessageBuilder().feed_lines(split_lines(raw))
+        return builder, builder.close()
+
+    def test_attachment_payload_is_dropped(self):
+        """Test que el adjunto conserva sus headers pero no su contenido"""
+        builder, message = self.parse(build_multipart())
+        parts = list(message.walk())
+        attachment = [p for p in parts if p.get_content_type() == 'application/octet-stream'][0]
+
+        self.assertEqual(attachment.get_filename(), 'factura.pdf')
+        self.assertEqual(attachment.get_payload(), '')
+        self.assertGreater(builder.skipped_bytes, len(ATTACHMENT))
+
+    def test_stops_after_first_plain_body(self):
+        """Test que después del primer text/plain no se conservan más cuerpos"""
+        _, message = self.parse(build_multipart())
+        plain, html = [p for p in message.walk() if p.get_content_maintype() == 'text']
+
+        self.assertIn('cita agregar', plain.get_payload(decode=True).decode('utf-8'))
+        self.assertEqual(html.get_payload(), '')
+
+    def test_html_before_plain_is_kept(self):
+        """Test que el HTML previo al texto plano se conserva como fallback"""
+        _, message = self.parse(build_multipart(html_first=True))
+        bodies = {p.get_content_type(): p.get_payload(decode=True) for p in message.walk() if p.get_content_maintype() == 'text'}
+
+        self.assertTrue(bodies['text/html'])
+        self.assertTrue(bodies['text/plain'])
+
+    def test_headers_and_structure(self):
+        """Test que los headers principales y la estructura se mantienen"""
+        message = parse_message_bytes(build_multipart())
+
+        self.assertEqual(message['Subject'], 'usuario mostrar')
+        self.assertEqual(
+            [p.get_content_type() for p in message.walk()],
+            ['multipart/mixed', 'multipart/alternative', 'text/plain', 'text/html', 'application/octet-stream']
+        )
+
+
+CSV_DATA = ('cliente_id;placa;marca;modelo;anio;color;kilometraje\r\n'
+            + ''.join(f'{i};SCZ-{i:04d};Toyota;Corolla;2020;Gris;{i * 10}\r\n' for i in range(2000))
+            + 'fin;"con ""comillas""";ñandú;=;;;').encode('utf-8')
+
+
+def build_with_csv(encoding) -> bytes:
+    """Correo con cuerpo de texto y un adjunto CSV codificado con ``encoding``"""
+    message = MIMEMultipart('mixed')
+    message['Subject'] = 'vehiculo agregar'
+    message.attach(MIMEText('ver adjunto', 'plain', 'utf-8'))
+    encoder = encoders.encode_base64 if encoding == 'base64' else encoders.encode_quopri
+    attachment = MIMEApplication(CSV_DATA, 'csv', _encoder=encoder)
+    attachment.add_header('Content-Disposition', 'attachment', filename='vehiculos.csv')
+    message.attach(attachment)
+    return message.as_bytes().replace(b'\n', b'\r\n')
+
+
+class TestCsvAttachments(unittest.TestCase):
+    """Tests para la extracción de adjuntos CSV"""
+
+    def read(self, attachment):
+        data = attachment.open_binary().read()
+        attachment.close()
+        return data
+
+    def test_streaming_decode_base64_and_qp(self):
+        """Test que el CSV se decodifica en streaming igual que el original"""
+        for encoding in ('base64', 'quoted-printable'):
+            with self.subTest(encoding=encoding):
+                message, attachments = parse_message_with_csv(split_lines(build_with_csv(encoding)))
+
+                self.assertEqual(len(attachments), 1)
+                self.assertEqual(attachments[0].filename, 'vehiculos.csv')
+                self.assertEqual(self.read(attachments[0]), CSV_DATA)
+                self.assertEqual(message.get_payload()[0].get_payload(decode=True), b'ver adjunto')
+
+    def test_same_as_full_parse(self):
+        """Test que el parseo completo extrae el mismo contenido"""
+        raw = build_with_csv('base64')
+        attachments = extract_csv_attachments(email.message_from_bytes(raw))
+        self.assertEqual(self.read(attachments[0]), CSV_DATA)
+
+    def test_csv_dropped_without_keep_csv(self):
+        """Test que sin keep_csv el CSV se descarta como cualquier adjunto"""
+        builder = StreamingMessageBuilder().feed_lines(split_lines(build_with_csv('base64')))
+        builder.close()
+        self.assertEqual(builder.attachments, [])
+        self.assertGreater(builder.skipped_bytes, len(CSV_DATA))
+
+    def test_size_limit(self):
+        """Test que un CSV más grande que el máximo queda truncado"""
+        with mock.patch.object(settings, 'CSV_IMPORT_MAX_BYTES', 1024):
+            _, attachments = parse_message_with_csv(split_lines(build_with_csv('base64')))
+        self.assertTrue(attachments[0].truncated)
+        self.assertLessEqual(len(self.read(attachments[0])), 1024)
+
+    def test_failed_parse_closes_attachments(self):
+        """Test que si el parseo falla a mitad se cierran los CSV ya creados"""
+        def broken_lines():
+            lines = list(split_lines(build_with_csv('base64')))
+            yield from lines[:-3]
+            raise ConnectionResetError('conexión cortada')
+
+        with mock.patch.object(CsvAttachment, 'close', autospec=True) as close:
+            with self.assertRaises(ConnectionResetError):
+                parse_message_with_csv(broken_lines())
+
+        self.assertEqual(close.call_count, 1)
+
+
+class TestStreamingFetch(unittest.TestCase):
+    """Tests de la descarga POP3 en streaming contra el servidor en proceso"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.server = StubPOP3Server([build_multipart(), build_multipart(with_plain=False)]).start()
+        self.addCleanup(self.server.stop)
+
+        values = dict(
+            PROCESSED_EMAILS_FILE=os.path.join(tmpdir.name, 'processed.txt'),
+            POP3_HOST='127.0.0.1', POP3_PORT=self.server.port, POP3_USE_SSL=False,
+            POP3_USER=self.server.user, POP3_PASSWORD=self.server.password,
+            POP3_USE_UIDL=True, POP3_HEADER_PREFILTER=False,
+        )
+        for name, value in values.items():
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fetch(self, streaming):
+        with mock.patch.object(settings, 'MAIL_STREAMING_PARSE', streaming):
+            reader = EmailReader()
+            self.assertTrue(reader.connect())
+            emails = [reader._fetch_email(1), reader._fetch_email(2)]
+            self.assertTrue(reader.ping())
+            reader.disconnect()
+        return emails
+
+    def test_same_result_as_full_parse(self):
+        """Test que el streaming extrae lo mismo que el parseo completo"""
+        streamed = self.fetch(True)
+        full = self.fetch(False)
+
+        for a, b in zip(streamed, full):
+            self.assertEqual(
+                (a['hash'], a['from_email'], a['subject'], a['body']),
+                (b['hash'], b['from_email'], b['subject'], b['body'])
+            )
+        self.assertIn('.línea con punto', streamed[0]['body'])
+        self.assertEqual(streamed[1]['body'], 'Hola HTML')
+
+    def test_parse_error_keeps_session_in_sync(self):
+        """Test que si el parseo falla a mitad del RETR se lee el resto de la respuesta"""
+        def failing_parse(lines):
+            next(lines)
+            next(lines)
+            raise ValueError('parte MIME inválida')
+
+        with mock.patch.object(settings, 'MAIL_STREAMING_PARSE', True):
+            reader = EmailReader()
+            self.assertTrue(reader.connect())
+            with mock.patch('services.email_reader.parse_message_with_csv', failing_parse):
+                self.assertIsNone(reader._fetch_email(1))
+            email_data = reader._fetch_email(2)
+            self.assertTrue(reader.ping())
+            reader.disconnect()
+
+        self.assertEqual(email_data['body'], 'Hola HTML')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -221,6 +221,228 @@ class TestBaseModelMethods(unittest.TestCase):
         print(f"  ✅ Nombres de tabla correctos")
 
 
+class FakeCursor:
+    """Cursor falso: registra queries y datos de COPY"""
+    
+    def __init__(self):
+        self.queries = []
+        self.copied = []
+        self.next_id = 100
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+        self.result = [(self.next_id + i,) for i in range(params[1])]
+    
+    def fetchall(self):
+        return self.result
+    
+    def copy_expert(self, sql, buffer):
+        self.copied.append((sql, buffer.read()))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_obj = FakeCursor()
+        self.commits = 0
+    
+    def cursor(self):
+        return self.cursor_obj
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        pass
+
+
+class TestBulkCreate(unittest.TestCase):
+    """Tests para inserción masiva (sin BD)"""
+    
+    def setUp(self):
+        from unittest import mock
+        from config.database import db
+        
+        self.conn = FakeConnection()
+        for patch in (mock.patch.object(db, 'get_connection', return_value=self.conn),
+                      mock.patch.object(db, 'return_connection')):
+            patch.start()
+            self.addCleanup(patch.stop)
+    
+    def test_bulk_create_values(self):
+        """Test INSERT multi-fila: IDs en orden y DEFAULT para columnas ausentes"""
+        from unittest import mock
+        from models.base import DEFAULT
+        
+        rows = [
+            {'nombre': 'Cambio de aceite', 'precio_base': 150, 'ignorado': 1},
+            {'nombre': 'Alineación', 'precio_base': 80, 'descripcion': 'Tren delantero'},
+        ]
+        with mock.patch('models.base.execute_values', return_value=[(100,), (101,)]) as execute_values:
+            ids = Servicio.bulk_create(rows)
+        
+        self.assertEqual(ids, [100, 101])
+        self.assertEqual(self.conn.commits, 1)
+        _, query, values = execute_values.call_args[0]
+        self.assertEqual(query, "INSERT INTO servicios (nombre, descripcion, precio_base) VALUES %s RETURNING id")
+        self.assertEqual(values, [('Cambio de aceite', DEFAULT, 150), ('Alineación', 'Tren delantero', 80)])
+    
+    def test_bulk_create_copy(self):
+        """Test COPY para cargas grandes: IDs reservados y NULL vs cadena vacía"""
+        from unittest import mock
+        
+        rows = [
+            {'cliente_id': 1, 'placa': f'SCZ-{i:04d}', 'marca': 'Toyota', 'modelo': '',
+             'anio': 2020, 'color': None, 'kilometraje': 1000}
+            for i in range(3)
+        ]
+        with mock.patch('config.settings.settings.BULK_COPY_THRESHOLD', 2):
+            ids = Vehiculo.bulk_create(rows)
+        
+        cursor = self.conn.cursor_obj
+        self.assertEqual(ids, [100, 101, 102])
+        self.assertIn('nextval', cursor.queries[0][0])
+        self.assertEqual(len(cursor.copied), 2)  # páginas de 2 filas
+        sql, data = cursor.copied[0]
+        self.assertTrue(sql.startswith('COPY vehiculos (id, cliente_id, placa'))
+        self.assertEqual(data.splitlines()[0], '100,1,"SCZ-0000","Toyota","",2020,,1000')
+    
+    def test_bulk_create_empty(self):
+        """Test sin filas no se ejecuta nada"""
+        self.assertEqual(Vehiculo.bulk_create([]), [])
+        self.assertEqual(self.conn.cursor_obj.queries, [])
+
+
+class TestFilters(unittest.TestCase):
+    """Tests para filtros, proyección y orden en find_all/count (sin BD)"""
+    
+    def setUp(self):
+        from unittest import mock
+        from config.database import db
+        
+        patch = mock.patch.object(db, 'execute', return_value=None)
+        self.execute = patch.start()
+        self.addCleanup(patch.stop)
+    
+    def test_find_all_filters(self):
+        """Test WHERE parametrizado: igualdad, lista, NULL y comparación"""
+        result = Cita.find_all(
+            {'estado': ['pendiente', 'confirmada'], 'vehiculo_id': None, 'fecha__gte': '2024-01-01', 'cliente_id': 3},
+            columns=['id', 'fecha'], order_by=['-fecha', 'id'], limit=10
+        )
+        
+        self.assertEqual(result, [])
+        query, params = self.execute.call_args[0]
+        self.assertEqual(
+            query,
+            "SELECT id, fecha FROM citas WHERE estado = ANY(%s) AND vehiculo_id IS NULL "
+            "AND fecha >= %s AND cliente_id = %s ORDER BY fecha DESC, id LIMIT %s"
+        )
+        self.assertEqual(params, (['pendiente', 'confirmada'], '2024-01-01', 3, 10))
+    
+    def test_count_filters(self):
+        """Test COUNT con filtros"""
+        self.execute.return_value = {'total': 7}
+        
+        self.assertEqual(Usuario.count({'tipo': 'cliente'}), 7)
+        self.assertEqual(
+            self.execute.call_args[0],
+            ("SELECT COUNT(*) as total FROM usuarios WHERE tipo = %s", ('cliente',))
+        )
+    
+    def test_aggregate(self):
+        """Test GROUP BY con conteo y sumas en una sola consulta"""
+        self.execute.return_value = [{'grupo': 'completada', 'total': 2, 'subtotal': 500}]
+        
+        from models.orden_trabajo import OrdenTrabajo
+        groups = OrdenTrabajo.aggregate('estado', ['subtotal'])
+        
+        self.assertEqual(groups, {'completada': {'total': 2, 'subtotal': 500}})
+        self.assertEqual(
+            self.execute.call_args[0][0],
+            "SELECT estado AS grupo, COUNT(*) AS total, COALESCE(SUM(subtotal), 0) AS subtotal "
+            "FROM ordenes_trabajo GROUP BY estado"
+        )
+    
+    def test_invalid_columns(self):
+        """Test que columnas y operadores desconocidos se rechazan antes de armar el SQL"""
+        for kwargs in ({'filters': {'estado; --': 1}}, {'columns': ['*']},
+                       {'order_by': '-nombre'}, {'filters': {'id__like': 1}}):
+            with self.assertRaises(ValueError):
+                Vehiculo.find_all(**kwargs)
+        self.execute.assert_not_called()
+
+
+class FakeNamedCursor(FakeCursor):
+    """Cursor con nombre falso: entrega filas y cuenta cierres"""
+    
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+        self.description = [('id',), ('placa',)]
+        self.closed = False
+    
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+    
+    def __iter__(self):
+        return iter(self.rows)
+    
+    def __exit__(self, *exc):
+        self.closed = True
+        return False
+
+
+class TestPagination(unittest.TestCase):
+    """Tests para paginación y recorrido con cursor del servidor (sin BD)"""
+    
+    def test_find_page_offset_and_keyset(self):
+        """Test LIMIT/OFFSET y cursor por ID con filtros"""
+        from unittest import mock
+        from config.database import db
+        
+        with mock.patch.object(db, 'execute', return_value=[]) as execute:
+            Vehiculo.find_page(10, offset=20)
+            Usuario.find_page(5, offset=20, after_id=42, filters={'tipo': 'cliente'})
+        
+        self.assertEqual(
+            execute.call_args_list[0][0],
+            ("SELECT * FROM vehiculos ORDER BY id LIMIT %s OFFSET %s", (10, 20))
+        )
+        self.assertEqual(
+            execute.call_args_list[1][0],
+            ("SELECT * FROM usuarios WHERE tipo = %s AND id > %s ORDER BY id LIMIT %s", ('cliente', 42, 5))
+        )
+        with self.assertRaises(ValueError):
+            Vehiculo.find_page(10, filters={'1; DROP TABLE vehiculos': 1})
+    
+    def test_iter_all_named_cursor(self):
+        """Test que iter_all usa un cursor con nombre y lo cierra al cortar"""
+        from unittest import mock
+        from config.database import db
+        
+        cursor = FakeNamedCursor([(1, 'SCZ-0001'), (2, 'SCZ-0002')])
+        conn = FakeConnection()
+        conn.cursor = mock.Mock(return_value=cursor)
+        
+        with mock.patch.object(db, 'get_connection', return_value=conn), \
+                mock.patch.object(db, 'return_connection') as return_connection:
+            rows = Vehiculo.iter_all(batch_size=500)
+            self.assertEqual(next(rows), {'id': 1, 'placa': 'SCZ-0001'})
+            rows.close()
+        
+        self.assertIn('name', conn.cursor.call_args[1])
+        self.assertEqual(cursor.itersize, 500)
+        self.assertEqual(cursor.queries, [("SELECT * FROM vehiculos ORDER BY id", ())])
+        self.assertTrue(cursor.closed)
+        return_connection.assert_called_once_with(conn)
+
+
 # ============================================================================
 # TESTS DE INTEGRACIÓN CON BD
 # ============================================================================
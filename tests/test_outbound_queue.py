@@ -0,0 +1,209 @@
+"""
+Tests para la cola persistente de respuestas
+"""
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.outbound_queue import OutboundQueue, OutboundSender
+from tests.test_daemon import build_daemon, make_email
+
+
+def make_payload(to_email='cliente@example.com', data=None):
+    return {
+        'to_email': to_email,
+        'command': 'usuario mostrar',
+        'success': True,
+        'message': 'ok',
+        'data': data,
+        'in_reply_to': '<msg-1@example.com>',
+    }
+
+
+class OutboundTestCase(unittest.TestCase):
+    """Base: cola en un directorio temporal"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.queue = OutboundQueue(
+            os.path.join(self.tmpdir.name, 'outbound.db'),
+            max_attempts=3, backoff_base=0, backoff_max=0
+        )
+        self.addCleanup(self.queue.close)
+
+
+class TestOutboundQueue(OutboundTestCase):
+    """Tests para OutboundQueue"""
+
+    def test_enqueue_is_idempotent(self):
+        """Test que la misma clave se encola una sola vez"""
+        self.assertTrue(self.queue.enqueue('<msg-1@example.com>', make_payload()))
+        self.assertFalse(self.queue.enqueue('<msg-1@example.com>', make_payload()))
+
+        self.assertTrue(self.queue.contains('<msg-1@example.com>'))
+        self.assertEqual(len(self.queue.fetch_due(10)), 1)
+
+    def test_payload_serialization(self):
+        """Test que fechas y decimales de la base de datos se serializan"""
+        self.queue.enqueue('k', make_payload(data=[{'fecha': date(2024, 1, 2), 'monto': Decimal('10.50')}]))
+
+        _, payload, _ = self.queue.fetch_due(1)[0]
+
+        self.assertEqual(payload['data'], [{'fecha': '2024-01-02', 'monto': '10.50'}])
+
+    def test_retry_then_failed(self):
+        """Test que los fallos se reintentan hasta agotar los intentos"""
+        self.queue.enqueue('k', make_payload())
+
+        for _ in range(2):
+            row_id, _, attempts = self.queue.fetch_due(1)[0]
+            self.assertFalse(self.queue.mark_failed(row_id, attempts, 'timeout'))
+
+        row_id, _, attempts = self.queue.fetch_due(1)[0]
+        self.assertTrue(self.queue.mark_failed(row_id, attempts, 'timeout'))
+
+        self.assertEqual(self.queue.fetch_due(1), [])
+        self.assertEqual(self.queue.get_stats()['failed'], 1)
+
+    def test_backoff_delays_retry(self):
+        """Test que un reintento no se entrega antes de su backoff"""
+        self.queue.backoff_base = self.queue.backoff_max = 60
+        self.queue.enqueue('k', make_payload())
+        row_id, _, attempts = self.queue.fetch_due(1)[0]
+
+        self.queue.mark_failed(row_id, attempts, 'timeout')
+
+        self.assertEqual(self.queue.fetch_due(1), [])
+
+    def test_survives_restart(self):
+        """Test que las respuestas pendientes persisten al reabrir la cola"""
+        self.queue.enqueue('k', make_payload())
+        self.queue.close()
+
+        reopened = OutboundQueue(self.queue.path)
+        self.addCleanup(reopened.close)
+
+        self.assertEqual(reopened.get_stats()['pending'], 1)
+
+
+class TestOutboundSender(OutboundTestCase):
+    """Tests para OutboundSender"""
+
+    def test_drain_sends_and_retries(self):
+        """Test que el lote se envía y los fallos quedan pendientes"""
+        email_sender = mock.Mock()
+        email_sender.send_command_response.side_effect = lambda **kw: kw['to_email'] != 'malo@example.com'
+        self.queue.enqueue('a', make_payload('bueno@example.com'))
+        self.queue.enqueue('b', make_payload('malo@example.com'))
+
+        sender = OutboundSender(self.queue, email_sender, batch_size=10)
+        self.assertEqual(sender.drain_once(), 2)
+
+        stats = self.queue.get_stats()
+        self.assertEqual((stats['sent'], stats['pending']), (1, 1))
+
+    def test_thread_drains_on_notify(self):
+        """Test que el hilo envía apenas se le avisa y vacía la cola al detenerse"""
+        email_sender = mock.Mock()
+        email_sender.send_command_response.return_value = True
+        sender = OutboundSender(self.queue, email_sender, batch_size=10, poll_interval=30)
+        sender.start()
+
+        self.queue.enqueue('a', make_payload())
+        sender.notify()
+        sender.stop(timeout=5)
+
+        self.assertFalse(sender.is_alive())
+        self.assertEqual(self.queue.get_stats()['sent'], 1)
+
+    def test_stop_does_not_drain_while_thread_is_sending(self):
+        """Test que si el hilo sigue enviando al agotarse el timeout no se vacía la cola en paralelo"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_send(**kwargs):
+            started.set()
+            release.wait(5)
+            return True
+
+        email_sender = mock.Mock()
+        email_sender.send_command_response.side_effect = slow_send
+        sender = OutboundSender(self.queue, email_sender, batch_size=10, poll_interval=30)
+        self.queue.enqueue('a', make_payload())
+        sender.start()
+        self.assertTrue(started.wait(5))
+
+        sender.stop(timeout=0.05)
+        calls = email_sender.send_command_response.call_count
+        release.set()
+        sender.join(5)
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(self.queue.get_stats()['sent'], 1)
+
+
+class TestDaemonWithQueue(OutboundTestCase):
+    """Tests del daemon con la cola de respuestas activa"""
+
+    def setUp(self):
+        super().setUp()
+        self.daemon = build_daemon()
+        self.daemon.outbound_queue = self.queue
+        self.daemon.outbound_sender = OutboundSender(self.queue, self.daemon.email_sender)
+
+    def test_replies_are_enqueued(self):
+        """Test que el daemon encola en vez de enviar por SMTP"""
+        self.daemon.process_email(make_email(1, 'cliente@example.com'))
+
+        self.daemon.email_sender.send_command_response.assert_not_called()
+        self.assertEqual(self.queue.get_stats()['pending'], 1)
+        self.assertEqual(self.daemon.mail_source.marked, ['hash-1'])
+
+    def test_answered_email_not_reexecuted(self):
+        """Test que un correo ya respondido no vuelve a ejecutar su comando"""
+        email_data = make_email(1, 'cliente@example.com')
+        self.daemon.process_email(email_data)
+        self.daemon.process_email(email_data)
+
+        self.assertEqual(len(self.daemon.email_processor.executed), 1)
+        self.assertEqual(self.queue.get_stats()['pending'], 1)
+
+    def test_cleanup_waits_for_inflight_send(self):
+        """Test que al detenerse no se cierran SMTP ni la cola bajo un envío en curso"""
+        started = threading.Event()
+        events = []
+
+        def slow_send(**kwargs):
+            started.set()
+            time.sleep(0.3)
+            events.append('sent')
+            return True
+
+        self.daemon.email_sender.send_command_response.side_effect = slow_send
+        self.daemon.email_sender.close.side_effect = lambda: events.append('smtp closed')
+        self.queue.enqueue('a', make_payload())
+        self.daemon.outbound_sender.start()
+        self.assertTrue(started.wait(5))
+
+        with mock.patch.object(self.daemon, 'OUTBOUND_STOP_TIMEOUT', 0.05), \
+                mock.patch('daemon.email_daemon.db') as db:
+            db.get_stats.return_value = {'created': 0, 'max_in_use': 0, 'avg_wait_ms': 0.0, 'timeouts': 0}
+            self.daemon.cleanup()
+
+        self.assertEqual(events, ['sent', 'smtp closed'])
+        reopened = OutboundQueue(self.queue.path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get_stats()['sent'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,340 @@
+"""
+Tests para el pool de conexiones y las transacciones de PostgreSQL
+"""
+import unittest
+import sys
+import os
+import threading
+from unittest import mock
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+from psycopg2 import extensions
+from config.database import Database, PreparedStatements
+from config.pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    description = [('id',)]
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = conn.rowcount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if not self.conn.alive:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        self.conn.status = extensions.TRANSACTION_STATUS_INTRANS
+        self.conn.queries.append(query)
+
+    def fetchone(self):
+        return (7,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Conexión psycopg2 falsa: estado de transacción, cierre y queries"""
+
+    def __init__(self):
+        self.alive = True
+        self.closed = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.queries = []
+        self.rowcount = 1
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        self.commits += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeFactory:
+    """Crea FakeConnection y guarda las conexiones abiertas"""
+
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        conn = FakeConnection()
+        self.connections.append(conn)
+        return conn
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests para ConnectionPool"""
+
+    def setUp(self):
+        self.factory = FakeFactory()
+        self.pool = ConnectionPool(self.factory, min_size=1, max_size=2, timeout=1, max_lifetime=3600, check_idle=30)
+
+    def test_fill_and_reuse(self):
+        """Test que fill abre min_size conexiones y se reutilizan"""
+        self.pool.fill()
+        for _ in range(3):
+            self.pool.release(self.pool.acquire())
+
+        self.assertEqual(len(self.factory.connections), 1)
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['checkouts'], stats['created'], stats['in_use']), (3, 1, 0))
+        self.assertEqual(self.pool.info(self.factory.connections[0])['uses'], 3)
+
+    def test_blocking_checkout_waits_for_release(self):
+        """Test que con el pool lleno se espera a que se libere una conexión"""
+        first = self.pool.acquire()
+        self.pool.acquire()
+        threading.Timer(0.1, self.pool.release, args=[first]).start()
+
+        conn = self.pool.acquire()
+
+        self.assertIs(conn, first)
+        self.assertGreater(self.pool.get_stats()['max_wait_ms'], 50)
+
+    def test_timeout(self):
+        """Test que sin conexiones libres se agota el tiempo de espera"""
+        self.pool.acquire()
+        self.pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire(timeout=0.05)
+        self.assertEqual(self.pool.get_stats()['timeouts'], 1)
+
+    def test_broken_idle_connection_replaced(self):
+        """Test que una conexión ociosa que no responde se reemplaza"""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        conn.alive = False
+
+        with mock.patch('config.pool.time.monotonic', return_value=10 ** 6):
+            new_conn = self.pool.acquire()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.get_stats()['size'], 1)
+
+    def test_recently_used_connection_not_checked(self):
+        """Test que una conexión recién usada se entrega sin SELECT 1"""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        self.pool.acquire()
+
+        self.assertEqual(conn.queries, [])
+
+    def test_max_lifetime(self):
+        """Test que una conexión vieja se recicla"""
+        self.pool.max_lifetime = 0.01
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        with mock.patch('config.pool.time.monotonic', return_value=10 ** 6):
+            new_conn = self.pool.acquire()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertEqual(self.pool.get_stats()['discarded'], 1)
+
+    def test_release_rolls_back_and_reclaims_closed(self):
+        """Test que devolver revierte transacciones abiertas y libera conexiones cerradas"""
+        conn = self.pool.acquire()
+        conn.status = extensions.TRANSACTION_STATUS_INERROR
+        self.pool.release(conn)
+        self.assertEqual(conn.rollbacks, 1)
+
+        conn = self.pool.acquire()
+        other = self.pool.acquire()
+        conn.close()
+        self.pool.release(conn)
+
+        self.assertIsNot(self.pool.acquire(timeout=0.05), other)
+        self.assertEqual(self.pool.get_stats()['discarded'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        """Test que un error al conectar no deja el lugar ocupado"""
+        self.pool.factory = mock.Mock(side_effect=psycopg2.OperationalError('refused'))
+        for _ in range(3):
+            with self.assertRaises(psycopg2.OperationalError):
+                self.pool.acquire()
+        self.assertEqual(self.pool.get_stats()['size'], 0)
+
+    def test_concurrent_checkouts_keep_counts(self):
+        """Test que los contadores no pierden checkouts concurrentes"""
+        self.pool.max_size = 4
+
+        def worker():
+            for _ in range(200):
+                self.pool.release(self.pool.acquire())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.pool.get_stats()
+        uses = sum(self.pool.info(conn)['uses'] for conn in self.factory.connections)
+        self.assertEqual((stats['checkouts'], uses), (1600, 1600))
+        self.assertEqual(stats['created'], len(self.factory.connections))
+
+    def test_database_uses_injected_factory(self):
+        """Test que Database usa el factory inyectado y close cierra el pool"""
+        database = Database(connect=self.factory)
+
+        self.assertEqual(database.execute("UPDATE x SET y = 1"), 1)
+        database.close()
+
+        self.assertTrue(self.factory.connections[0].closed)
+        self.assertIsNone(database.get_connection())
+
+
+class TestTransactions(unittest.TestCase):
+    """Tests para Database.transaction() con savepoints"""
+
+    def setUp(self):
+        self.factory = FakeFactory()
+        self.db = Database(connect=self.factory)
+        self.conn = self.factory.connections[0]
+
+    def test_single_connection_and_commit(self):
+        """Test que el bloque usa una conexión y hace un solo commit"""
+        with self.db.transaction():
+            self.db.execute("INSERT INTO a VALUES (1)")
+            self.db.execute("UPDATE b SET c = 1")
+
+        self.assertEqual(len(self.factory.connections), 1)
+        self.assertEqual(self.conn.queries, ["INSERT INTO a VALUES (1)", "UPDATE b SET c = 1"])
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (1, 0))
+        self.assertEqual(self.db.get_stats()['transactions'], 1)
+
+    def test_nested_block_uses_savepoint(self):
+        """Test que un bloque anidado que falla vuelve a su savepoint y el externo sigue"""
+        with self.db.transaction() as outer:
+            self.db.execute("INSERT INTO a VALUES (1)")
+            with self.assertRaises(ValueError):
+                with self.db.transaction() as inner:
+                    self.assertEqual(inner.savepoint, 'sp_1')
+                    self.db.execute("INSERT INTO a VALUES (2)")
+                    raise ValueError('falla')
+            with self.db.transaction():
+                self.db.execute("INSERT INTO a VALUES (3)")
+            self.assertIs(self.db._local.transaction, outer)
+
+        self.assertEqual(self.conn.queries, [
+            "INSERT INTO a VALUES (1)",
+            "SAVEPOINT sp_1", "INSERT INTO a VALUES (2)", "ROLLBACK TO SAVEPOINT sp_1",
+            "SAVEPOINT sp_1", "INSERT INTO a VALUES (3)", "RELEASE SAVEPOINT sp_1",
+        ])
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (1, 0))
+        self.assertEqual(self.db.get_stats()['savepoint_rollbacks'], 1)
+
+    def test_on_commit_runs_after_outer_commit(self):
+        """Test que on_commit espera al commit externo y se descarta si se revierte"""
+        calls = []
+        with self.db.transaction():
+            with self.db.transaction():
+                self.db.on_commit(lambda: calls.append('commit'))
+            self.assertEqual(calls, [])
+        with self.assertRaises(ValueError):
+            with self.db.transaction():
+                self.db.on_commit(lambda: calls.append('rollback'))
+                raise ValueError('falla')
+        self.db.on_commit(lambda: calls.append('sin transacción'))
+
+        self.assertEqual(calls, ['commit', 'sin transacción'])
+
+    def test_registrar_detalle_pago_is_atomic(self):
+        """Test que el detalle y la actualización del pago van juntos"""
+        from models.pago import Pago
+
+        with mock.patch('models.pago.db', self.db):
+            self.assertEqual(Pago.registrar_detalle_pago(1, 50, 'efectivo'), 7)
+            self.assertEqual((self.conn.commits, self.conn.rollbacks), (1, 0))
+
+            self.conn.rowcount = 0
+            with self.assertRaises(RuntimeError):
+                Pago.registrar_detalle_pago(99, 50, 'efectivo')
+
+        self.assertEqual(len(self.conn.queries), 4)
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (1, 1))
+
+
+class TestPreparedStatements(unittest.TestCase):
+    """Tests para las sentencias preparadas por conexión"""
+
+    QUERY = "SELECT * FROM usuarios WHERE id = %s"
+
+    def setUp(self):
+        self.factory = FakeFactory()
+        self.db = Database(connect=self.factory)
+        self.conn = self.factory.connections[0]
+
+    def test_to_positional(self):
+        """Test conversión de placeholders de psycopg2 a $n"""
+        self.assertEqual(
+            PreparedStatements.to_positional("SELECT * FROM t WHERE a = %s AND b LIKE 'x%%' AND c = %s"),
+            "SELECT * FROM t WHERE a = $1 AND b LIKE 'x%' AND c = $2"
+        )
+        self.assertEqual(PreparedStatements.execute_sql('ps_1', 2), "EXECUTE ps_1(%s, %s)")
+
+    def test_prepare_once_per_connection(self):
+        """Test que la query se prepara una vez y luego solo se ejecuta"""
+        for _ in range(3):
+            self.assertEqual(self.db.execute(self.QUERY, (1,), fetch_one=True, prepare=True), {'id': 7})
+
+        self.assertEqual(self.conn.queries, [
+            "PREPARE ps_1 AS SELECT * FROM usuarios WHERE id = $1",
+            "EXECUTE ps_1(%s)", "EXECUTE ps_1(%s)", "EXECUTE ps_1(%s)",
+        ])
+        stats = self.db.get_stats()
+        self.assertEqual((stats['prepared'], stats['prepared_hits']), (1, 2))
+
+    def test_generation_and_failures_reprepare(self):
+        """Test que al invalidar o fallar la sentencia se vuelve a preparar"""
+        self.db.execute(self.QUERY, (1,), fetch_one=True, prepare=True)
+        self.db.reset_prepared_statements()
+        self.db.execute(self.QUERY, (1,), fetch_one=True, prepare=True)
+
+        self.conn.alive = False
+        self.assertIsNone(self.db.execute(self.QUERY, (1,), fetch_one=True, prepare=True))
+        self.conn.alive = True
+        self.db.execute(self.QUERY, (1,), fetch_one=True, prepare=True)
+
+        self.assertEqual(self.conn.queries, [
+            "PREPARE ps_1 AS SELECT * FROM usuarios WHERE id = $1", "EXECUTE ps_1(%s)",
+            "DEALLOCATE ALL",
+            "PREPARE ps_1 AS SELECT * FROM usuarios WHERE id = $1", "EXECUTE ps_1(%s)",
+            "PREPARE ps_2 AS SELECT * FROM usuarios WHERE id = $1", "EXECUTE ps_2(%s)",
+        ])
+
+    def test_disabled(self):
+        """Test que con DB_PREPARED_STATEMENTS=False se ejecuta la query tal cual"""
+        with mock.patch('config.settings.settings.DB_PREPARED_STATEMENTS', False):
+            self.db.execute(self.QUERY, (1,), fetch_one=True, prepare=True)
+
+        self.assertEqual(self.conn.queries, [self.QUERY])
+
+
+if __name__ == '__main__':
+    unittest.main()
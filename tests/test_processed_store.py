@@ -0,0 +1,160 @@
+"""
+Tests para el registro de correos procesados
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.processed_store import ProcessedStore
+
+
+class TestProcessedStore(unittest.TestCase):
+    """Tests para ProcessedStore"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'processed.txt')
+
+    def open_store(self, **kwargs):
+        kwargs.setdefault('max_entries', 100)
+        kwargs.setdefault('fsync_every', 1)
+        kwargs.setdefault('bloom_capacity', 0)
+        store = ProcessedStore(self.path, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def read_lines(self):
+        with open(self.path, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_add_and_lookup(self):
+        """Test marcado y consulta por hash y por UID"""
+        store = self.open_store()
+        store.add('h1', 'UID1')
+        store.add('h2')
+
+        self.assertIn('h1', store)
+        self.assertIn('h2', store)
+        self.assertTrue(store.has_uid('UID1'))
+        self.assertFalse(store.has_uid('UID2'))
+
+    def test_append_only(self):
+        """Test que cada marca agrega una línea sin reescribir el archivo"""
+        store = self.open_store()
+        store.add('h1', 'UID1')
+        store.add('h2')
+        store.add('h1', 'UID1')
+
+        self.assertEqual(self.read_lines(), ['h1\tUID1', 'h2'])
+
+    def test_evicts_oldest_first(self):
+        """Test que se descartan los más antiguos, no un subconjunto arbitrario"""
+        store = self.open_store(max_entries=3)
+        for i in range(1, 6):
+            store.add(f'h{i}', f'UID{i}')
+
+        self.assertEqual([h for h in ('h1', 'h2', 'h3', 'h4', 'h5') if h in store], ['h3', 'h4', 'h5'])
+        self.assertTrue(store.has_uid('UID1'))
+        self.assertTrue(store.has_uid('UID5'))
+
+    def test_uids_kept_until_gone_from_server(self):
+        """Test que los UIDs fuera de la ventana sobreviven a la compactación y se olvidan al no listarse"""
+        store = self.open_store(max_entries=3)
+        for i in range(1, 11):
+            store.add(f'h{i}', f'UID{i}')
+        store.close()
+
+        reopened = self.open_store(max_entries=3)
+        self.assertTrue(all(reopened.has_uid(f'UID{i}') for i in range(1, 11)))
+
+        reopened.retain_uids({f'UID{i}' for i in range(2, 11)})
+        self.assertFalse(reopened.has_uid('UID1'))
+        self.assertTrue(reopened.has_uid('UID2'))
+
+    def test_compaction(self):
+        """Test que el log se compacta al superar el doble del máximo"""
+        store = self.open_store(max_entries=3)
+        for i in range(1, 8):
+            store.add(f'h{i}')
+
+        self.assertLessEqual(len(self.read_lines()), 6)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_reload_preserves_order(self):
+        """Test que al reabrir se conserva el orden de inserción y los UIDs"""
+        store = self.open_store(max_entries=3)
+        for i in range(1, 5):
+            store.add(f'h{i}', f'UID{i}')
+        store.close()
+
+        reopened = self.open_store(max_entries=3)
+        reopened.add('h5')
+
+        self.assertNotIn('h2', reopened)
+        self.assertIn('h3', reopened)
+        self.assertTrue(reopened.has_uid('UID4'))
+
+    def test_legacy_file_without_trailing_newline(self):
+        """Test que el archivo del formato anterior se lee y se sigue agregando bien"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('h1\tUID1\nh2')
+
+        store = self.open_store()
+        store.add('h3')
+
+        self.assertIn('h2', store)
+        self.assertTrue(store.has_uid('UID1'))
+        self.assertEqual(self.read_lines(), ['h1\tUID1', 'h2', 'h3'])
+
+
+class TestProcessedStoreBloom(TestProcessedStore):
+    """Tests del historial largo con filtro de Bloom"""
+
+    def open_store(self, **kwargs):
+        kwargs.setdefault('bloom_capacity', 1000)
+        kwargs.setdefault('bloom_error_rate', 1e-6)
+        return super().open_store(**kwargs)
+
+    def test_evicts_oldest_first(self):
+        """Test que los descartados de la ventana exacta siguen detectándose"""
+        store = self.open_store(max_entries=3)
+        for i in range(1, 6):
+            store.add(f'h{i}', f'UID{i}')
+
+        self.assertEqual(len(store), 3)
+        self.assertTrue(all(f'h{i}' in store for i in range(1, 6)))
+        self.assertNotIn('h6', store)
+        self.assertTrue(store.has_uid('UID1'))
+
+    def test_reload_preserves_order(self):
+        """Test que el historial sobrevive a compactaciones y reinicios"""
+        store = self.open_store(max_entries=3)
+        for i in range(1, 11):
+            store.add(f'h{i}')
+        store.close()
+
+        reopened = self.open_store(max_entries=3)
+
+        self.assertTrue(os.path.exists(self.path + '.bloom'))
+        self.assertTrue(all(f'h{i}' in reopened for i in range(1, 11)))
+        self.assertNotIn('h11', reopened)
+
+    def test_corrupt_filter_is_rebuilt(self):
+        """Test que un filtro dañado se reemplaza usando el log"""
+        with open(self.path + '.bloom', 'wb') as f:
+            f.write(b'basura')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('h1\n')
+
+        store = self.open_store()
+
+        self.assertIn('h1', store)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
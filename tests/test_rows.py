@@ -0,0 +1,72 @@
+"""
+Tests para las fábricas de filas y ResultSet
+"""
+import unittest
+import sys
+import os
+import json
+from decimal import Decimal
+
+# Agregar directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.rows import ResultSet, dict_rows, record_rows, to_serializable, tuple_rows
+from services.email_sender import EmailSender
+
+COLUMNS = ['id', 'placa', 'kilometraje']
+ROWS = [(1, 'SCZ-0001', 1000), (2, 'SCZ-0002', None), (3, 'LPZ-0003', 3000)]
+
+
+class TestRowFactories(unittest.TestCase):
+    """Tests para dict_rows, tuple_rows y record_rows"""
+
+    def test_factories(self):
+        """Test las tres formas de fila"""
+        self.assertEqual(dict_rows(COLUMNS, ROWS)[1], {'id': 2, 'placa': 'SCZ-0002', 'kilometraje': None})
+        self.assertIs(tuple_rows(COLUMNS, ROWS), ROWS)
+
+        records = record_rows(COLUMNS, ROWS)
+        self.assertEqual(records[0].placa, 'SCZ-0001')
+        self.assertIs(type(records[0]), type(record_rows(COLUMNS, ROWS[:1])[0]))
+        self.assertFalse(hasattr(records[0], '__dict__'))
+
+
+class TestResultSet(unittest.TestCase):
+    """Tests para ResultSet y RowView"""
+
+    def setUp(self):
+        self.result = ResultSet(COLUMNS, ROWS)
+
+    def test_sequence_of_mappings(self):
+        """Test que se usa como una lista de dicts de solo lectura"""
+        self.assertEqual(len(self.result), 3)
+        self.assertEqual(self.result[-1]['placa'], 'LPZ-0003')
+        self.assertEqual(self.result[0].get('color', 'x'), 'x')
+        self.assertEqual(self.result[:2], dict_rows(COLUMNS, ROWS[:2]))
+        self.assertEqual(list(self.result[1].keys()), COLUMNS)
+        with self.assertRaises(TypeError):
+            self.result[0]['placa'] = 'otra'
+
+    def test_json_serialization(self):
+        """Test serialización para la cola de respuestas"""
+        result = ResultSet(['id', 'monto'], [(1, Decimal('10.50'))])
+        data = json.loads(json.dumps({'data': result}, default=to_serializable))
+        self.assertEqual(data['data'], [{'id': 1, 'monto': '10.50'}])
+
+    def test_formatters_read_tuples(self):
+        """Test que los formateadores de respuesta aceptan un ResultSet"""
+        sender = EmailSender.__new__(EmailSender)
+
+        html = sender._format_data_html(self.result)
+        self.assertIn('<th>placa</th>', html)
+        self.assertIn('<td>SCZ-0002</td><td>None</td>', html)
+        self.assertIn('3 registros', html)
+
+        self.assertEqual(
+            sender._format_data_html(self.result),
+            sender._format_data_html(self.result.to_dicts())
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()